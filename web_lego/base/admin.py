@@ -1,11 +1,13 @@
 from django.contrib import admin
-from .models import Website, Block
+from .models import Job, Website, Block
 
 @admin.register(Website)
 class WebsiteAdmin(admin.ModelAdmin):
     list_display = ('title', 'owner', 'created_at', 'updated_at')
+    list_select_related = ('owner',)
     list_filter = ('created_at', 'owner')
     search_fields = ('title', 'description')
+    ordering = ('-created_at',)
     fieldsets = (
         ('Основная информация', {
             'fields': ('title', 'description', 'owner')
@@ -24,6 +26,16 @@ class WebsiteAdmin(admin.ModelAdmin):
 @admin.register(Block)
 class BlockAdmin(admin.ModelAdmin):
     list_display = ('id', 'website', 'block_type', 'order', 'is_active', 'created_at')
+    # Block.__str__ и колонка website читают сайт: загружаем его в том же запросе
+    list_select_related = ('website',)
     list_filter = ('block_type', 'is_active', 'created_at')
     search_fields = ('website__title',)
-    ordering = ('website', 'order')
\ No newline at end of file
+    ordering = ('website', 'order')
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'status', 'attempts', 'run_at', 'duration', 'created_at')
+    list_filter = ('status', 'name')
+    search_fields = ('dedupe_key',)
+    ordering = ('-created_at',)
+    readonly_fields = ('started_at', 'finished_at', 'duration', 'locked_by', 'last_error')
@@ -0,0 +1,334 @@
+"""Совместное редактирование сайта.
+
+Изменения блоков из редактора применяются с оптимистичной блокировкой: у
+блока есть ``version``, и изменение, основанное на устаревшей версии,
+отклоняется. Проверка и запись — один ``UPDATE ... WHERE version = ...``
+(compare-and-swap), без блокировок строк.
+
+Применённые изменения рассылаются всем открытым редакторам сайта
+(WebSocket-канал, base/websocket.py) диффами — сообщениями с ``op``:
+
+* ``u`` — изменение блока: ``id``, новая версия ``v``, изменённые поля и
+  ``data`` в формате JSON Merge Patch; если изменилось не только положение
+  и размер, ещё ``html`` содержимого блока и ``css`` его классов;
+* ``b`` — полное состояние блока (``block``, ``html``, ``css``);
+* ``c`` — создан блок (``block``), ``d`` — удалён блок (``id``).
+
+Редакторы сайта объединяются в группы в памяти процесса. Если задан
+``COLLAB_REDIS_URL``, диффы ещё и публикуются в Redis pub/sub, и их получают
+редакторы, подключённые к другим процессам, в том числе когда сайт изменили
+через HTTP в WSGI-воркере. Без него диффы доходят только до редакторов того
+же процесса. Конфликты ловятся в БД при любом числе процессов.
+"""
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .media import sync_references
+from .models import Block
+from .patches import make_patch, merge_patch
+from .renderers import blocks_css, get_renderer
+from .signals import website_content_changed
+
+logger = logging.getLogger(__name__)
+
+# Поля блока, которые можно менять через API и канал редактора
+BLOCK_UPDATE_FIELDS = ('data', 'order', 'is_active', 'background_color', 'text_color', 'padding', 'margin')
+
+# Ключи data, от которых не зависит содержимое блока в редакторе
+LAYOUT_KEYS = frozenset(('position_x', 'position_y', 'width', 'height'))
+
+_groups = defaultdict(set)
+_groups_lock = threading.Lock()
+
+
+def serialize_block(block):
+    return {
+        'id': block.id,
+        'block_type': block.block_type,
+        'order': block.order,
+        'version': block.version,
+        'data': block.get_data(),
+        'image_url': block.image.url if block.image else None
+    }
+
+
+def rendered_block(block):
+    """``html`` содержимого блока и ``css`` классов, которые он использует"""
+    return {
+        'html': str(get_renderer(block.block_type).render(block)),
+        'css': blocks_css([block]),
+    }
+
+
+# === Группы редакторов ===
+
+def join(website_id, listener):
+    """Подписать ``listener(message)`` на диффы сайта; вызывается из любого потока"""
+    with _groups_lock:
+        _groups[website_id].add(listener)
+    if _redis_url():
+        _start_relay()
+
+
+def leave(website_id, listener):
+    with _groups_lock:
+        listeners = _groups.get(website_id)
+        if listeners is not None:
+            listeners.discard(listener)
+            if not listeners:
+                del _groups[website_id]
+
+
+def editors(website_id):
+    """Сколько редакторов сайта подключено к этому процессу"""
+    with _groups_lock:
+        return len(_groups.get(website_id, ()))
+
+
+def publish(website_id, message, exclude=None):
+    """Разослать ``message`` редакторам сайта, кроме ``exclude``, во всех процессах"""
+    _deliver(website_id, message, exclude)
+    if _redis_url():
+        try:
+            _redis().publish(_channel(website_id), json.dumps({'origin': PROCESS_ID, 'message': message}))
+        except Exception:
+            logger.exception('Не удалось опубликовать дифф сайта %s в Redis', website_id)
+
+
+def _deliver(website_id, message, exclude=None):
+    """Разослать ``message`` редакторам сайта, подключённым к этому процессу"""
+    with _groups_lock:
+        listeners = [listener for listener in _groups.get(website_id, ()) if listener is not exclude]
+    for listener in listeners:
+        try:
+            listener(message)
+        except Exception:
+            logger.exception('Не удалось отправить дифф редактору сайта %s', website_id)
+
+
+def publish_on_commit(website_id, message, exclude=None):
+    """Разослать после коммита: редакторы не должны увидеть откатившиеся изменения.
+
+    ``message`` может быть функцией без аргументов — тогда сообщение строится,
+    только если его есть кому получить.
+    """
+    if not editors(website_id) and not _redis_url():
+        return
+    if callable(message):
+        message = message()
+    transaction.on_commit(lambda: publish(website_id, message, exclude))
+
+
+# === Рассылка между процессами (Redis pub/sub) ===
+#
+# Процесс, в котором есть редакторы, подписывается на каналы всех сайтов
+# шаблоном и раздаёт сообщения своим группам. Свои же сообщения он
+# пропускает: их редакторы уже получили напрямую. Сообщения, опубликованные,
+# пока подписка восстанавливается после обрыва, теряются; редактор догоняет
+# их сверкой версий при переподключении (``sync``).
+
+CHANNEL_PREFIX = 'web_lego:collab:'
+
+# Отличает сообщения этого процесса от сообщений других процессов
+PROCESS_ID = uuid.uuid4().hex
+
+_relay = None
+_relay_lock = threading.Lock()
+
+
+def _redis_url():
+    return getattr(settings, 'COLLAB_REDIS_URL', '')
+
+
+@lru_cache(maxsize=None)
+def _client(url):
+    import redis
+    # Публикация идёт после коммита в потоке запроса: недоступный Redis не
+    # должен его подвешивать
+    return redis.Redis.from_url(url, socket_connect_timeout=1, socket_timeout=1)
+
+
+def _redis():
+    return _client(_redis_url())
+
+
+def _subscriber():
+    import redis
+    # Подписка ждёт сообщений сколько угодно долго; живость соединения
+    # проверяется PING раз в полминуты
+    return redis.Redis.from_url(_redis_url(), socket_connect_timeout=1, health_check_interval=30)
+
+
+def _channel(website_id):
+    return f'{CHANNEL_PREFIX}{website_id}'
+
+
+def _start_relay():
+    global _relay
+    with _relay_lock:
+        if _relay is None:
+            _relay = threading.Thread(target=_relay_forever, name='collab-relay', daemon=True)
+            _relay.start()
+
+
+def _relay_forever():
+    while True:
+        try:
+            pubsub = _subscriber().pubsub(ignore_subscribe_messages=True)
+            pubsub.psubscribe(f'{CHANNEL_PREFIX}*')
+            for item in pubsub.listen():
+                relay_message(item['channel'], item['data'])
+        except Exception:
+            logger.exception('Подписка на диффы в Redis оборвалась, переподключаемся')
+            time.sleep(1)
+
+
+def relay_message(channel, data):
+    """Раздать редакторам этого процесса сообщение из канала Redis"""
+    if isinstance(channel, bytes):
+        channel = channel.decode()
+    try:
+        website_id = int(channel[len(CHANNEL_PREFIX):])
+        payload = json.loads(data)
+    except (TypeError, ValueError):
+        logger.warning('Непонятное сообщение в канале %s', channel)
+        return
+    if payload.get('origin') != PROCESS_ID and editors(website_id):
+        _deliver(website_id, payload['message'])
+
+
+def block_changed(block, exclude=None):
+    publish_on_commit(block.website_id, lambda: {
+        'op': 'b', 'block': serialize_block(block), **rendered_block(block),
+    }, exclude)
+
+
+def block_created(block, exclude=None):
+    publish_on_commit(block.website_id, lambda: {'op': 'c', 'block': serialize_block(block)}, exclude)
+
+
+def block_deleted(website_id, block_id, exclude=None):
+    publish_on_commit(website_id, {'op': 'd', 'id': block_id}, exclude)
+
+
+# === Изменение блоков ===
+
+def update_block(block, version, fields=None, data_patch=None, origin=None):
+    """Применить изменения к блоку, если в БД он всё ещё версии ``version``.
+
+    ``fields`` — новые значения полей из ``BLOCK_UPDATE_FIELDS``, ``data_patch`` —
+    JSON Merge Patch для ``data`` (применяется после ``fields['data']``).
+    Возвращает False, если блок успели изменить или удалить: тогда ничего не
+    записано. При успехе ``block`` обновлён в памяти, а дифф после коммита
+    получают редакторы сайта, кроме ``origin``.
+    """
+    if block.version != version:
+        return False
+    fields = {name: value for name, value in (fields or {}).items() if name in BLOCK_UPDATE_FIELDS}
+    old_data = block.data or {}
+    data = fields.pop('data', old_data)
+    if data_patch:
+        data = merge_patch(data, data_patch)
+    patch = make_patch(old_data, data)
+    fields = {name: value for name, value in fields.items() if getattr(block, name) != value}
+    if patch:
+        fields['data'] = data
+    if not fields:
+        return True
+
+    now = timezone.now()
+    with transaction.atomic():
+        updated = Block.objects.filter(id=block.id, version=version).update(
+            version=F('version') + 1, updated_at=now, **fields,
+        )
+        if not updated:
+            return False
+        for name, value in fields.items():
+            setattr(block, name, value)
+        block.version = version + 1
+        block.updated_at = now
+        sync_references([block])
+        website_content_changed(block.website_id)
+
+        publish_on_commit(block.website_id, lambda: _diff(block, fields, patch), exclude=origin)
+    return True
+
+
+def _diff(block, fields, patch):
+    diff = {'op': 'u', 'id': block.id, 'v': block.version, **fields}
+    if patch:
+        diff['data'] = patch
+    # Содержимое блока меняется не только от перетаскивания: шлём его HTML
+    if set(fields) - {'data'} or set(patch) - LAYOUT_KEYS:
+        diff.update(rendered_block(block))
+    return diff
+
+
+def apply_op(website_id, op, origin=None):
+    """Выполнить операцию из канала редактора и вернуть ответ отправителю.
+
+    ``{"op": "u", "ref": n, "id": ..., "v": <версия>, "data": {<merge patch>}, <поля>}`` —
+    изменить блок; ответ ``ack`` с новой версией или ``conflict`` с текущим
+    состоянием блока. ``{"op": "get", "ref": n, "id": ...}`` — состояние блока (``b``).
+    ``{"op": "sync", "ref": n, "versions": {id: версия}}`` — сверка после
+    подключения (см. ``sync_blocks``).
+    """
+    if not isinstance(op, dict):
+        return {'op': 'error', 'error': 'Операция должна быть объектом'}
+    kind, ref, block_id = op.get('op'), op.get('ref'), op.get('id')
+    if kind == 'sync':
+        versions = op.get('versions') if isinstance(op.get('versions'), dict) else {}
+        return {'op': 'sync', 'ref': ref, **sync_blocks(website_id, versions)}
+    if kind not in ('u', 'get'):
+        return {'op': 'error', 'ref': ref, 'error': f'Неизвестная операция: {kind}'}
+    block = Block.objects.filter(id=block_id, website_id=website_id).first() if isinstance(block_id, int) else None
+    if block is None:
+        return {'op': 'error', 'ref': ref, 'id': block_id, 'error': 'Блок не найден'}
+
+    if kind == 'get':
+        return {'op': 'b', 'ref': ref, 'block': serialize_block(block), **rendered_block(block)}
+
+    fields = {name: op[name] for name in BLOCK_UPDATE_FIELDS if name in op and name != 'data'}
+    data_patch = op.get('data') if isinstance(op.get('data'), dict) else None
+    try:
+        if update_block(block, op.get('v'), fields, data_patch, origin=origin):
+            return {'op': 'ack', 'ref': ref, 'id': block.id, 'v': block.version}
+    except Exception as e:
+        return {'op': 'error', 'ref': ref, 'id': block.id, 'error': str(e)}
+
+    block = Block.objects.filter(id=block.id).first()
+    if block is None:
+        return {'op': 'error', 'ref': ref, 'id': block_id, 'error': 'Блок не найден'}
+    return {'op': 'conflict', 'ref': ref, 'block': serialize_block(block), **rendered_block(block)}
+
+
+def sync_blocks(website_id, versions):
+    """Что изменилось на сайте относительно версий блоков ``{id: версия}`` у редактора.
+
+    ``blocks`` — состояние изменившихся блоков, ``deleted`` — id удалённых,
+    ``created`` — id новых активных блоков, которых у редактора нет.
+    """
+    known = {}
+    for block_id, version in versions.items():
+        try:
+            known[int(block_id)] = version
+        except (TypeError, ValueError):
+            continue
+    current = dict(Block.objects.filter(website_id=website_id, is_active=True).values_list('id', 'version'))
+    changed = [block_id for block_id, version in current.items() if block_id in known and known[block_id] != version]
+    blocks = Block.objects.filter(id__in=changed) if changed else []
+    return {
+        'blocks': [{'block': serialize_block(block), **rendered_block(block)} for block in blocks],
+        'deleted': [block_id for block_id in known if block_id not in current],
+        'created': [block_id for block_id in current if block_id not in known],
+    }
@@ -0,0 +1,196 @@
+"""Экспорт опубликованных сайтов в статические каталоги.
+
+Каждый сайт рендерится тем же шаблоном, что и ``view_website``, в каталог
+``STATIC_EXPORT_ROOT/<website_id>/`` вместе со статикой страницы и всеми
+медиафайлами, на которые она ссылается. Ссылки переписываются на
+относительные, так что каталог можно отдавать nginx без Django.
+
+Рядом с ``index.html`` сохраняется отпечаток состояния сайта; повторный
+экспорт пропускает сайты, у которых отпечаток не изменился.
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.db import connections
+from django.template.loader import render_to_string
+
+from .models import Website
+from .storage import media_storage
+
+FINGERPRINT_FILE = '.export.json'
+
+# Атрибуты с одним адресом, атрибуты со списком кандидатов ``url 640w, url 2x``
+# и адреса в CSS (``url("...")`` в <style> и style="")
+_URL_ATTR_RE = re.compile(r'(\s(?:src|href|poster|data-src)=")([^"]*)"')
+_SRCSET_ATTR_RE = re.compile(r'(\s[\w-]*srcset=")([^"]*)"')
+_CSS_URL_RE = re.compile(r'(url\((?:"|\'|&quot;|&#x27;)?)([^"\')&]+)')
+
+
+def get_export_root():
+    return str(getattr(settings, 'STATIC_EXPORT_ROOT', os.path.join(settings.BASE_DIR, 'static_export')))
+
+
+def _site_dir(website_id, root=None):
+    return os.path.join(root or get_export_root(), str(website_id))
+
+
+def _fingerprint(updated_at, blocks_updated_at, blocks_count):
+    raw = f'{updated_at.isoformat() if updated_at else ""}|' \
+          f'{blocks_updated_at.isoformat() if blocks_updated_at else ""}|{blocks_count}'
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def _with_fingerprint(queryset):
+    return queryset.with_content_state().values_list('id', 'updated_at', 'blocks_updated_at', 'blocks_count')
+
+
+def current_fingerprints(queryset=None):
+    """Отпечатки состояния сайтов: ``{website_id: fingerprint}``"""
+    if queryset is None:
+        queryset = Website.objects.filter(is_deleting=False)
+    return {
+        website_id: _fingerprint(updated_at, blocks_updated_at, blocks_count)
+        for website_id, updated_at, blocks_updated_at, blocks_count in _with_fingerprint(queryset)
+    }
+
+
+def exported_fingerprint(website_id, root=None):
+    path = os.path.join(_site_dir(website_id, root), FINGERPRINT_FILE)
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f).get('fingerprint')
+    except (OSError, ValueError):
+        return None
+
+
+def _write_file(path, content):
+    """Атомарно записать файл, чтобы nginx не отдал его наполовину"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.tmp{os.getpid()}'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def _copy_static(name, site_dir):
+    # После collectstatic файл с хешем в имени есть только в STATIC_ROOT,
+    # в режиме отладки — только в исходниках приложений
+    if staticfiles_storage.exists(name):
+        source = staticfiles_storage.path(name)
+    else:
+        source = finders.find(name)
+        if not source:
+            return
+    target = os.path.join(site_dir, 'static', name)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    shutil.copyfile(source, target)
+
+
+def _copy_media(name, site_dir):
+    # Оригиналы и их варианты лежат в хранилище загрузок (base/storage.py)
+    storage = media_storage()
+    if not storage.exists(name):
+        return
+    target = os.path.join(site_dir, 'media', name)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with storage.open(name, 'rb') as source, open(target, 'wb') as f:
+        shutil.copyfileobj(source, f)
+
+
+def _relink(html, site_dir):
+    """Скопировать статику и медиа страницы и сделать ссылки относительными"""
+    prefixes = (
+        (staticfiles_storage.base_url, 'static/', _copy_static),
+        (settings.MEDIA_URL, 'media/', _copy_media),
+    )
+    copied = set()
+
+    def local(url):
+        for prefix, directory, copy in prefixes:
+            if url.startswith(prefix):
+                path = url[len(prefix):]
+                name = re.split(r'[?#]', path, maxsplit=1)[0]
+                if (directory, name) not in copied:
+                    copied.add((directory, name))
+                    copy(name, site_dir)
+                return directory + path
+        return url
+
+    def srcset(value):
+        candidates = []
+        for candidate in value.split(','):
+            url, _, descriptor = candidate.strip().partition(' ')
+            candidates.append(f'{local(url)} {descriptor}'.strip())
+        return ', '.join(candidates)
+
+    html = _URL_ATTR_RE.sub(lambda m: f'{m[1]}{local(m[2])}"', html)
+    html = _SRCSET_ATTR_RE.sub(lambda m: f'{m[1]}{srcset(m[2])}"', html)
+    return _CSS_URL_RE.sub(lambda m: m[1] + local(m[2]), html)
+
+
+def remove_export(website_id, root=None):
+    shutil.rmtree(_site_dir(website_id, root), ignore_errors=True)
+
+
+def export_website(website_id, root=None, force=False):
+    """Экспортировать один сайт. Возвращает True, если каталог был обновлён."""
+    row = _with_fingerprint(Website.objects.filter(id=website_id, is_deleting=False)).first()
+    if row is None:
+        remove_export(website_id, root)
+        return False
+
+    fingerprint = _fingerprint(*row[1:])
+    if not force and exported_fingerprint(website_id, root) == fingerprint:
+        return False
+
+    website = Website.objects.get(id=website_id)
+    html = render_to_string('base/view_website.html', {
+        'website': website,
+        'blocks': website.blocks.filter(is_active=True),
+    })
+    site_dir = _site_dir(website_id, root)
+    html = _relink(html, site_dir)
+    _write_file(os.path.join(site_dir, 'index.html'), html)
+    _write_file(os.path.join(site_dir, FINGERPRINT_FILE), json.dumps({'fingerprint': fingerprint}))
+    return True
+
+
+def _init_worker():
+    # Соединения с БД, унаследованные от родительского процесса, использовать нельзя
+    connections.close_all()
+
+
+def _export_worker(website_id, root, force):
+    return website_id, export_website(website_id, root=root, force=force)
+
+
+def stale_websites(root=None, queryset=None):
+    """Идентификаторы сайтов, чей экспорт отсутствует или устарел"""
+    return [
+        website_id
+        for website_id, fingerprint in current_fingerprints(queryset).items()
+        if exported_fingerprint(website_id, root) != fingerprint
+    ]
+
+
+def export_websites(website_ids, root=None, force=False, workers=1):
+    """Экспортировать несколько сайтов, при ``workers > 1`` — в пуле процессов.
+
+    Возвращает список идентификаторов сайтов, каталоги которых были обновлены.
+    """
+    root = root or get_export_root()
+    if workers <= 1 or len(website_ids) <= 1:
+        return [website_id for website_id in website_ids if export_website(website_id, root=root, force=force)]
+
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        results = pool.map(_export_worker, website_ids, [root] * len(website_ids),
+                           [force] * len(website_ids), chunksize=8)
+        return [website_id for website_id, exported in results if exported]
@@ -0,0 +1,130 @@
+"""Веб-шрифты опубликованных страниц.
+
+Шрифты, доступные в редакторе, хранятся локально в ``base/static/base/fonts/``
+в виде WOFF2, разбитых по наборам символов (латиница, кириллица): браузер
+скачивает только те файлы, символы из которых есть на странице. Файлы и
+манифест ``fonts.json`` с их ``unicode-range`` создаёт команда ``fetch_fonts``.
+
+На страницу попадают только семейства, которые реально используются сайтом
+(``Website.font_family`` и ``font_family`` блоков), — каждое один раз.
+"""
+import json
+import os
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.templatetags.static import static
+from django.utils.html import escape
+
+# Семейства и начертания, которые можно выбрать в редакторе
+WEB_FONTS = {
+    'Roboto': (300, 400, 500, 700),
+    'Open Sans': (300, 400, 600, 700),
+    'Lato': (300, 400, 700),
+    'Montserrat': (300, 400, 500, 600, 700),
+    'Playfair Display': (400, 500, 600, 700),
+    'Oswald': (300, 400, 500, 600, 700),
+    'Raleway': (300, 400, 500, 600, 700),
+    'Poppins': (300, 400, 500, 600, 700),
+}
+
+FONTS_DIR = 'base/fonts'
+MANIFEST_NAME = f'{FONTS_DIR}/fonts.json'
+
+# Начертание, которое загружается заранее через <link rel="preload">
+PRELOAD_WEIGHT = 400
+
+
+def font_subsets():
+    return tuple(getattr(settings, 'FONT_SUBSETS', ('cyrillic', 'latin')))
+
+
+def family_slug(family):
+    return family.lower().replace(' ', '-')
+
+
+def parse_family(font_family):
+    """Первое семейство из CSS-значения ``font-family``, если оно есть в WEB_FONTS"""
+    if not font_family:
+        return None
+    family = font_family.split(',')[0].strip().strip('\'"')
+    return family if family in WEB_FONTS else None
+
+
+def used_families(website, blocks):
+    """Семейства из WEB_FONTS, используемые сайтом, в порядке появления и без повторов"""
+    families = [parse_family(website.font_family)]
+    families.extend(parse_family(block.get_data().get('font_family')) for block in blocks)
+    return list(dict.fromkeys(filter(None, families)))
+
+
+@lru_cache(maxsize=1)
+def _load_manifest(path):
+    if not path:
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_manifest():
+    """``{семейство: [{weight, subset, file, unicode_range}, ...]}`` или {} без fetch_fonts"""
+    return _load_manifest(finders.find(MANIFEST_NAME))
+
+
+def _font_face(family, face):
+    return (
+        f"@font-face{{font-family:'{family}';font-style:normal;font-weight:{face['weight']};"
+        f"font-display:swap;src:url(\"{static(face['file'])}\") format('woff2');"
+        f"unicode-range:{face['unicode_range']}}}"
+    )
+
+
+def _preload_face(faces):
+    """Файл, который почти наверняка понадобится: обычное начертание основного набора"""
+    regular = [face for face in faces if face['weight'] == PRELOAD_WEIGHT] or faces
+    subsets = font_subsets()
+    return min(regular, key=lambda face: subsets.index(face['subset']) if face['subset'] in subsets else len(subsets))
+
+
+def _google_fonts_url(families):
+    query = '&'.join(
+        'family={}:wght@{}'.format(family.replace(' ', '+'), ';'.join(map(str, WEB_FONTS[family])))
+        for family in families
+    )
+    return f'https://fonts.googleapis.com/css2?{query}&display=swap'
+
+
+def font_links(families):
+    """HTML для ``<head>``: preload и ``@font-face`` локальных шрифтов.
+
+    Если ``fetch_fonts`` ещё не запускался, подключает те же семейства одной
+    ссылкой на Google Fonts.
+    """
+    if not families:
+        return ''
+    manifest = load_manifest()
+    local = [family for family in families if manifest.get(family)]
+    remote = [family for family in families if not manifest.get(family)]
+
+    parts = [
+        f'<link rel="preload" href="{static(_preload_face(manifest[family])["file"])}" '
+        f'as="font" type="font/woff2" crossorigin>'
+        for family in local
+    ]
+    if local:
+        faces = ''.join(_font_face(family, face) for family in local for face in manifest[family])
+        parts.append(f'<style>{faces}</style>')
+    if remote:
+        parts.append('<link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>')
+        parts.append(f'<link rel="stylesheet" href="{escape(_google_fonts_url(remote))}">')
+    return '\n    '.join(parts)
+
+
+def font_file_name(family, weight, subset):
+    return f'{FONTS_DIR}/{family_slug(family)}/{family_slug(family)}-{weight}-{subset}.woff2'
+
+
+def fonts_root():
+    """Каталог исходников статики, куда fetch_fonts складывает файлы"""
+    return os.path.join(settings.BASE_DIR, 'base', 'static')
@@ -0,0 +1,105 @@
+"""HTTP-кэширование опубликованных страниц.
+
+Валидаторы страницы (``ETag`` и ``Last-Modified``) вычисляются одним
+агрегирующим запросом по ``Website.updated_at``, последнему ``updated_at``
+блоков и их числу и хранятся в кэше страниц вместе с HTML, так что условный
+запрос к закэшированной странице отвечает 304 без обращения к БД, а к
+незакэшированной — без рендера шаблона.
+
+Ответы помечаются ключом ``site-<id>`` в заголовке ``Surrogate-Key``; при
+изменении сайта вызываются хуки из ``PAGE_PURGE_HOOKS``, которые могут точечно
+сбросить страницу во внешнем кэше (Varnish, Fastly, CDN).
+"""
+import hashlib
+import logging
+import urllib.request
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date
+from django.utils.module_loading import import_string
+
+from .models import Website
+
+logger = logging.getLogger(__name__)
+
+
+def page_validators(website_id):
+    """``(etag, last_modified)`` страницы сайта или None, если сайта нет.
+
+    ``last_modified`` — Unix-время в секундах, как его ждёт ``get_conditional_response``.
+    """
+    return _validators(_validators_query(website_id).first())
+
+
+async def apage_validators(website_id):
+    """То же, что ``page_validators``, для асинхронных представлений"""
+    return _validators(await _validators_query(website_id).afirst())
+
+
+def _validators_query(website_id):
+    return (Website.objects.filter(id=website_id, is_deleting=False).with_content_state()
+            .values_list('updated_at', 'blocks_updated_at', 'blocks_count'))
+
+
+def _validators(row):
+    if row is None:
+        return None
+    updated_at, blocks_updated_at, blocks_count = row
+    raw = f'{updated_at.isoformat()}|{blocks_updated_at.isoformat() if blocks_updated_at else ""}|' \
+          f'{blocks_count}|{getattr(settings, "PAGE_ETAG_SALT", "")}'
+    etag = f'W/"{hashlib.sha1(raw.encode()).hexdigest()}"'
+    last_modified = int(max(filter(None, (updated_at, blocks_updated_at))).timestamp())
+    return etag, last_modified
+
+
+def surrogate_keys(website_id):
+    return [f'site-{website_id}']
+
+
+def add_page_headers(response, website_id, etag, last_modified):
+    """Валидаторы, ``Cache-Control`` и ключи для ответа 200 или 304"""
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    cache_control = {'public': True, 'max_age': getattr(settings, 'PAGE_BROWSER_MAX_AGE', 0)}
+    shared_max_age = getattr(settings, 'PAGE_SHARED_MAX_AGE', None)
+    if shared_max_age is not None:
+        cache_control['s_maxage'] = shared_max_age
+    stale_while_revalidate = getattr(settings, 'PAGE_STALE_WHILE_REVALIDATE', 0)
+    if stale_while_revalidate:
+        cache_control['stale_while_revalidate'] = stale_while_revalidate
+    patch_cache_control(response, **cache_control)
+    response[getattr(settings, 'PAGE_SURROGATE_KEY_HEADER', 'Surrogate-Key')] = ' '.join(surrogate_keys(website_id))
+    return response
+
+
+@lru_cache(maxsize=None)
+def _purge_hooks(paths):
+    return [import_string(path) for path in paths]
+
+
+def purge(website_id):
+    """Вызвать хуки сброса внешнего кэша для страницы сайта"""
+    keys = surrogate_keys(website_id)
+    for hook in _purge_hooks(tuple(getattr(settings, 'PAGE_PURGE_HOOKS', ()))):
+        try:
+            hook(website_id, keys)
+        except Exception:
+            logger.exception('Хук сброса кэша %r завершился ошибкой для сайта %s', hook, website_id)
+
+
+def log_purge(website_id, keys):
+    """Хук для отладки: только записать ключи в лог"""
+    logger.info('Сброс кэша сайта %s: %s', website_id, ' '.join(keys))
+
+
+def http_purge(website_id, keys):
+    """Хук: отправить ``PURGE`` на ``PAGE_PURGE_URL`` с ключами в заголовке ключей"""
+    request = urllib.request.Request(
+        settings.PAGE_PURGE_URL,
+        method='PURGE',
+        headers={getattr(settings, 'PAGE_SURROGATE_KEY_HEADER', 'Surrogate-Key'): ' '.join(keys)},
+    )
+    with urllib.request.urlopen(request, timeout=getattr(settings, 'PAGE_PURGE_TIMEOUT', 2)):
+        pass
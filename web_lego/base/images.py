@@ -0,0 +1,195 @@
+"""Адаптивные варианты загруженных изображений.
+
+Для каждого загруженного изображения фоновой задачей создаются уменьшенные копии в
+нескольких ширинах и форматах (AVIF и WebP, если их поддерживает Pillow, и
+JPEG). Варианты лежат в ``variants/<hash>/`` того же хранилища, что и
+оригиналы (``media_storage()``), и адресуются хешем содержимого,
+поэтому одно и то же изображение, загруженное повторно или на другой сайт,
+обрабатывается один раз.
+
+Описание готовых вариантов (манифест) сохраняется в ``Block.image_variants`` и
+``Website.header_logo_variants`` по имени исходного файла; по нему рендерер
+строит ``<picture>`` с ``srcset``/``sizes``.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils import timezone
+from django.utils.html import escape
+from PIL import Image, ImageOps, features
+
+from .storage import VARIANTS_PREFIX, content_digest, media_storage
+
+logger = logging.getLogger(__name__)
+
+VARIANT_WIDTHS = (320, 640, 960, 1280, 1920)
+
+# Форматы в порядке предпочтения; последний используется как запасной в <img>
+FORMATS = {
+    'avif': ('AVIF', 'image/avif', {'quality': 50}),
+    'webp': ('WEBP', 'image/webp', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', 'image/jpeg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+_FEATURES = {'avif': 'avif', 'webp': 'webp'}
+
+_manifest_lock = threading.Lock()
+
+
+def available_formats():
+    return [ext for ext in FORMATS if ext not in _FEATURES or features.check(_FEATURES[ext])]
+
+
+def content_hash(name):
+    """SHA-256 файла из хранилища, прочитанного по частям"""
+    known = content_digest(name)
+    if known:
+        return known
+    digest = hashlib.sha256()
+    with media_storage().open(name, 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _variants_dir(digest):
+    return f'{VARIANTS_PREFIX}/{digest[:2]}/{digest}'
+
+
+def _manifest_name(digest):
+    return f'{_variants_dir(digest)}/manifest.json'
+
+
+def generate_variants(name):
+    """Создать варианты изображения ``name`` и вернуть их манифест.
+
+    Если варианты для такого же содержимого уже есть, они переиспользуются.
+    """
+    storage = media_storage()
+    digest = content_hash(name)
+    manifest_name = _manifest_name(digest)
+    if storage.exists(manifest_name):
+        with storage.open(manifest_name, 'rb') as f:
+            return json.load(f)
+
+    with storage.open(name, 'rb') as f:
+        image = ImageOps.exif_transpose(Image.open(f))
+        image.load()
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+
+    widths = [width for width in VARIANT_WIDTHS if width < image.width]
+    if image.width <= VARIANT_WIDTHS[-1]:
+        widths.append(image.width)
+
+    formats = available_formats()
+    for width in widths:
+        height = max(1, round(image.height * width / image.width))
+        resized = image.resize((width, height), Image.LANCZOS) if width != image.width else image
+        for ext in formats:
+            pil_format, _, options = FORMATS[ext]
+            variant = resized.convert('RGB') if pil_format == 'JPEG' else resized
+            buffer = BytesIO()
+            variant.save(buffer, pil_format, **options)
+            storage.save(f'{_variants_dir(digest)}/{width}.{ext}', ContentFile(buffer.getvalue()))
+
+    manifest = {
+        'hash': digest,
+        'width': image.width,
+        'height': image.height,
+        'widths': widths,
+        'formats': formats,
+    }
+    storage.save(manifest_name, ContentFile(json.dumps(manifest).encode()))
+    return manifest
+
+
+def _srcset(manifest, ext):
+    base = _variants_dir(manifest['hash'])
+    storage = media_storage()
+    return ', '.join(f'{storage.url(f"{base}/{width}.{ext}")} {width}w' for width in manifest['widths'])
+
+
+def picture_html(url, manifest, sizes='100vw', lazy=True, deferred=False, **img_attrs):
+    """HTML картинки: ``<picture>`` с вариантами, если они готовы, иначе ``<img>``.
+
+    При ``deferred`` адреса выводятся в ``data-src``/``data-srcset``: браузер
+    ничего не загружает, пока скрипт страницы не перенесёт их в ``src``/``srcset``.
+    """
+    attrs = ''.join(f' {key}="{escape(value)}"' for key, value in img_attrs.items() if value is not None)
+    if lazy:
+        attrs += ' loading="lazy"'
+    attrs += ' decoding="async"'
+    src, srcset = ('data-src', 'data-srcset') if deferred else ('src', 'srcset')
+
+    if not manifest:
+        return f'<img {src}="{url}"{attrs} />'
+
+    fallback = manifest['formats'][-1]
+    sources = ''.join(
+        f'<source type="{FORMATS[ext][1]}" {srcset}="{_srcset(manifest, ext)}" sizes="{sizes}">'
+        for ext in manifest['formats'][:-1]
+    )
+    dimensions = f' width="{manifest["width"]}" height="{manifest["height"]}"'
+    return (
+        f'<picture>{sources}<img {src}="{url}" {srcset}="{_srcset(manifest, fallback)}" sizes="{sizes}"'
+        f'{dimensions}{attrs} /></picture>'
+    )
+
+
+def media_name(url):
+    """Имя файла в хранилище для URL вида ``MEDIA_URL/...``, иначе None"""
+    if url and url.startswith(settings.MEDIA_URL):
+        return url[len(settings.MEDIA_URL):]
+    return None
+
+
+def _attach_manifest(model, pk, field, name, manifest):
+    with _manifest_lock, transaction.atomic():
+        instance = model.objects.select_for_update().filter(pk=pk).first()
+        if instance is None:
+            return
+        variants = dict(getattr(instance, field) or {})
+        variants[name] = manifest
+        model.objects.filter(pk=pk).update(**{field: variants, 'updated_at': timezone.now()})
+
+    from .signals import website_content_changed
+
+    website_content_changed(pk if field == 'header_logo_variants' else instance.website_id)
+
+
+def attach_variants(model, pk, field, name):
+    """Создать варианты ``name`` и записать манифест в поле ``field`` объекта"""
+    _attach_manifest(model, pk, field, name, generate_variants(name))
+
+
+def process_image(model, pk, field, name):
+    """``attach_variants``, ошибки которого только пишутся в лог"""
+    try:
+        attach_variants(model, pk, field, name)
+    except Exception:
+        logger.exception('Не удалось создать варианты изображения %s', name)
+
+
+def is_raster(name):
+    """Нужны ли варианты файлу: векторные SVG отдаются как есть"""
+    return bool(name) and os.path.splitext(name)[1].lower() != '.svg'
+
+
+def schedule_variants(instance, field, name):
+    """Поставить создание вариантов в очередь фоновых задач"""
+    if not is_raster(name):
+        return
+    from . import jobs
+
+    model = instance._meta.label
+    jobs.enqueue(
+        'images.variants', key=f'variants:{model}:{instance.pk}:{field}:{name}',
+        model=model, pk=instance.pk, field=field, name=name,
+    )
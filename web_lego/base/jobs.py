@@ -0,0 +1,309 @@
+"""Фоновые задачи.
+
+Медленная работа, которую запускают запросы редактора (адаптивные варианты
+изображений, сброс внешнего кэша, статический экспорт, удаление сайта),
+выполняется задачами. Задача — функция, зарегистрированная декоратором
+``register`` под своим именем; запрос ставит её в очередь через ``enqueue`` и
+сразу отвечает. Аргументы задачи должны сериализоваться в JSON.
+
+Как выполнять задачи, решает бэкенд ``JOBS_BACKEND``:
+
+* ``immediate`` — в том же процессе сразу после коммита транзакции;
+* ``thread`` — в пуле потоков процесса после коммита;
+* ``database`` — строкой ``Job`` в БД, которую выполнит обработчик
+  ``manage.py run_jobs``. Задача добавляется в той же транзакции, что и
+  изменения, которые её вызвали, и видна обработчикам только после коммита.
+
+Вместо имени можно указать путь к своему классу бэкенда с методом ``enqueue``.
+
+Обработчики забирают задачи условным ``UPDATE ... WHERE status = 'queued'``,
+поэтому очередь работает на SQLite и PostgreSQL без внешнего брокера. Упавшая
+задача повторяется с экспоненциальной задержкой до ``max_attempts`` раз.
+Задачи с одинаковым ключом ``key`` не дублируются, пока одна из них ждёт в очереди.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Avg, Count, F, Max
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+_jobs = {}
+
+
+def register(name):
+    """Декоратор функции: зарегистрировать задачу под именем ``name``"""
+    def decorator(func):
+        _jobs[name] = func
+        return func
+    return decorator
+
+
+def get_job(name):
+    try:
+        return _jobs[name]
+    except KeyError:
+        raise LookupError(f'Неизвестная задача: {name}') from None
+
+
+def enqueue(name, /, key=None, delay=None, max_attempts=None, **payload):
+    """Поставить задачу ``name`` с аргументами ``payload`` в очередь"""
+    get_job(name)
+    return get_backend().enqueue(name, payload, key=key, delay=delay, max_attempts=max_attempts)
+
+
+def _run(name, payload):
+    """Выполнить задачу; возвращает длительность в секундах"""
+    start = time.monotonic()
+    get_job(name)(**payload)
+    duration = time.monotonic() - start
+    logger.info('Задача %s выполнена за %.3f с', name, duration)
+    return duration
+
+
+def _keys_awaiting_commit():
+    """Ключи задач, которые ждут коммита текущей транзакции.
+
+    При откате транзакции или точки сохранения Django убирает их колбэки из
+    ``run_on_commit``, а вместе с ними и ключи.
+    """
+    return {getattr(func, 'job_key', None) for _, func, *_ in connection.run_on_commit}
+
+
+class ImmediateBackend:
+    """Выполнять задачи сразу после коммита в текущем процессе"""
+
+    def __init__(self):
+        # Ключи задач, которые переданы на выполнение, но ещё не начались
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def enqueue(self, name, payload, key=None, delay=None, max_attempts=None):
+        if key is not None and key in _keys_awaiting_commit():
+            return None
+        callback = lambda: self.schedule(name, payload, key)
+        callback.job_key = key
+        transaction.on_commit(callback)
+        return None
+
+    def schedule(self, name, payload, key):
+        # Ключ занимается только после коммита: при откате транзакции колбэк
+        # не вызывается, и ключ не остался бы занятым навсегда
+        if key is not None:
+            with self._lock:
+                if key in self._pending:
+                    return
+                self._pending.add(key)
+        self.submit(name, payload, key)
+
+    def submit(self, name, payload, key):
+        self.execute(name, payload, key)
+
+    def execute(self, name, payload, key):
+        if key is not None:
+            with self._lock:
+                self._pending.discard(key)
+        try:
+            _run(name, payload)
+        except Exception:
+            logger.exception('Задача %s завершилась ошибкой', name)
+
+
+class ThreadBackend(ImmediateBackend):
+    """Выполнять задачи после коммита в пуле потоков текущего процесса"""
+
+    def __init__(self):
+        super().__init__()
+        self._executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'JOBS_THREAD_WORKERS', 2),
+            thread_name_prefix='jobs',
+        )
+
+    def submit(self, name, payload, key):
+        self._executor.submit(self._execute_in_thread, name, payload, key)
+
+    def _execute_in_thread(self, name, payload, key):
+        try:
+            self.execute(name, payload, key)
+        finally:
+            # Соединение с БД принадлежит потоку пула и само не закроется
+            connection.close()
+
+
+class DatabaseBackend:
+    """Хранить задачи в таблице ``Job``; выполняет ``manage.py run_jobs``"""
+
+    def enqueue(self, name, payload, key=None, delay=None, max_attempts=None):
+        if key is not None and Job.objects.filter(dedupe_key=key, status=Job.QUEUED).exists():
+            return None
+        job = Job(name=name, payload=payload, dedupe_key=key)
+        if delay:
+            job.run_at = timezone.now() + delay
+        if max_attempts is not None:
+            job.max_attempts = max_attempts
+        try:
+            with transaction.atomic():
+                job.save()
+        except IntegrityError:
+            # Такую же задачу только что поставил параллельный запрос
+            return None
+        return job
+
+
+BACKENDS = {
+    'immediate': ImmediateBackend,
+    'thread': ThreadBackend,
+    'database': DatabaseBackend,
+}
+
+
+@lru_cache(maxsize=None)
+def _backend(path):
+    return (BACKENDS.get(path) or import_string(path))()
+
+
+def get_backend():
+    return _backend(getattr(settings, 'JOBS_BACKEND', 'thread'))
+
+
+# === Обработчик очереди в БД ===
+
+def worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def retry_delay(attempts):
+    """Задержка перед следующей попыткой: 10 с, 20 с, 40 с, ... не больше часа"""
+    base = getattr(settings, 'JOBS_RETRY_DELAY', 10)
+    return timedelta(seconds=min(3600, base * 2 ** (attempts - 1)))
+
+
+def claim_jobs(worker, limit=10):
+    """Забрать до ``limit`` готовых к запуску задач; конкурентные обработчики не получат те же"""
+    now = timezone.now()
+    candidates = list(Job.objects.filter(status=Job.QUEUED, run_at__lte=now)
+                      .order_by('run_at', 'id').values_list('id', flat=True)[:limit])
+    claimed = [
+        job_id for job_id in candidates
+        if Job.objects.filter(id=job_id, status=Job.QUEUED).update(
+            status=Job.RUNNING, locked_by=worker, started_at=now, attempts=F('attempts') + 1,
+        )
+    ]
+    return list(Job.objects.filter(id__in=claimed).order_by('run_at', 'id'))
+
+
+def _requeue(job, **fields):
+    """Вернуть задачу в очередь; если там уже ждёт такая же, эта не нужна"""
+    try:
+        with transaction.atomic():
+            Job.objects.filter(id=job.id).update(status=Job.QUEUED, locked_by='', **fields)
+    except IntegrityError:
+        Job.objects.filter(id=job.id).update(
+            status=Job.FAILED, finished_at=timezone.now(),
+            last_error='В очереди уже есть задача с тем же ключом',
+        )
+
+
+def run_job(job):
+    """Выполнить забранную задачу и записать результат. Возвращает True при успехе."""
+    start = time.monotonic()
+    try:
+        get_job(job.name)(**job.payload)
+    except Exception:
+        duration = time.monotonic() - start
+        error = traceback.format_exc()
+        logger.exception('Задача %s #%s завершилась ошибкой (попытка %s из %s)',
+                         job.name, job.id, job.attempts, job.max_attempts)
+        if job.attempts < job.max_attempts:
+            _requeue(job, run_at=timezone.now() + retry_delay(job.attempts), last_error=error, duration=duration)
+        else:
+            Job.objects.filter(id=job.id).update(
+                status=Job.FAILED, finished_at=timezone.now(), last_error=error, duration=duration,
+            )
+        return False
+
+    duration = time.monotonic() - start
+    Job.objects.filter(id=job.id).update(status=Job.DONE, finished_at=timezone.now(), duration=duration)
+    logger.info('Задача %s #%s выполнена за %.3f с', job.name, job.id, duration)
+    return True
+
+
+def requeue_stale(timeout=None):
+    """Вернуть в очередь задачи, обработчик которых завис или был убит"""
+    if timeout is None:
+        timeout = timedelta(seconds=getattr(settings, 'JOBS_STALE_TIMEOUT', 3600))
+    stale = list(Job.objects.filter(status=Job.RUNNING, started_at__lt=timezone.now() - timeout))
+    for job in stale:
+        if job.attempts < job.max_attempts:
+            _requeue(job, run_at=timezone.now(), last_error='Обработчик не завершил задачу')
+        else:
+            Job.objects.filter(id=job.id).update(
+                status=Job.FAILED, finished_at=timezone.now(), last_error='Обработчик не завершил задачу',
+            )
+    return len(stale)
+
+
+def prune_finished(keep=None):
+    """Удалить выполненные задачи старше ``JOBS_KEEP_DONE_HOURS``; упавшие остаются для разбора"""
+    if keep is None:
+        keep = timedelta(hours=getattr(settings, 'JOBS_KEEP_DONE_HOURS', 24))
+    deleted, _ = Job.objects.filter(status=Job.DONE, finished_at__lt=timezone.now() - keep).delete()
+    return deleted
+
+
+def work(stop=None, once=False, poll_interval=1.0, batch=10):
+    """Цикл обработчика: выполнять задачи, пока не выставлен ``stop``.
+
+    При ``once`` выходит, как только очередь опустела. Возвращает число выполненных задач.
+    """
+    worker = worker_id()
+    processed = 0
+    last_maintenance = 0.0
+    while stop is None or not stop.is_set():
+        if time.monotonic() - last_maintenance > 60:
+            requeue_stale()
+            prune_finished()
+            last_maintenance = time.monotonic()
+
+        jobs = claim_jobs(worker, limit=batch)
+        for job in jobs:
+            run_job(job)
+            processed += 1
+        if jobs:
+            continue
+        if once:
+            break
+        if stop is not None:
+            stop.wait(poll_interval)
+        else:
+            time.sleep(poll_interval)
+    return processed
+
+
+def job_stats():
+    """Метрики очереди по задачам и статусам: число, средняя и максимальная длительность"""
+    return list(
+        Job.objects.values('name', 'status')
+        .annotate(count=Count('id'), avg_duration=Avg('duration'), max_duration=Max('duration'),
+                  max_attempts_used=Max('attempts'))
+        .order_by('name', 'status')
+    )
+
+
+def queue_lag():
+    """Сколько секунд ждёт самая старая готовая к запуску задача (0, если таких нет)"""
+    oldest = Job.objects.filter(status=Job.QUEUED, run_at__lte=timezone.now()).order_by('run_at').first()
+    return (timezone.now() - oldest.run_at).total_seconds() if oldest else 0.0
@@ -0,0 +1,77 @@
+"""Раскладка блоков опубликованной страницы.
+
+В редакторе блоки расставляются абсолютно: ``position_x``/``position_y`` и
+``width``/``height`` в пикселях хранятся в ``data`` блока. Из них здесь
+генерируется CSS страницы:
+
+* на широких экранах — абсолютные позиции и размеры каждого блока и высота
+  холста по нижнему краю самого низкого блока;
+* на узких (``MOBILE_BREAKPOINT``) блоки идут колонкой во всю ширину в порядке
+  чтения — сверху вниз, слева направо. Общие правила колонки лежат в
+  критическом CSS, здесь добавляется только ``order`` блоков.
+
+Скрипт страницы раскладкой не занимается.
+"""
+
+MOBILE_BREAKPOINT = 768
+
+# Холст не ниже этого, как и раньше задавал view_website.css
+CANVAS_MIN_HEIGHT = 800
+
+
+def _number(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _px(value):
+    return f'{value:g}px' if isinstance(value, float) else f'{value}px'
+
+
+def block_box(block):
+    """``(left, top, width, height)`` блока; отсутствующие значения — None"""
+    data = block.get_data()
+    return tuple(_number(data.get(key)) for key in ('position_x', 'position_y', 'width', 'height'))
+
+
+def stack_order(blocks):
+    """Блоки в порядке чтения: по верхнему краю, затем по левому, затем по порядку на странице"""
+    indexed = list(enumerate(blocks))
+    indexed.sort(key=lambda item: (block_box(item[1])[1] or 0, block_box(item[1])[0] or 0, item[0]))
+    return [block for _, block in indexed]
+
+
+def layout_css(blocks):
+    """CSS раскладки блоков страницы для широких и узких экранов"""
+    blocks = list(blocks)
+    desktop = []
+    bottom = CANVAS_MIN_HEIGHT
+    for block in blocks:
+        left, top, width, height = block_box(block)
+        declarations = ''.join(
+            f'{prop}:{_px(value)};'
+            for prop, value in (('left', left), ('top', top), ('width', width), ('height', height))
+            if value is not None
+        )
+        if declarations:
+            desktop.append(f'.block-{block.id}{{{declarations}}}')
+        if height is not None:
+            bottom = max(bottom, (top or 0) + height)
+    if bottom > CANVAS_MIN_HEIGHT:
+        desktop.append(f'.site-canvas{{min-height:{_px(bottom)}}}')
+
+    css = []
+    if desktop:
+        css.append(f'@media (min-width:{MOBILE_BREAKPOINT + 1}px){{{"".join(desktop)}}}')
+    # Порядок колонки задаём, только если он отличается от порядка блоков в HTML
+    stacked = stack_order(blocks)
+    if stacked != blocks:
+        orders = ''.join(f'.block-{block.id}{{order:{index}}}' for index, block in enumerate(stacked))
+        css.append(f'@media (max-width:{MOBILE_BREAKPOINT}px){{{orders}}}')
+    return ''.join(css)
@@ -0,0 +1,268 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from django.utils.safestring import mark_safe
+
+from base.models import BLOCK_TYPES, Block
+from base.renderers import clear_render_caches
+from base.templatetags.block_tags import render_block
+
+
+def _legacy_render_block(block):
+    # Прежний фильтр render_block с цепочкой if/elif — для сравнения
+    data = block.get_data()
+    block_type = block.block_type
+
+    # Получаем стили блока
+    styles = []
+    if block.background_color:
+        styles.append(f"background-color: {block.background_color};")
+    if block.text_color:
+        styles.append(f"color: {block.text_color};")
+    if block.padding:
+        styles.append(f"padding: {block.padding};")
+    if block.margin:
+        styles.append(f"margin: {block.margin};")
+
+    style_attr = " ".join(styles)
+
+    # Рендеринг в зависимости от типа блока
+    if block_type == "heading":
+        level = data.get("level", "h1")
+        content = data.get("content", "Заголовок")
+        align = data.get("align", "left")
+        font_family = data.get("font_family", "")
+        
+        heading_styles = [f"text-align: {align};"]
+        if font_family:
+            heading_styles.append(f"font-family: {font_family};")
+        if style_attr:
+            heading_styles.append(style_attr)
+        
+        return mark_safe(
+            f'<{level} style="{" ".join(heading_styles)}">{content}</{level}>'
+        )
+
+    elif block_type == "text":
+        content = data.get("content", "Текст блока")
+        size = data.get("size", "16px")
+        align = data.get("align", "left")
+        font_family = data.get("font_family", "")
+        
+        text_styles = [f"font-size: {size};", f"text-align: {align};"]
+        if font_family:
+            text_styles.append(f"font-family: {font_family};")
+        if style_attr:
+            text_styles.append(style_attr)
+        
+        return mark_safe(
+            f'<p style="{" ".join(text_styles)}">{content}</p>'
+        )
+
+    elif block_type == "image":
+        # Приоритет: загруженное изображение > URL из данных
+        image_url = ""
+        if block.image:
+            image_url = block.image.url
+        else:
+            image_url = data.get("url", "")
+
+        alt = data.get("alt", "Изображение")
+        fit = data.get("fit", "contain")
+        
+        # Для изображений не задаем фиксированные размеры в inline стилях
+        # Размеры управляются контейнером блока через CSS
+        # Используем object-fit для правильного отображения
+        img_styles = []
+        img_styles.append(f"object-fit: {fit};")
+        img_styles.append("width: 100%;")
+        img_styles.append("height: 100%;")
+        img_styles.append("display: block;")
+        if style_attr:
+            img_styles.append(style_attr)
+
+        if image_url:
+            return mark_safe(
+                f'<img src="{image_url}" alt="{alt}" style="{" ".join(img_styles)}" />'
+            )
+        else:
+            return mark_safe(
+                f'<div style="background: #e5e7eb; min-height: 200px; display: flex; align-items: center; justify-content: center; {style_attr}">🖼️ Изображение</div>'
+            )
+
+    elif block_type == "video":
+        url = data.get("url", "")
+        width = data.get("width", "100%")
+        height = data.get("height", "400px")
+        if isinstance(width, (int, float)):
+            width = f"{width}px"
+        if isinstance(height, (int, float)):
+            height = f"{height}px"
+        autoplay = data.get("autoplay", False)
+        if url:
+            autoplay_attr = "autoplay" if autoplay else ""
+            return mark_safe(
+                f'<video src="{url}" width="{width}" height="{height}" controls {autoplay_attr} style="{style_attr}"></video>'
+            )
+        else:
+            return mark_safe(
+                f'<div style="background: #e5e7eb; min-height: 200px; display: flex; align-items: center; justify-content: center; {style_attr}">🎥 Видео</div>'
+            )
+
+    elif block_type == "button":
+        text = data.get("text", "Кнопка")
+        link = data.get("link", "#")
+        style = data.get("style", "primary")
+        align = data.get("align", "left")
+        bg_color = data.get("bg_color", "")
+        text_color = data.get("text_color", "")
+        size = data.get("size", "medium")
+        border_radius = data.get("border_radius", "8px")
+
+        # Стили кнопки
+        button_styles = {
+            "primary": "background: linear-gradient(135deg, #8b5cf6 0%, #7c3aed 100%); color: white;",
+            "secondary": "background: #e5e7eb; color: #374151;",
+            "success": "background: #10b981; color: white;",
+            "danger": "background: #ef4444; color: white;",
+        }
+
+        # Если задан кастомный цвет, используем его
+        if bg_color:
+            btn_style = f"background: {bg_color};"
+            if text_color:
+                btn_style += f" color: {text_color};"
+            else:
+                btn_style += " color: white;"
+        else:
+            btn_style = button_styles.get(style, button_styles["primary"])
+
+        # Размеры кнопки
+        size_styles = {
+            "small": "padding: 0.5rem 1rem; font-size: 0.875rem;",
+            "medium": "padding: 0.75rem 1.5rem; font-size: 1rem;",
+            "large": "padding: 1rem 2rem; font-size: 1.125rem;",
+        }
+        size_style = size_styles.get(size, size_styles["medium"])
+
+        return mark_safe(
+            f'<div style="text-align: {align}; {style_attr}"><a href="{link}" style="{btn_style} {size_style} border-radius: {border_radius}; text-decoration: none; display: inline-block; font-weight: 600; transition: all 0.3s ease;">{text}</a></div>'
+        )
+
+    elif block_type == "slider":
+        images = data.get("images", [])
+        autoplay = data.get("autoplay", True)
+        interval = data.get("interval", 3000)
+        width = data.get("width", "100%")
+        height = data.get("height", "auto")
+        if isinstance(width, (int, float)):
+            width = f"{width}px"
+        if isinstance(height, (int, float)):
+            height = f"{height}px"
+
+        if images:
+            # Слайдер с навигацией и индикаторами
+            slider_id = f"slider-{block.id}"
+            slides = "".join(
+                [
+                    f'<div class="slide" data-slide-index="{idx}"><img src="{img}" style="width: 100%; height: auto; display: block;" alt="Slide {idx + 1}" /></div>'
+                    for idx, img in enumerate(images)
+                ]
+            )
+
+            # Индикаторы
+            indicators = "".join(
+                [
+                    f'<span class="slider-indicator" data-slide="{idx}" onclick="goToSlide(\'{slider_id}\', {idx})"></span>'
+                    for idx in range(len(images))
+                ]
+            )
+
+            # Кнопки навигации
+            nav_buttons = f"""
+                <button class="slider-btn slider-prev" onclick="changeSlide(\'{slider_id}\', -1)">‹</button>
+                <button class="slider-btn slider-next" onclick="changeSlide(\'{slider_id}\', 1)">›</button>
+            """
+
+            # Добавляем размеры к стилям
+            size_styles = f"width: {width}; height: {height};"
+            full_style = f"{size_styles} {style_attr}" if style_attr else size_styles
+
+            slider_html = f"""
+                <div class="slider-container" id="{slider_id}" data-autoplay="{str(autoplay).lower()}" data-interval="{interval}" style="{full_style}">
+                    <div class="slider">
+                        {slides}
+                    </div>
+                    <div class="slider-indicators">
+                        {indicators}
+                    </div>
+                    {nav_buttons}
+                </div>
+            """
+            return mark_safe(slider_html)
+        else:
+            size_styles = f"width: {width}; height: {height};"
+            full_style = f"{size_styles} {style_attr}" if style_attr else size_styles
+            return mark_safe(
+                f'<div style="background: #e5e7eb; min-height: 300px; display: flex; align-items: center; justify-content: center; {full_style}">🎠 Слайдер (добавьте изображения)</div>'
+            )
+
+    elif block_type == "section":
+        content = data.get("content", "")
+        columns = data.get("columns", 1)
+        return mark_safe(
+            f'<div style="display: grid; grid-template-columns: repeat({columns}, 1fr); gap: 1rem; {style_attr}">{content}</div>'
+        )
+
+    else:
+        return mark_safe(
+            f'<div style="{style_attr}">Неизвестный тип блока: {block_type}</div>'
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        'Микробенчмарк рендеринга блоков: время на блок у прежнего фильтра с цепочкой '
+        'if/elif и у реестра рендереров без кэша и с кэшем'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--blocks', type=int, default=700, help='Количество блоков на странице')
+        parser.add_argument('--repeat', type=int, default=20, help='Количество рендеров страницы')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        block_types = [block_type for block_type, _ in BLOCK_TYPES]
+        blocks = []
+        for i in range(options['blocks']):
+            block = Block(
+                id=i + 1,
+                block_type=block_types[i % len(block_types)],
+                data={'content': f'Блок {i}', 'images': ['/media/a.jpg', '/media/b.jpg'], 'url': '/media/c.jpg'},
+                background_color='#ffffff',
+                updated_at=now,
+            )
+            blocks.append(block)
+
+        legacy = self._measure(blocks, options['repeat'], _legacy_render_block, clear=False)
+        cold = self._measure(blocks, options['repeat'], render_block, clear=True)
+        warm = self._measure(blocks, options['repeat'], render_block, clear=False)
+        self.stdout.write(f'Блоков: {len(blocks)}, повторов: {options["repeat"]}')
+        self.stdout.write(f'Прежний фильтр:    {legacy:.2f} мкс/блок')
+        self.stdout.write(f'Реестр без кэша:   {cold:.2f} мкс/блок')
+        self.stdout.write(f'Реестр с кэшем:    {warm:.2f} мкс/блок')
+
+    def _measure(self, blocks, repeat, render, clear):
+        clear_render_caches()
+        for block in blocks:
+            render(block)
+        total = 0.0
+        for _ in range(repeat):
+            if clear:
+                clear_render_caches()
+            start = time.perf_counter()
+            for block in blocks:
+                render(block)
+            total += time.perf_counter() - start
+        return total / (repeat * len(blocks)) * 1e6
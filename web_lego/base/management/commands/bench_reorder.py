@@ -0,0 +1,55 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from base.models import Block, Website
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Бенчмарк изменения порядка блоков: построчные save() против одного UPDATE'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='10,50,200,1000', help='Количество блоков через запятую')
+        parser.add_argument('--repeat', type=int, default=5, help='Количество повторов для каждого размера')
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',')]
+        self.stdout.write(f'{"блоков":>8} {"save() по одному, мс":>22} {"один UPDATE, мс":>18}')
+        # Все тестовые данные создаются в транзакции, которая откатывается в конце
+        try:
+            with transaction.atomic():
+                owner = User.objects.create(username='bench-reorder')
+                for size in sizes:
+                    website = Website.objects.create(owner=owner, title=f'bench {size}')
+                    Block.objects.bulk_create(
+                        Block(website=website, block_type='text', order=i) for i in range(size)
+                    )
+                    ids = list(website.blocks.values_list('id', flat=True))
+                    legacy = self._measure(options['repeat'], lambda orders: self._legacy(website, orders), ids)
+                    bulk = self._measure(options['repeat'], website.blocks.reorder, ids)
+                    self.stdout.write(f'{size:>8} {legacy:>22.2f} {bulk:>18.2f}')
+                raise Rollback
+        except Rollback:
+            pass
+
+    def _measure(self, repeat, reorder, ids):
+        total = 0.0
+        for attempt in range(repeat):
+            orders = {block_id: (position + attempt) % len(ids) for position, block_id in enumerate(reversed(ids))}
+            start = time.perf_counter()
+            reorder(orders)
+            total += time.perf_counter() - start
+        return total / repeat * 1000
+
+    def _legacy(self, website, orders):
+        # Прежняя реализация api_reorder_blocks
+        for block_id, order in orders.items():
+            block = Block.objects.get(id=block_id, website=website)
+            block.order = order
+            block.save()
@@ -0,0 +1,74 @@
+import re
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from base.models import Block, Website
+
+# Признаки чтения всей таблицы в выводе EXPLAIN. В SQLite это любой SCAN,
+# в том числе SCAN ... USING INDEX (обход всей таблицы в порядке индекса);
+# проходит только SEARCH
+SEQ_SCAN_PATTERNS = {
+    'sqlite': re.compile(r'\bSCAN (\w+)'),
+    'postgresql': re.compile(r'\bSeq Scan on (\w+)'),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполнить EXPLAIN для горячих запросов (личный кабинет, страница сайта, редактор, админка) '
+        'и завершиться с ошибкой, если какой-то из них читает большую таблицу целиком'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-rows', type=int, default=10000,
+                            help='Последовательное чтение таблицы меньшего размера не считается ошибкой')
+        parser.add_argument('--analyze', action='store_true',
+                            help='Обновить статистику планировщика (ANALYZE) перед проверкой')
+        parser.add_argument('--verbose-plans', action='store_true', help='Печатать планы целиком')
+
+    def handle(self, *args, **options):
+        pattern = SEQ_SCAN_PATTERNS.get(connection.vendor)
+        if pattern is None:
+            raise CommandError(f'Разбор планов для {connection.vendor} не поддерживается')
+
+        if options['analyze']:
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+        website = Website.objects.order_by('-id').first()
+        if website is None:
+            raise CommandError('В базе нет сайтов — сначала выполните seed_bench_data')
+
+        table_sizes = {
+            Website._meta.db_table: Website.objects.count(),
+            Block._meta.db_table: Block.objects.count(),
+        }
+        since = timezone.now() - timedelta(days=7)
+        queries = {
+            'dashboard: сайты владельца': Website.objects.filter(owner_id=website.owner_id).order_by('created_at'),
+            'view/edit: активные блоки сайта': Block.objects.filter(website_id=website.id, is_active=True).order_by('order'),
+            'api_create_block: последний блок сайта': Block.objects.filter(website_id=website.id).order_by('-order').values('order')[:1],
+            'admin: сайты по дате создания': Website.objects.filter(created_at__gte=since).order_by('-created_at')[:100],
+            'admin: блоки по типу': Block.objects.filter(block_type='text').order_by('website', 'order')[:100],
+            # Порядок списка в админке прежний: строки находит индекс по created_at,
+            # а сортируются только отобранные
+            'admin: блоки по дате создания': Block.objects.select_related('website').filter(
+                created_at__gte=since).order_by('website', 'order', '-pk')[:100],
+        }
+
+        failures = []
+        for name, queryset in queries.items():
+            plan = queryset.explain()
+            scanned = [table for table in pattern.findall(plan) if table_sizes.get(table, 0) >= options['min_rows']]
+            status = self.style.ERROR('SEQ SCAN') if scanned else self.style.SUCCESS('OK')
+            self.stdout.write(f'{status} {name}')
+            if options['verbose_plans'] or scanned:
+                self.stdout.write('    ' + plan.replace('\n', '\n    '))
+            if scanned:
+                failures.append(name)
+
+        if failures:
+            raise CommandError(f'Последовательное чтение в запросах: {", ".join(failures)}')
@@ -0,0 +1,43 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from base.export import export_websites, get_export_root, remove_export, stale_websites
+from base.models import Website
+
+
+class Command(BaseCommand):
+    help = 'Экспортировать опубликованные сайты в статические каталоги для отдачи через nginx'
+
+    def add_arguments(self, parser):
+        parser.add_argument('website_ids', nargs='*', type=int, help='Экспортировать только указанные сайты')
+        parser.add_argument('--root', default=None, help='Каталог экспорта (по умолчанию STATIC_EXPORT_ROOT)')
+        parser.add_argument('--force', action='store_true', help='Перерендерить сайты, даже если они не менялись')
+        parser.add_argument('--workers', type=int, default=1, help='Количество процессов для рендеринга')
+        parser.add_argument('--prune', action='store_true', help='Удалить каталоги удалённых сайтов')
+
+    def handle(self, *args, **options):
+        root = options['root'] or get_export_root()
+        queryset = Website.objects.all()
+        if options['website_ids']:
+            queryset = queryset.filter(id__in=options['website_ids'])
+
+        if options['force']:
+            website_ids = list(queryset.values_list('id', flat=True))
+        else:
+            website_ids = stale_websites(root=root, queryset=queryset)
+
+        exported = export_websites(website_ids, root=root, force=options['force'], workers=options['workers'])
+        self.stdout.write(f'Экспортировано сайтов: {len(exported)} (проверено: {queryset.count()})')
+
+        if options['prune']:
+            self._prune(root)
+
+    def _prune(self, root):
+        if not os.path.isdir(root):
+            return
+        existing = set(map(str, Website.objects.values_list('id', flat=True)))
+        for name in os.listdir(root):
+            if name.isdigit() and name not in existing:
+                remove_export(int(name), root=root)
+                self.stdout.write(f'Удалён экспорт сайта {name}')
@@ -0,0 +1,75 @@
+import json
+import os
+import re
+import urllib.request
+
+from django.core.management.base import BaseCommand, CommandError
+
+from base.fonts import MANIFEST_NAME, WEB_FONTS, font_file_name, font_subsets, fonts_root
+
+CSS_API = 'https://fonts.googleapis.com/css2?family={family}:wght@{weights}&display=swap'
+# С таким User-Agent Google Fonts отдаёт WOFF2, разбитые по наборам символов
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36'
+
+FACE_RE = re.compile(r'/\*\s*([\w-]+)\s*\*/\s*@font-face\s*{([^}]*)}')
+
+
+def _get(url):
+    request = urllib.request.Request(url, headers={'User-Agent': USER_AGENT})
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return response.read()
+
+
+def _property(block, name):
+    match = re.search(r'%s:\s*([^;]+);' % name, block)
+    return match.group(1).strip() if match else None
+
+
+class Command(BaseCommand):
+    help = 'Скачать шрифты редактора в WOFF2 по наборам символов и записать манифест fonts.json'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--if-missing', action='store_true',
+                            help='Ничего не делать, если манифест уже есть')
+        parser.add_argument('--force', action='store_true',
+                            help='Скачать файлы заново, даже если они уже есть')
+
+    def handle(self, *args, **options):
+        root = fonts_root()
+        manifest_path = os.path.join(root, MANIFEST_NAME)
+        if options['if_missing'] and os.path.exists(manifest_path):
+            self.stdout.write('Шрифты уже скачаны')
+            return
+
+        subsets = font_subsets()
+        manifest = {}
+        for family, weights in WEB_FONTS.items():
+            url = CSS_API.format(family=family.replace(' ', '+'), weights=';'.join(map(str, weights)))
+            try:
+                css = _get(url).decode('utf-8')
+            except OSError as e:
+                raise CommandError(f'Не удалось загрузить описание шрифта {family}: {e}')
+
+            faces = []
+            for subset, block in FACE_RE.findall(css):
+                if subset not in subsets:
+                    continue
+                weight = int(_property(block, 'font-weight'))
+                source = re.search(r'url\(([^)]+)\)', _property(block, 'src')).group(1)
+                name = font_file_name(family, weight, subset)
+                path = os.path.join(root, name)
+                if options['force'] or not os.path.exists(path):
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    with open(path, 'wb') as f:
+                        f.write(_get(source))
+                faces.append({
+                    'weight': weight,
+                    'subset': subset,
+                    'file': name,
+                    'unicode_range': _property(block, 'unicode-range'),
+                })
+            manifest[family] = faces
+            self.stdout.write(f'{family}: {len(faces)} файлов')
+
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from base.media import collect_garbage, rebuild_references
+
+
+class Command(BaseCommand):
+    help = 'Удалить загруженные файлы и их варианты, на которые не ссылается ни один блок или сайт'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-hours', type=int, default=None,
+                            help='Не трогать файлы моложе этого возраста (по умолчанию MEDIA_GC_GRACE_HOURS)')
+        parser.add_argument('--rebuild-refs', action='store_true',
+                            help='Сначала пересчитать счётчики ссылок по всем блокам и сайтам')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Только показать, какие файлы будут удалены')
+
+    def handle(self, *args, **options):
+        if options['rebuild_refs']:
+            rebuild_references()
+        grace = timedelta(hours=options['grace_hours']) if options['grace_hours'] is not None else None
+        removed = collect_garbage(grace=grace, dry_run=options['dry_run'])
+        if options['verbosity'] > 1:
+            for name in removed:
+                self.stdout.write(name)
+        action = 'Будет удалено' if options['dry_run'] else 'Удалено'
+        self.stdout.write(f'{action} файлов: {len(removed)}')
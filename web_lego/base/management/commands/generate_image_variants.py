@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from base.images import is_raster, media_name, process_image
+from base.models import Block, Website
+
+
+class Command(BaseCommand):
+    help = 'Создать адаптивные варианты для уже загруженных изображений блоков и логотипов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true',
+                            help='Пересчитать манифесты, даже если они уже есть')
+
+    def handle(self, *args, **options):
+        force = options['force']
+        processed = 0
+
+        blocks = Block.objects.filter(Q(block_type='slider') | Q(image__gt=''))
+        for block in blocks.iterator():
+            names = [block.image.name] if block.image else []
+            if block.block_type == 'slider':
+                names += [media_name(url) for url in (block.data or {}).get('images', [])]
+            for name in filter(is_raster, names):
+                if force or name not in block.image_variants:
+                    process_image(Block, block.pk, 'image_variants', name)
+                    processed += 1
+
+        for website in Website.objects.filter(header_logo__gt='').iterator():
+            name = website.header_logo.name
+            if force or name not in website.header_logo_variants:
+                process_image(Website, website.pk, 'header_logo_variants', name)
+                processed += 1
+
+        self.stdout.write(f'Обработано изображений: {processed}')
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from base.jobs import job_stats, queue_lag
+
+
+def _seconds(value):
+    return f'{value:.3f}' if value is not None else '-'
+
+
+class Command(BaseCommand):
+    help = 'Метрики фоновых задач: число по статусам, длительность, попытки и задержка очереди'
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'{"задача":<20} {"статус":<8} {"число":>7} {"сред., с":>9} {"макс., с":>9} {"попыток":>8}')
+        for row in job_stats():
+            self.stdout.write(
+                f'{row["name"]:<20} {row["status"]:<8} {row["count"]:>7} {_seconds(row["avg_duration"]):>9} '
+                f'{_seconds(row["max_duration"]):>9} {row["max_attempts_used"]:>8}'
+            )
+        self.stdout.write(f'Самая старая готовая задача ждёт: {queue_lag():.1f} с')
@@ -0,0 +1,146 @@
+import os
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def process_rss(pids):
+    """Суммарный RSS процессов ``pids`` и всех их потомков, байт (Linux, /proc)"""
+    total = 0
+    pending = list(pids)
+    seen = set()
+    while pending:
+        pid = pending.pop()
+        if pid in seen:
+            continue
+        seen.add(pid)
+        try:
+            with open(f'/proc/{pid}/status') as status:
+                for line in status:
+                    if line.startswith('VmRSS:'):
+                        total += int(line.split()[1]) * 1024
+            for task in os.listdir(f'/proc/{pid}/task'):
+                with open(f'/proc/{pid}/task/{task}/children') as children:
+                    pending.extend(int(child) for child in children.read().split())
+        except (OSError, ValueError):
+            continue
+    return total
+
+
+class RssSampler(threading.Thread):
+    """Пиковый RSS сервера, пока идёт тест"""
+
+    def __init__(self, pids, interval=0.05):
+        super().__init__(daemon=True)
+        self.pids = pids
+        self.interval = interval
+        self.peak = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self.peak = max(self.peak, process_rss(self.pids))
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        return self.peak
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест: параллельные GET-запросы к одному или нескольким URL '
+        'с выводом p50/p99 латентности и запросов в секунду. С --server-pid '
+        'выводит и прирост памяти сервера на один запрос в работе'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('targets', nargs='+',
+                            help='URL или пара имя=URL, например pool=http://localhost:8000/view/1/')
+        parser.add_argument('--requests', type=int, default=1000, help='Количество запросов к каждому URL')
+        parser.add_argument('--concurrency', default='20',
+                            help='Количество параллельных клиентов; несколько значений через запятую — по очереди')
+        parser.add_argument('--warmup', type=int, default=20, help='Запросов на прогрев, не входящих в статистику')
+        parser.add_argument('--timeout', type=float, default=30.0, help='Таймаут одного запроса, с')
+        parser.add_argument('--cookie', default='',
+                            help='Заголовок Cookie, например sessionid=... для API редактора')
+        parser.add_argument('--server-pid', type=int, action='append', default=[],
+                            help='PID сервера (вместе с потомками), чей RSS измерять; можно несколько')
+
+    def handle(self, *args, **options):
+        try:
+            levels = [int(level) for level in options['concurrency'].split(',')]
+        except ValueError:
+            raise CommandError('--concurrency: целые числа через запятую')
+        pids = options['server_pid']
+
+        header = f'{"цель":<16} {"клиентов":>8} {"rps":>8} {"p50, мс":>9} {"p99, мс":>9} {"ошибок":>7}'
+        if pids:
+            header += f' {"RSS, МБ":>8} {"КБ/запрос":>10}'
+        self.stdout.write(header)
+        for target in options['targets']:
+            name, sep, url = target.partition('=')
+            if not sep or '://' in name:
+                name, url = '', target
+            for concurrency in levels:
+                result = self.run(url, concurrency, options)
+                line = (
+                    f'{(name or url)[:16]:<16} {concurrency:>8} {result["rps"]:>8.1f} {result["p50"]:>9.2f} '
+                    f'{result["p99"]:>9.2f} {result["errors"]:>7}'
+                )
+                if pids:
+                    # Прирост памяти под нагрузкой, делённый на число одновременных запросов
+                    per_request = (result['rss_peak'] - result['rss_idle']) / concurrency / 1024
+                    line += f' {result["rss_peak"] / 2 ** 20:>8.1f} {per_request:>10.1f}'
+                self.stdout.write(line)
+
+    def _request(self, url, timeout, cookie=''):
+        start = time.perf_counter()
+        request = urllib.request.Request(url, headers={'Cookie': cookie} if cookie else {})
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                response.read()
+            ok = True
+        except (urllib.error.URLError, OSError):
+            ok = False
+        return time.perf_counter() - start, ok
+
+    def run(self, url, concurrency, options):
+        timeout, cookie, pids = options['timeout'], options['cookie'], options['server_pid']
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(lambda _: self._request(url, timeout, cookie), range(options['warmup'])))
+
+            rss_idle = process_rss(pids) if pids else 0
+            sampler = RssSampler(pids) if pids else None
+            if sampler:
+                sampler.start()
+            started = time.perf_counter()
+            results = list(pool.map(lambda _: self._request(url, timeout, cookie), range(options['requests'])))
+            elapsed = time.perf_counter() - started
+            rss_peak = sampler.stop() if sampler else 0
+
+        latencies = sorted(duration * 1000 for duration, ok in results if ok)
+        errors = sum(1 for _, ok in results if not ok)
+        if not latencies:
+            raise CommandError(f'Все запросы к {url} завершились ошибкой')
+        return {
+            'rps': len(results) / elapsed,
+            'p50': statistics.median(latencies),
+            'p99': percentile(latencies, 0.99),
+            'errors': errors,
+            'rss_idle': rss_idle,
+            'rss_peak': max(rss_peak, rss_idle),
+        }
@@ -0,0 +1,62 @@
+import gzip
+
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+from django.test.utils import override_settings
+
+from base.models import Website
+from base.renderers import clear_render_caches
+from base.staticfiles import read_static
+
+CRITICAL_CSS = 'base/css/view_website_critical.css'
+DEFERRED_CSS = 'base/css/view_website.css'
+
+
+def _sizes(text):
+    data = text.encode('utf-8')
+    return len(data), len(gzip.compress(data))
+
+
+class Command(BaseCommand):
+    help = 'Размер HTML и CSS опубликованных страниц: inline-стили блоков против вынесенных в классы'
+
+    def add_arguments(self, parser):
+        parser.add_argument('website_ids', nargs='*', type=int, help='Только указанные сайты')
+
+    def handle(self, *args, **options):
+        queryset = Website.objects.order_by('id')
+        if options['website_ids']:
+            queryset = queryset.filter(id__in=options['website_ids'])
+
+        self.stdout.write(f'{"сайт":>6} {"блоков":>7} {"HTML inline":>12} {"HTML классы":>12} '
+                          f'{"gzip inline":>12} {"gzip классы":>12} {"экономия":>9}')
+        total_inline = total_hoisted = 0
+        for website in queryset.iterator():
+            blocks = list(website.blocks.filter(is_active=True))
+            inline, inline_gz = _sizes(self._render(website, blocks, hoist=False))
+            hoisted, hoisted_gz = _sizes(self._render(website, blocks, hoist=True))
+            total_inline += inline
+            total_hoisted += hoisted
+            saved = (1 - hoisted / inline) * 100 if inline else 0
+            self.stdout.write(f'{website.id:>6} {len(blocks):>7} {inline:>12} {hoisted:>12} '
+                              f'{inline_gz:>12} {hoisted_gz:>12} {saved:>8.1f}%')
+
+        if total_inline:
+            self.stdout.write(f'Всего HTML: {total_inline} -> {total_hoisted} байт '
+                              f'({(1 - total_hoisted / total_inline) * 100:.1f}% меньше)')
+        critical, critical_gz = _sizes(read_static(CRITICAL_CSS))
+        deferred, deferred_gz = _sizes(read_static(DEFERRED_CSS))
+        self.stdout.write(
+            f'Блокирующий отрисовку CSS: было {critical + deferred} байт отдельным запросом, стало 0; '
+            f'встроено критического CSS: {critical} байт (gzip {critical_gz}), '
+            f'отложено: {deferred} байт (gzip {deferred_gz})'
+        )
+
+    def _render(self, website, blocks, hoist):
+        # Кэш рендереров хранит HTML одного режима — сбрасываем его до и после
+        clear_render_caches()
+        try:
+            with override_settings(PAGE_HOIST_STYLES=hoist):
+                return render_to_string('base/view_website.html', {'website': website, 'blocks': blocks})
+        finally:
+            clear_render_caches()
@@ -0,0 +1,24 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from base.models import ChunkedUpload
+from base.uploads import discard_part
+
+
+class Command(BaseCommand):
+    help = 'Удалить брошенные загрузки частями вместе с их временными файлами'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=24,
+                            help='Удалять загрузки, которые не обновлялись дольше этого времени')
+
+    def handle(self, *args, **options):
+        stale = ChunkedUpload.objects.filter(updated_at__lt=timezone.now() - timedelta(hours=options['hours']))
+        pruned = 0
+        for upload in stale.iterator():
+            discard_part(upload)
+            upload.delete()
+            pruned += 1
+        self.stdout.write(f'Удалено загрузок: {pruned}')
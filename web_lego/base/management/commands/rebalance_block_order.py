@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from base.models import Block, Website
+from base.signals import website_content_changed
+
+
+class Command(BaseCommand):
+    help = 'Перенумеровать порядок блоков у сайтов, где между соседними блоками не осталось места'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-gap', type=int, default=2,
+                            help='Перенумеровать сайт, если соседние блоки ближе этого значения')
+
+    def handle(self, *args, **options):
+        rebalanced = 0
+        for website_id in Website.objects.values_list('id', flat=True).iterator():
+            blocks = Block.objects.filter(website_id=website_id)
+            if blocks.needs_rebalance(options['min_gap']):
+                blocks.rebalance()
+                website_content_changed(website_id)
+                rebalanced += 1
+        self.stdout.write(f'Перенумеровано сайтов: {rebalanced}')
@@ -0,0 +1,53 @@
+import multiprocessing
+import signal
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from base.jobs import work
+
+
+def _worker_process(stop, once, poll_interval, batch):
+    # Соединения с БД, унаследованные от родительского процесса, использовать нельзя
+    connections.close_all()
+    # Останавливается по событию от родителя, а не по сигналу терминала
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    work(stop=stop, once=once, poll_interval=poll_interval, batch=batch)
+
+
+class Command(BaseCommand):
+    help = 'Выполнять фоновые задачи из очереди в БД (JOBS_BACKEND=database)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=1, help='Количество процессов-обработчиков')
+        parser.add_argument('--once', action='store_true', help='Выполнить готовые задачи и выйти')
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help='Пауза между проверками пустой очереди, с')
+        parser.add_argument('--batch', type=int, default=10, help='Сколько задач забирать за раз')
+
+    def handle(self, *args, **options):
+        stop = multiprocessing.Event()
+
+        def request_stop(signum, frame):
+            # Текущие задачи доделываются, новые не берутся
+            stop.set()
+
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
+
+        worker_args = (stop, options['once'], options['poll_interval'], options['batch'])
+        if options['workers'] <= 1:
+            processed = work(stop=stop, once=options['once'],
+                             poll_interval=options['poll_interval'], batch=options['batch'])
+            self.stdout.write(f'Выполнено задач: {processed}')
+            return
+
+        connections.close_all()
+        processes = [
+            multiprocessing.Process(target=_worker_process, args=worker_args, name=f'jobs-{index}')
+            for index in range(options['workers'])
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
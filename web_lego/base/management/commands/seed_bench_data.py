@@ -0,0 +1,62 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from base.models import BLOCK_TYPES, ORDER_GAP, Block, Website
+
+
+class Command(BaseCommand):
+    help = 'Заполнить базу синтетическими сайтами и блоками для проверки планов запросов и бенчмарков'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sites', type=int, default=100000, help='Количество сайтов')
+        parser.add_argument('--blocks', type=int, default=5000000, help='Общее количество блоков')
+        parser.add_argument('--sites-per-user', type=int, default=10, help='Сколько сайтов у одного владельца')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Размер пачки для bulk_create')
+
+    def handle(self, *args, **options):
+        sites = options['sites']
+        blocks_per_site = max(1, options['blocks'] // max(1, sites))
+        batch_size = options['batch_size']
+        block_types = [block_type for block_type, _ in BLOCK_TYPES]
+        started = time.monotonic()
+
+        users_needed = -(-sites // options['sites_per_user'])
+        prefix = f'bench-{int(started)}'
+        users = User.objects.bulk_create(
+            (User(username=f'{prefix}-{i}') for i in range(users_needed)), batch_size=batch_size
+        )
+
+        created_sites = created_blocks = 0
+        sites_per_batch = max(1, batch_size // blocks_per_site)
+        while created_sites < sites:
+            count = min(sites_per_batch, sites - created_sites)
+            with transaction.atomic():
+                websites = Website.objects.bulk_create(
+                    Website(
+                        owner=users[(created_sites + i) // options['sites_per_user']],
+                        title=f'Сайт {created_sites + i}',
+                    )
+                    for i in range(count)
+                )
+                Block.objects.bulk_create(
+                    (
+                        Block(
+                            website=website,
+                            block_type=block_types[i % len(block_types)],
+                            order=i * ORDER_GAP,
+                            data={'content': f'Блок {i}', 'position_x': 20, 'position_y': i * 120},
+                        )
+                        for website in websites
+                        for i in range(blocks_per_site)
+                    ),
+                    batch_size=batch_size,
+                )
+            created_sites += count
+            created_blocks += count * blocks_per_site
+            self.stdout.write(f'\rСайтов: {created_sites}/{sites}, блоков: {created_blocks}', ending='')
+            self.stdout.flush()
+
+        self.stdout.write(f'\nГотово за {time.monotonic() - started:.1f} с')
@@ -0,0 +1,148 @@
+"""Учёт ссылок на загруженные файлы и сборка мусора.
+
+Файлы используются в ``Block.image``, в ``data['images']`` слайдеров и в
+``Website.header_logo``. Для каждого файла в ``MediaFile`` хранится число
+ссылок на него. Модели запоминают свои файлы при загрузке из БД
+(``media_snapshot``), а после сохранения или удаления разница между
+снимком и текущим состоянием применяется к счётчикам.
+
+Файлы без ссылок удаляет команда ``gc_media`` — не сразу, а спустя
+``MEDIA_GC_GRACE_HOURS``: изображение слайда загружается раньше, чем блок
+сохраняется со ссылкой на него.
+"""
+import posixpath
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Block, MediaFile, Website
+from .storage import CONTENT_PREFIX, VARIANTS_PREFIX, content_digest, media_storage
+
+# Каталоги хранилища, в которых лежат загруженные пользователями файлы;
+# blocks/ и logos/ — файлы, загруженные до хранения по содержимому
+UPLOAD_PREFIXES = (CONTENT_PREFIX, 'blocks/images', 'blocks/slider', 'logos')
+
+
+def _apply(counts):
+    """Изменить счётчики ссылок: ``{имя файла: изменение}``"""
+    counts = {name: delta for name, delta in counts.items() if delta}
+    if not counts:
+        return
+    now = timezone.now()
+    MediaFile.objects.bulk_create([MediaFile(name=name) for name in counts], ignore_conflicts=True)
+    for delta in set(counts.values()):
+        names = [name for name, value in counts.items() if value == delta]
+        MediaFile.objects.filter(name__in=names).update(ref_count=F('ref_count') + delta, updated_at=now)
+
+
+def sync_references(instances):
+    """Применить к счётчикам изменения файлов сохранённых объектов.
+
+    Вызывается из ``post_save``; массовые операции (``bulk_create``,
+    ``bulk_update``) должны вызывать её сами.
+    """
+    counts = Counter()
+    for instance in instances:
+        old = instance.media_snapshot
+        new = instance.media_names()
+        counts.update(new - old)
+        counts.subtract(old - new)
+        instance.media_snapshot = new
+    _apply(counts)
+
+
+def release_references(instances):
+    """Убрать ссылки удалённых объектов"""
+    counts = Counter()
+    for instance in instances:
+        counts.subtract(instance.media_snapshot)
+        instance.media_snapshot = frozenset()
+    _apply(counts)
+
+
+def referenced_counts():
+    """Число ссылок на каждый файл, посчитанное заново по всем блокам и сайтам"""
+    counts = Counter()
+    for block in Block.objects.only('image', 'data').iterator():
+        counts.update(block.media_names())
+    for website in Website.objects.only('header_logo').iterator():
+        counts.update(website.media_names())
+    return counts
+
+
+@transaction.atomic
+def rebuild_references():
+    """Пересчитать ``MediaFile`` с нуля, например для файлов, загруженных до учёта ссылок"""
+    counts = referenced_counts()
+    now = timezone.now()
+    MediaFile.objects.bulk_create([MediaFile(name=name) for name in counts], ignore_conflicts=True)
+    rows = list(MediaFile.objects.all())
+    for row in rows:
+        row.ref_count = counts.get(row.name, 0)
+        row.updated_at = now
+    MediaFile.objects.bulk_update(rows, ['ref_count', 'updated_at'], batch_size=500)
+
+
+def _walk(storage, path):
+    directories, files = storage.listdir(path)
+    for name in files:
+        yield posixpath.join(path, name)
+    for directory in directories:
+        yield from _walk(storage, posixpath.join(path, directory))
+
+
+def _is_old(storage, name, cutoff):
+    try:
+        return storage.get_modified_time(name) < cutoff
+    except (FileNotFoundError, NotImplementedError):
+        return False
+
+
+def _live_variant_hashes(live_names):
+    hashes = set()
+    for variants in Block.objects.exclude(image_variants={}).values_list('image_variants', flat=True).iterator():
+        hashes.update(manifest['hash'] for name, manifest in variants.items() if name in live_names)
+    for variants in Website.objects.exclude(header_logo_variants={}).values_list('header_logo_variants', flat=True):
+        hashes.update(manifest['hash'] for name, manifest in variants.items() if name in live_names)
+    # Для файлов, сохранённых по содержимому, хеш известен из имени
+    hashes.update(filter(None, map(content_digest, live_names)))
+    return hashes
+
+
+def collect_garbage(grace=None, dry_run=False):
+    """Удалить файлы без ссылок и их адаптивные варианты.
+
+    Возвращает список удалённых (при ``dry_run`` — подлежащих удалению) имён.
+    """
+    if grace is None:
+        grace = timedelta(hours=getattr(settings, 'MEDIA_GC_GRACE_HOURS', 24))
+    cutoff = timezone.now() - grace
+    storage = media_storage()
+    # Файлы, на которые есть ссылки или ссылки на которые менялись недавно
+    live_names = set(MediaFile.objects.filter(Q(ref_count__gt=0) | Q(updated_at__gte=cutoff))
+                     .values_list('name', flat=True))
+
+    removed = []
+    for prefix in UPLOAD_PREFIXES:
+        if not storage.exists(prefix):
+            continue
+        for name in _walk(storage, prefix):
+            if name not in live_names and _is_old(storage, name, cutoff):
+                removed.append(name)
+
+    if storage.exists(VARIANTS_PREFIX):
+        live_hashes = _live_variant_hashes(live_names)
+        for name in _walk(storage, VARIANTS_PREFIX):
+            digest = name.split('/')[2] if name.count('/') >= 3 else None
+            if digest not in live_hashes and _is_old(storage, name, cutoff):
+                removed.append(name)
+
+    if not dry_run:
+        for name in removed:
+            storage.delete(name)
+        MediaFile.objects.filter(name__in=removed, ref_count__lte=0).delete()
+    return removed
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.30 on 2026-10-18 17:55
+
+from django.db import migrations, models
+
+ORDER_GAP = 1024
+
+
+def spread_orders(apps, schema_editor):
+    """Перенумеровать блоки каждого сайта с шагом ORDER_GAP"""
+    Block = apps.get_model('base', 'Block')
+    changed = []
+    website_id, position = None, 0
+    for block in Block.objects.order_by('website_id', 'order', 'id').only('id', 'website_id', 'order'):
+        if block.website_id != website_id:
+            website_id, position = block.website_id, 0
+        block.order = position * ORDER_GAP
+        position += 1
+        changed.append(block)
+    Block.objects.bulk_update(changed, ['order'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0004_block_image'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='block',
+            index=models.Index(fields=['website', 'is_active', 'order'], name='block_site_active_order_idx'),
+        ),
+        migrations.RunPython(spread_orders, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-18 17:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0005_block_order_gaps'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='block',
+            index=models.Index(fields=['website', 'order'], name='block_site_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='block',
+            index=models.Index(fields=['block_type', 'website', 'order'], name='block_type_site_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='block',
+            index=models.Index(fields=['created_at'], name='block_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='website',
+            index=models.Index(fields=['owner', 'created_at'], name='website_owner_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='website',
+            index=models.Index(fields=['created_at'], name='website_created_idx'),
+        ),
+    ]
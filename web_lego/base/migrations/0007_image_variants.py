@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-18 17:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0006_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='block',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Варианты изображений'),
+        ),
+        migrations.AddField(
+            model_name='website',
+            name='header_logo_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Варианты логотипа'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:06
+
+from collections import Counter
+
+import base.storage
+from django.conf import settings
+from django.db import migrations, models
+
+
+def count_references(apps, schema_editor):
+    """Посчитать ссылки на уже загруженные файлы"""
+    Block = apps.get_model('base', 'Block')
+    Website = apps.get_model('base', 'Website')
+    MediaFile = apps.get_model('base', 'MediaFile')
+    counts = Counter()
+    for image, data in Block.objects.values_list('image', 'data').iterator():
+        names = {image} if image else set()
+        images = data.get('images') if isinstance(data, dict) else None
+        for url in images or ():
+            if isinstance(url, str) and url.startswith(settings.MEDIA_URL):
+                names.add(url[len(settings.MEDIA_URL):])
+        counts.update(names)
+    counts.update(Website.objects.exclude(header_logo='').exclude(header_logo__isnull=True)
+                  .values_list('header_logo', flat=True))
+    MediaFile.objects.bulk_create(
+        [MediaFile(name=name, ref_count=count) for name, count in counts.items()], batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0008_chunked_upload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='Имя файла')),
+                ('ref_count', models.IntegerField(default=0, verbose_name='Число ссылок')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Обновлен')),
+            ],
+            options={
+                'verbose_name': 'Медиафайл',
+                'verbose_name_plural': 'Медиафайлы',
+            },
+        ),
+        migrations.AlterField(
+            model_name='block',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=base.storage.media_storage, upload_to='blocks/images/', verbose_name='Изображение'),
+        ),
+        migrations.AlterField(
+            model_name='website',
+            name='header_logo',
+            field=models.ImageField(blank=True, null=True, storage=base.storage.media_storage, upload_to='logos/', verbose_name='Логотип'),
+        ),
+        migrations.RunPython(count_references, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0010_background_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='block',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False, verbose_name='Версия'),
+        ),
+    ]
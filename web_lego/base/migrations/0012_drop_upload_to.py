@@ -0,0 +1,24 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:14
+
+import base.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0011_block_version'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='block',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=base.storage.media_storage, upload_to='', verbose_name='Изображение'),
+        ),
+        migrations.AlterField(
+            model_name='website',
+            name='header_logo',
+            field=models.ImageField(blank=True, null=True, storage=base.storage.media_storage, upload_to='', verbose_name='Логотип'),
+        ),
+    ]
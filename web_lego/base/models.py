@@ -1,5 +1,13 @@
-from django.db import models
+import copy
+import uuid
+
+from django.db import models, transaction
+from django.db.models import Count, Max
 from django.contrib.auth.models import User
+from django.utils import timezone
+
+from .images import media_name
+from .storage import media_storage
 
 # Типы блоков
 BLOCK_TYPES = [
@@ -12,7 +20,56 @@ BLOCK_TYPES = [
     ('section', 'Секция'),
 ]
 
-class Website(models.Model):
+# Значения по умолчанию для данных блоков каждого типа; get_data копирует
+# их, так что изменения данных блока сюда не попадают
+BLOCK_DEFAULTS = {
+    'text': {'content': 'Текст блока', 'size': '16px', 'align': 'left'},
+    'heading': {'content': 'Заголовок', 'level': 'h1', 'align': 'left'},
+    'image': {'url': '', 'alt': 'Изображение', 'width': '100%', 'height': 'auto'},
+    'video': {'url': '', 'width': '100%', 'height': '400px', 'autoplay': False},
+    'button': {'text': 'Кнопка', 'link': '#', 'style': 'primary', 'align': 'left'},
+    'slider': {'images': [], 'autoplay': True, 'interval': 3000, 'width': '100%', 'height': 'auto'},
+    'section': {'content': '', 'columns': 1},
+}
+
+class MediaReferencesMixin:
+    """Снимок файлов объекта на момент загрузки из БД для учёта ссылок (base/media.py)"""
+    media_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if all(field in instance.__dict__ for field in cls.media_fields):
+            instance.media_snapshot = instance.media_names()
+        return instance
+
+    @property
+    def media_snapshot(self):
+        return self.__dict__.get('_media_snapshot', frozenset())
+
+    @media_snapshot.setter
+    def media_snapshot(self, names):
+        self.__dict__['_media_snapshot'] = names
+
+    def remember_media(self):
+        """Снять снимок из БД, если объект загружен без полей с файлами (only/defer)"""
+        if '_media_snapshot' not in self.__dict__ and not self._state.adding and self.pk is not None:
+            saved = type(self).objects.only(*self.media_fields).filter(pk=self.pk).first()
+            self.media_snapshot = saved.media_names() if saved else frozenset()
+
+
+class WebsiteQuerySet(models.QuerySet):
+    def with_content_state(self):
+        """Аннотировать сайты временем последнего изменения блоков и их числом.
+
+        Вместе с ``updated_at`` сайта это меняется при любом изменении
+        контента, поэтому служит отпечатком для экспорта и валидатором для
+        HTTP-кэширования.
+        """
+        return self.annotate(blocks_updated_at=Max('blocks__updated_at'), blocks_count=Count('blocks'))
+
+
+class Website(MediaReferencesMixin, models.Model):
     title = models.CharField(max_length=200, verbose_name="Название сайта", default="Мой сайт")
     description = models.TextField(blank=True, verbose_name="Описание")
     owner = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name="Владелец")
@@ -25,7 +82,9 @@ class Website(models.Model):
     font_family = models.CharField(max_length=100, default='Arial, sans-serif', verbose_name="Шрифт")
     
     # Настройки Header
-    header_logo = models.ImageField(upload_to='logos/', blank=True, null=True, verbose_name="Логотип")
+    header_logo = models.ImageField(storage=media_storage, blank=True, null=True, verbose_name="Логотип")
+    # Адаптивные варианты логотипа: {имя файла: манифест}, см. base/images.py
+    header_logo_variants = models.JSONField(default=dict, blank=True, editable=False, verbose_name="Варианты логотипа")
     header_company_name = models.CharField(max_length=200, blank=True, default='', verbose_name="Название компании")
     header_background_color = models.CharField(max_length=7, default='#ffffff', verbose_name="Цвет фона Header")
     header_text_color = models.CharField(max_length=7, default='#000000', verbose_name="Цвет текста Header")
@@ -36,16 +95,96 @@ class Website(models.Model):
     footer_text_color = models.CharField(max_length=7, default='#000000', verbose_name="Цвет текста Footer")
     footer_content = models.TextField(blank=True, verbose_name="Содержимое Footer", default='<p>© 2024 Мой сайт</p>')
     footer_show = models.BooleanField(default=True, verbose_name="Показывать Footer")
+
+    # Сайт удаляется фоновой задачей; до этого он уже скрыт отовсюду
+    is_deleting = models.BooleanField(default=False, verbose_name="Удаляется")
     
+    objects = WebsiteQuerySet.as_manager()
+
+    media_fields = ('header_logo',)
+
     def __str__(self):
         return self.title
+
+    def media_names(self):
+        """Имена файлов хранилища, на которые ссылается сайт"""
+        return frozenset([self.header_logo.name] if self.header_logo else ())
     
     class Meta:
+        indexes = [
+            # Список сайтов в личном кабинете
+            models.Index(fields=['owner', 'created_at'], name='website_owner_created_idx'),
+            # Фильтр по дате создания в админке
+            models.Index(fields=['created_at'], name='website_created_idx'),
+        ]
         verbose_name = 'Сайт'
         verbose_name_plural = 'Сайты'
 
 
-class Block(models.Model):
+# Шаг между соседними блоками: вставка или перенос блока занимает свободное
+# значение между соседями и меняет только его собственную строку
+ORDER_GAP = 1024
+
+
+def order_between(lower, upper):
+    """Значение порядка между ``lower`` и ``upper`` (любой из них может быть None).
+
+    Возвращает None, если между соседями не осталось свободных значений —
+    тогда порядок сайта нужно перенумеровать через ``BlockQuerySet.rebalance``.
+    """
+    if lower is None and upper is None:
+        return 0
+    if lower is None:
+        return upper - ORDER_GAP
+    if upper is None:
+        return lower + ORDER_GAP
+    if upper - lower < 2:
+        return None
+    return (lower + upper) // 2
+
+
+class BlockQuerySet(models.QuerySet):
+    def next_order(self):
+        """Порядок для блока, добавляемого в конец"""
+        last = self.order_by('-order').values_list('order', flat=True).first()
+        return order_between(last, None)
+
+    def rebalance(self):
+        """Перенумеровать блоки с шагом ``ORDER_GAP``, сохранив текущий порядок"""
+        ids = list(self.order_by('order', 'id').values_list('id', flat=True))
+        return self.reorder({block_id: position * ORDER_GAP for position, block_id in enumerate(ids)})
+
+    def needs_rebalance(self, min_gap=2):
+        """Есть ли соседние блоки, между которыми почти не осталось места"""
+        orders = list(self.order_by('order').values_list('order', flat=True))
+        return any(upper - lower < min_gap for lower, upper in zip(orders, orders[1:]))
+
+    def reorder(self, orders):
+        """Проставить порядок блокам одним UPDATE.
+
+        ``orders`` — словарь ``{block_id: order}``. Если хотя бы один блок не
+        входит в queryset (например, принадлежит другому сайту), ничего не
+        меняется и выбрасывается ``ValueError``. Возвращает число обновлённых блоков.
+        """
+        if not orders:
+            return 0
+        if any(not isinstance(value, int) for value in (*orders, *orders.values())):
+            raise ValueError('id и order блоков должны быть целыми числами')
+
+        with transaction.atomic():
+            blocks = self.filter(id__in=orders)
+            if blocks.count() != len(orders):
+                raise ValueError('Блоки не принадлежат сайту')
+            return blocks.update(
+                order=models.Case(
+                    *[models.When(id=block_id, then=models.Value(order)) for block_id, order in orders.items()],
+                    output_field=models.IntegerField(),
+                ),
+                updated_at=timezone.now(),
+            )
+
+
+class Block(MediaReferencesMixin, models.Model):
     """Модель для блоков лендинга с расширяемой архитектурой"""
     website = models.ForeignKey(Website, on_delete=models.CASCADE, related_name='blocks', verbose_name="Сайт")
     block_type = models.CharField(max_length=50, choices=BLOCK_TYPES, verbose_name="Тип блока")
@@ -57,7 +196,9 @@ class Block(models.Model):
     data = models.JSONField(default=dict, verbose_name="Данные блока")
     
     # Поле для загрузки изображений (для блоков типа image)
-    image = models.ImageField(upload_to='blocks/images/', blank=True, null=True, verbose_name="Изображение")
+    image = models.ImageField(storage=media_storage, blank=True, null=True, verbose_name="Изображение")
+    # Адаптивные варианты изображения блока и картинок слайдера: {имя файла: манифест}
+    image_variants = models.JSONField(default=dict, blank=True, editable=False, verbose_name="Варианты изображений")
     
     # Стили блока
     background_color = models.CharField(max_length=7, blank=True, null=True, verbose_name="Цвет фона")
@@ -67,26 +208,167 @@ class Block(models.Model):
     
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Создан")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Обновлен")
+    # Растёт при каждом изменении из редактора: изменение, основанное на
+    # устаревшей версии, отклоняется (base/collab.py)
+    version = models.PositiveIntegerField(default=1, editable=False, verbose_name="Версия")
+
+    objects = BlockQuerySet.as_manager()
     
     class Meta:
         ordering = ['order']
+        indexes = [
+            # Активные блоки страницы в view_website/edit_website
+            models.Index(fields=['website', 'is_active', 'order'], name='block_site_active_order_idx'),
+            # Последний блок сайта (next_order) и сортировка списка в админке
+            models.Index(fields=['website', 'order'], name='block_site_order_idx'),
+            # Фильтры по типу и дате создания в админке
+            models.Index(fields=['block_type', 'website', 'order'], name='block_type_site_order_idx'),
+            models.Index(fields=['created_at'], name='block_created_idx'),
+        ]
         verbose_name = 'Блок'
         verbose_name_plural = 'Блоки'
     
+    media_fields = ('image', 'data')
+
     def __str__(self):
         return f"{self.get_block_type_display()} - {self.website.title}"
-    
+
+    def media_names(self):
+        """Имена файлов хранилища, на которые ссылается блок: изображение и слайды"""
+        names = {self.image.name} if self.image else set()
+        images = self.data.get('images') if isinstance(self.data, dict) else None
+        if images:
+            names.update(filter(None, map(media_name, images)))
+        return frozenset(names)
+
+    def move_after(self, after=None):
+        """Поставить блок сразу после блока ``after`` того же сайта (None — в начало).
+
+        Обновляет только строку этого блока; если между соседями не осталось
+        места, сначала перенумеровывает блоки сайта.
+        """
+        siblings = Block.objects.filter(website_id=self.website_id).exclude(id=self.id)
+        for _ in range(2):
+            lower = after.order if after is not None else None
+            following = siblings if lower is None else siblings.filter(order__gt=lower)
+            upper = following.order_by('order').values_list('order', flat=True).first()
+            order = order_between(lower, upper)
+            if order is not None:
+                break
+            # Зазор исчерпан: перенумеровываем сайт и ищем соседей заново
+            Block.objects.filter(website_id=self.website_id).rebalance()
+            after.refresh_from_db(fields=['order'])
+
+        self.order = order
+        self.updated_at = timezone.now()
+        Block.objects.filter(id=self.id).update(order=self.order, updated_at=self.updated_at)
+
     def get_data(self):
-        """Получить данные блока с дефолтными значениями"""
-        defaults = {
-            'text': {'content': 'Текст блока', 'size': '16px', 'align': 'left'},
-            'heading': {'content': 'Заголовок', 'level': 'h1', 'align': 'left'},
-            'image': {'url': '', 'alt': 'Изображение', 'width': '100%', 'height': 'auto'},
-            'video': {'url': '', 'width': '100%', 'height': '400px', 'autoplay': False},
-            'button': {'text': 'Кнопка', 'link': '#', 'style': 'primary', 'align': 'left'},
-            'slider': {'images': [], 'autoplay': True, 'interval': 3000, 'width': '100%', 'height': 'auto'},
-            'section': {'content': '', 'columns': 1},
-        }
-        block_defaults = defaults.get(self.block_type, {})
-        data = self.data.copy() if self.data else {}
-        return {**block_defaults, **data}
\ No newline at end of file
+        """Получить данные блока с дефолтными значениями.
+
+        Слияние выполняется один раз на экземпляр и повторяется, только если
+        ``data`` или ``block_type`` были присвоены заново. Изменения ``data`` на
+        месте не отслеживаются — после них нужно присвоить ``data``. Каждый
+        вызов возвращает новый словарь, так что его можно изменять.
+        """
+        cached = self.__dict__.get('_merged_data')
+        if cached is None or cached[0] is not self.data or cached[1] != self.block_type:
+            defaults = copy.deepcopy(BLOCK_DEFAULTS.get(self.block_type, {}))
+            cached = (self.data, self.block_type, {**defaults, **(self.data or {})})
+            self.__dict__['_merged_data'] = cached
+        # Строки и числа неизменяемы, копировать нужно только списки и словари
+        return {key: copy.deepcopy(value) if isinstance(value, (list, dict)) else value
+                for key, value in cached[2].items()}
+
+
+class ChunkedUpload(models.Model):
+    """Возобновляемая загрузка изображения частями (см. base/uploads.py)"""
+    TARGETS = [
+        ('image', 'Изображение блока'),
+        ('slider', 'Слайд'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name="Владелец")
+    block = models.ForeignKey(Block, on_delete=models.CASCADE, related_name='chunked_uploads', verbose_name="Блок")
+    target = models.CharField(max_length=20, choices=TARGETS, default='slider', verbose_name="Назначение")
+    filename = models.CharField(max_length=255, verbose_name="Имя файла")
+    content_type = models.CharField(max_length=100, verbose_name="Тип файла")
+    size = models.PositiveBigIntegerField(verbose_name="Размер")
+    offset = models.PositiveBigIntegerField(default=0, verbose_name="Загружено байт")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Создана")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Обновлена")
+
+    class Meta:
+        indexes = [
+            # Поиск брошенных загрузок для очистки
+            models.Index(fields=['updated_at'], name='chunked_upload_updated_idx'),
+        ]
+        verbose_name = 'Загрузка частями'
+        verbose_name_plural = 'Загрузки частями'
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size})"
+
+    @property
+    def is_complete(self):
+        return self.offset >= self.size
+
+
+class MediaFile(models.Model):
+    """Загруженный файл и число ссылок на него из блоков и сайтов"""
+    name = models.CharField(max_length=255, unique=True, verbose_name="Имя файла")
+    ref_count = models.IntegerField(default=0, verbose_name="Число ссылок")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Обновлен")
+
+    class Meta:
+        verbose_name = 'Медиафайл'
+        verbose_name_plural = 'Медиафайлы'
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count})"
+
+
+class Job(models.Model):
+    """Фоновая задача в очереди в БД (см. base/jobs.py)"""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = [
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    ]
+
+    name = models.CharField(max_length=100, verbose_name="Задача")
+    payload = models.JSONField(default=dict, blank=True, verbose_name="Аргументы")
+    # Пока задача с тем же ключом ждёт в очереди, повторная не добавляется
+    dedupe_key = models.CharField(max_length=255, null=True, blank=True, verbose_name="Ключ")
+    status = models.CharField(max_length=10, choices=STATUSES, default=QUEUED, verbose_name="Статус")
+    attempts = models.PositiveIntegerField(default=0, verbose_name="Попыток")
+    max_attempts = models.PositiveIntegerField(default=5, verbose_name="Максимум попыток")
+    run_at = models.DateTimeField(default=timezone.now, verbose_name="Запустить после")
+    locked_by = models.CharField(max_length=100, blank=True, default='', verbose_name="Обработчик")
+    last_error = models.TextField(blank=True, default='', verbose_name="Последняя ошибка")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Создана")
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="Начата")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Завершена")
+    duration = models.FloatField(null=True, blank=True, verbose_name="Длительность, с")
+
+    class Meta:
+        indexes = [
+            # Выбор следующих задач обработчиком
+            models.Index(fields=['status', 'run_at'], name='job_status_run_at_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dedupe_key'], condition=models.Q(status='queued'), name='job_queued_dedupe_key_uniq',
+            ),
+        ]
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
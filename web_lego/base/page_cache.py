@@ -0,0 +1,117 @@
+"""Кэш отрендеренных опубликованных страниц.
+
+Каждая страница хранится под ключом сайта вместе с версией контента, при
+которой она была отрендерена. Версия хранится в том же кэше и меняется при
+любом изменении сайта или его блоков (см. ``base/signals.py``), поэтому
+устаревшие страницы не удаляются явно, а просто перестают совпадать по версии.
+Проверка выполняется одним запросом ``get_many`` к бэкенду кэша.
+"""
+import threading
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import caches
+
+# Отрендеренная страница и её HTTP-валидаторы (см. base/http_cache.py)
+CachedPage = namedtuple('CachedPage', 'html etag last_modified')
+
+_stats = {'hits': 0, 'misses': 0}
+_stats_lock = threading.Lock()
+
+
+def _cache():
+    return caches[getattr(settings, 'PAGE_CACHE_ALIAS', 'pages')]
+
+
+def _version_key(website_id):
+    return f'site:{website_id}:version'
+
+
+def _page_key(website_id):
+    return f'site:{website_id}:page'
+
+
+def _new_version():
+    # Версия, которая не могла встречаться раньше: если ключ версии был
+    # вытеснен из кэша, старые страницы не совпадут с новой версией
+    return time.time_ns()
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def get_page(website_id):
+    """Вернуть ``(page, version)`` для сайта, где ``page`` — ``CachedPage``.
+
+    При промахе ``page`` равен ``None``, а ``version`` — текущая версия
+    контента, под которой нужно сохранить свежий рендер через ``set_page``.
+    """
+    cache = _cache()
+    version_key = _version_key(website_id)
+    values = cache.get_many([version_key, _page_key(website_id)])
+    version = values.get(version_key)
+    if version is None:
+        version = _new_version()
+        if not cache.add(version_key, version, timeout=None):
+            version = cache.get(version_key, version)
+    page = values.get(_page_key(website_id))
+    if page is not None and page[0] == version:
+        _count('hits')
+        return CachedPage(*page[1:]), version
+    _count('misses')
+    return None, version
+
+
+async def aget_page(website_id):
+    """То же, что ``get_page``, через асинхронные методы кэша"""
+    cache = _cache()
+    version_key = _version_key(website_id)
+    values = await cache.aget_many([version_key, _page_key(website_id)])
+    version = values.get(version_key)
+    if version is None:
+        version = _new_version()
+        if not await cache.aadd(version_key, version, timeout=None):
+            version = await cache.aget(version_key, version)
+    page = values.get(_page_key(website_id))
+    if page is not None and page[0] == version:
+        _count('hits')
+        return CachedPage(*page[1:]), version
+    _count('misses')
+    return None, version
+
+
+def set_page(website_id, version, page):
+    """Сохранить отрендеренную страницу (``CachedPage``) для указанной версии контента"""
+    timeout = getattr(settings, 'PAGE_CACHE_TIMEOUT', None)
+    _cache().set(_page_key(website_id), (version, *page), timeout=timeout)
+
+
+async def aset_page(website_id, version, page):
+    timeout = getattr(settings, 'PAGE_CACHE_TIMEOUT', None)
+    await _cache().aset(_page_key(website_id), (version, *page), timeout=timeout)
+
+
+def bump_version(website_id):
+    """Инвалидировать закэшированную страницу сайта"""
+    cache = _cache()
+    version_key = _version_key(website_id)
+    try:
+        cache.incr(version_key)
+    except ValueError:
+        # Ключа нет — страницы для этого сайта в кэше тоже нет смысла искать
+        cache.set(version_key, _new_version(), timeout=None)
+
+
+def stats():
+    """Счётчики попаданий и промахов текущего процесса"""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset_stats():
+    with _stats_lock:
+        for name in _stats:
+            _stats[name] = 0
@@ -0,0 +1,35 @@
+"""Частичное обновление ``Block.data`` в формате JSON Merge Patch (RFC 7396).
+
+Редактор отправляет не весь ``data`` блока, а только изменившиеся ключи:
+вложенные объекты сливаются рекурсивно, ``null`` удаляет ключ, любое другое
+значение (в том числе список) заменяет прежнее целиком.
+"""
+
+
+def merge_patch(target, patch):
+    """Применить merge patch ``patch`` к ``target``; исходные объекты не меняются"""
+    if not isinstance(patch, dict):
+        return patch
+    result = dict(target) if isinstance(target, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = merge_patch(result.get(key), value)
+    return result
+
+
+def make_patch(source, target):
+    """Merge patch, который превращает ``source`` в ``target`` (обратное к ``merge_patch``).
+
+    Значение ``None`` в ``target`` в merge patch не выразить: такой ключ удаляется.
+    """
+    if not isinstance(source, dict) or not isinstance(target, dict):
+        return target
+    patch = {key: None for key in source if key not in target}
+    for key, value in target.items():
+        if key not in source:
+            patch[key] = value
+        elif source[key] != value:
+            patch[key] = make_patch(source[key], value)
+    return patch
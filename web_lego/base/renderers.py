@@ -0,0 +1,350 @@
+"""Рендереры блоков лендинга.
+
+Для каждого типа блока есть свой класс-рендерер, который регистрируется
+декоратором ``register_renderer`` и выбирается по ``block_type`` поиском в
+словаре. Чтобы добавить новый тип блока, достаточно объявить подкласс
+``BlockRenderer`` с нужным ``block_type`` — фильтр ``render_block`` менять не нужно.
+
+Готовый HTML кэшируется в ограниченном LRU каждого рендерера по ключу
+``(block.id, block.updated_at)``: пока блок не сохранён заново, повторный
+рендер стоит одного обращения к словарю.
+
+Стили, которые одинаковы у многих блоков (оформление кнопки, заглушка,
+вписывание картинки), выводятся не атрибутом ``style``, а классом ``b-<хеш>``
+(см. ``BlockStyles``); правила этих классов собирает для страницы ``blocks_css``.
+"""
+import hashlib
+import threading
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+from django.utils.safestring import mark_safe
+
+from .images import media_name, picture_html
+
+DEFAULT_CACHE_SIZE = 1024
+
+# Заглушка для блоков без контента
+PLACEHOLDER_STYLE = "background: #e5e7eb; min-height: 200px; display: flex; align-items: center; justify-content: center;"
+SLIDER_PLACEHOLDER_STYLE = "background: #e5e7eb; min-height: 300px; display: flex; align-items: center; justify-content: center;"
+
+# Стили кнопки
+BUTTON_STYLES = {
+    "primary": "background: linear-gradient(135deg, #8b5cf6 0%, #7c3aed 100%); color: white;",
+    "secondary": "background: #e5e7eb; color: #374151;",
+    "success": "background: #10b981; color: white;",
+    "danger": "background: #ef4444; color: white;",
+}
+
+# Размеры кнопки
+BUTTON_SIZE_STYLES = {
+    "small": "padding: 0.5rem 1rem; font-size: 0.875rem;",
+    "medium": "padding: 0.75rem 1.5rem; font-size: 1rem;",
+    "large": "padding: 1rem 2rem; font-size: 1.125rem;",
+}
+
+BUTTON_LINK_STYLE = "text-decoration: none; display: inline-block; font-weight: 600; transition: all 0.3s ease;"
+
+_renderers = {}
+
+# HTML блока и правила классов, которые в нём используются: ((класс, объявления), ...)
+RenderedBlock = namedtuple('RenderedBlock', 'html rules')
+
+
+def register_renderer(cls):
+    """Декоратор класса: зарегистрировать рендерер для ``cls.block_type``"""
+    _renderers[cls.block_type] = cls()
+    return cls
+
+
+def get_renderer(block_type):
+    return _renderers.get(block_type, _unknown_renderer)
+
+
+def block_style(block):
+    """Общие inline-стили блока (фон, цвет, отступы)"""
+    parts = (
+        f"background-color: {block.background_color};" if block.background_color else "",
+        f"color: {block.text_color};" if block.text_color else "",
+        f"padding: {block.padding};" if block.padding else "",
+        f"margin: {block.margin};" if block.margin else "",
+    )
+    return " ".join(filter(None, parts))
+
+
+def style_class(declarations):
+    """Имя класса зависит только от объявлений: у одинаковых стилей один класс"""
+    return 'b-' + hashlib.blake2s(declarations.encode(), digest_size=4).hexdigest()
+
+
+class BlockStyles:
+    """Атрибуты ``class``/``style`` элементов одного блока.
+
+    Общая часть стиля выносится в класс, индивидуальные стили блока (цвета и
+    отступы из настроек) остаются inline и по-прежнему перекрывают класс.
+    При ``PAGE_HOIST_STYLES = False`` всё выводится inline, как раньше.
+    """
+
+    def __init__(self):
+        self.hoist = getattr(settings, 'PAGE_HOIST_STYLES', True)
+        self.rules = {}
+
+    def values(self, shared, inline=''):
+        """``(class, style)`` элемента; отсутствующее — None"""
+        shared = ' '.join(shared.split())
+        if not self.hoist:
+            return None, ' '.join(filter(None, (shared, inline))) or None
+        name = None
+        if shared:
+            name = style_class(shared)
+            self.rules[name] = shared
+        return name, inline or None
+
+    def attrs(self, shared, inline=''):
+        """Атрибуты ``class``/``style`` для вставки в тег"""
+        name, style = self.values(shared, inline)
+        return (f' class="{name}"' if name else '') + (f' style="{style}"' if style else '')
+
+
+def blocks_css(blocks):
+    """Правила классов, которые используют блоки страницы, — каждое один раз"""
+    rules = {}
+    for block in blocks:
+        rules.update(get_renderer(block.block_type).render_styled(block).rules)
+    # Значения стилей приходят из данных блока: не даём закрыть <style>
+    return ''.join(f'.{name}{{{declarations}}}' for name, declarations in rules.items()).replace('<', '\\3c ')
+
+
+def image_sizes(data):
+    """Атрибут sizes по ширине блока (в пикселях); на мобильных блоки во всю ширину"""
+    width = data.get("width")
+    if isinstance(width, (int, float)) and width > 0:
+        return f"(max-width: 768px) 100vw, {int(width)}px"
+    return "100vw"
+
+
+def css_size(value):
+    """Числовые размеры из редактора хранятся в пикселях"""
+    if isinstance(value, (int, float)):
+        return f"{value}px"
+    return value
+
+
+class BlockRenderer:
+    """Базовый рендерер блока.
+
+    Подклассы задают ``block_type`` и реализуют ``render_html``.
+    """
+    block_type = None
+
+    def __init__(self):
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._cache_size = None
+
+    @property
+    def cache_size(self):
+        if self._cache_size is None:
+            self._cache_size = getattr(settings, 'BLOCK_RENDER_CACHE_SIZE', DEFAULT_CACHE_SIZE)
+        return self._cache_size
+
+    def render(self, block):
+        """HTML блока с учётом кэша"""
+        return self.render_styled(block).html
+
+    def render_styled(self, block):
+        """``RenderedBlock`` блока с учётом кэша"""
+        key = (block.id, block.updated_at) if block.id is not None else None
+        if key is not None:
+            with self._lock:
+                rendered = self._cache.get(key)
+                if rendered is not None:
+                    self._cache.move_to_end(key)
+                    return rendered
+
+        css = BlockStyles()
+        html = mark_safe(self.render_html(block, block.get_data(), block_style(block), css))
+        rendered = RenderedBlock(html, tuple(css.rules.items()))
+
+        if key is not None:
+            with self._lock:
+                self._cache[key] = rendered
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return rendered
+
+    def render_html(self, block, data, style_attr, css):
+        """HTML блока; атрибуты стилей элементов выводятся через ``css.attrs``"""
+        raise NotImplementedError
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+
+
+def clear_render_caches():
+    for renderer in (*_renderers.values(), _unknown_renderer):
+        renderer.clear_cache()
+
+
+@register_renderer
+class HeadingRenderer(BlockRenderer):
+    block_type = "heading"
+
+    def render_html(self, block, data, style_attr, css):
+        level = data.get("level", "h1")
+        content = data.get("content", "Заголовок")
+        styles = f"text-align: {data.get('align', 'left')};"
+        font_family = data.get("font_family", "")
+        if font_family:
+            styles += f" font-family: {font_family};"
+        return f'<{level}{css.attrs(styles, style_attr)}>{content}</{level}>'
+
+
+@register_renderer
+class TextRenderer(BlockRenderer):
+    block_type = "text"
+
+    def render_html(self, block, data, style_attr, css):
+        content = data.get("content", "Текст блока")
+        styles = f"font-size: {data.get('size', '16px')}; text-align: {data.get('align', 'left')};"
+        font_family = data.get("font_family", "")
+        if font_family:
+            styles += f" font-family: {font_family};"
+        return f'<p{css.attrs(styles, style_attr)}>{content}</p>'
+
+
+@register_renderer
+class ImageRenderer(BlockRenderer):
+    block_type = "image"
+
+    def render_html(self, block, data, style_attr, css):
+        # Приоритет: загруженное изображение > URL из данных
+        image_url = block.image.url if block.image else data.get("url", "")
+        if not image_url:
+            return f'<div{css.attrs(PLACEHOLDER_STYLE, style_attr)}>🖼️ Изображение</div>'
+
+        # Размеры управляются контейнером блока через CSS, object-fit вписывает картинку
+        styles = f"object-fit: {data.get('fit', 'contain')}; width: 100%; height: 100%; display: block;"
+        class_name, style = css.values(styles, style_attr)
+        name = block.image.name if block.image else media_name(image_url)
+        return picture_html(
+            image_url, block.image_variants.get(name), sizes=image_sizes(data),
+            alt=data.get("alt", "Изображение"), style=style, **{'class': class_name},
+        )
+
+
+@register_renderer
+class VideoRenderer(BlockRenderer):
+    block_type = "video"
+
+    def render_html(self, block, data, style_attr, css):
+        url = data.get("url", "")
+        if not url:
+            return f'<div{css.attrs(PLACEHOLDER_STYLE, style_attr)}>🎥 Видео</div>'
+
+        width = css_size(data.get("width", "100%"))
+        height = css_size(data.get("height", "400px"))
+        autoplay_attr = "autoplay" if data.get("autoplay", False) else ""
+        # Видео не загружается, пока посетитель не нажмёт «воспроизвести»; до этого виден постер
+        poster = data.get("poster", "")
+        poster_attr = f' poster="{poster}"' if poster else ""
+        return (
+            f'<video src="{url}" width="{width}" height="{height}" controls preload="none"{poster_attr} '
+            f'{autoplay_attr}{css.attrs("", style_attr)}></video>'
+        )
+
+
+@register_renderer
+class ButtonRenderer(BlockRenderer):
+    block_type = "button"
+
+    def render_html(self, block, data, style_attr, css):
+        text = data.get("text", "Кнопка")
+        link = data.get("link", "#")
+        align = data.get("align", "left")
+        bg_color = data.get("bg_color", "")
+        border_radius = data.get("border_radius", "8px")
+
+        # Если задан кастомный цвет, используем его
+        if bg_color:
+            btn_style = f"background: {bg_color}; color: {data.get('text_color', '') or 'white'};"
+        else:
+            btn_style = BUTTON_STYLES.get(data.get("style", "primary"), BUTTON_STYLES["primary"])
+        size_style = BUTTON_SIZE_STYLES.get(data.get("size", "medium"), BUTTON_SIZE_STYLES["medium"])
+
+        link_attrs = css.attrs(f"{btn_style} {size_style} border-radius: {border_radius}; {BUTTON_LINK_STYLE}")
+        return (
+            f'<div{css.attrs(f"text-align: {align};", style_attr)}><a href="{link}"{link_attrs}>{text}</a></div>'
+        )
+
+
+@register_renderer
+class SliderRenderer(BlockRenderer):
+    block_type = "slider"
+
+    def render_html(self, block, data, style_attr, css):
+        images = data.get("images", [])
+        size_style = f"width: {css_size(data.get('width', '100%'))}; height: {css_size(data.get('height', 'auto'))};"
+
+        if not images:
+            return f'<div{css.attrs(f"{SLIDER_PLACEHOLDER_STYLE} {size_style}", style_attr)}>🎠 Слайдер (добавьте изображения)</div>'
+
+        # Слайдер с навигацией и индикаторами
+        slider_id = f"slider-{block.id}"
+        sizes = image_sizes(data)
+        slide_class, slide_style = css.values("width: 100%; height: auto; display: block;")
+        # Сразу загружаются только текущий и следующий слайды, остальные — скриптом
+        # страницы, когда до них дойдёт очередь
+        slides = "".join(
+            f'<div class="slide" data-slide-index="{idx}">'
+            + picture_html(
+                img, block.image_variants.get(media_name(img)), sizes=sizes, lazy=idx > 0, deferred=idx > 1,
+                style=slide_style, alt=f"Slide {idx + 1}", **{'class': slide_class},
+            )
+            + '</div>'
+            for idx, img in enumerate(images)
+        )
+        indicators = "".join(
+            f'<span class="slider-indicator" data-slide="{idx}" onclick="goToSlide(\'{slider_id}\', {idx})"></span>'
+            for idx in range(len(images))
+        )
+        nav_buttons = f"""
+                <button class="slider-btn slider-prev" onclick="changeSlide(\'{slider_id}\', -1)">‹</button>
+                <button class="slider-btn slider-next" onclick="changeSlide(\'{slider_id}\', 1)">›</button>
+            """
+        autoplay = str(data.get("autoplay", True)).lower()
+        interval = data.get("interval", 3000)
+        size_class, style = css.values(size_style, style_attr)
+        container_class = f"slider-container {size_class}" if size_class else "slider-container"
+        style_html = f' style="{style}"' if style else ""
+
+        return f"""
+                <div class="{container_class}" id="{slider_id}" data-autoplay="{autoplay}" data-interval="{interval}"{style_html}>
+                    <div class="slider">
+                        {slides}
+                    </div>
+                    <div class="slider-indicators">
+                        {indicators}
+                    </div>
+                    {nav_buttons}
+                </div>
+            """
+
+
+@register_renderer
+class SectionRenderer(BlockRenderer):
+    block_type = "section"
+
+    def render_html(self, block, data, style_attr, css):
+        columns = data.get("columns", 1)
+        grid_attrs = css.attrs(f"display: grid; grid-template-columns: repeat({columns}, 1fr); gap: 1rem;", style_attr)
+        return f'<div{grid_attrs}>{data.get("content", "")}</div>'
+
+
+class UnknownBlockRenderer(BlockRenderer):
+    def render_html(self, block, data, style_attr, css):
+        return f'<div{css.attrs("", style_attr)}>Неизвестный тип блока: {block.block_type}</div>'
+
+
+_unknown_renderer = UnknownBlockRenderer()
@@ -0,0 +1,76 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import jobs, media, page_cache
+from .models import Block, Website
+
+
+def _content_changed(website_id):
+    page_cache.bump_version(website_id)
+    # Внешний кэш и статический экспорт обновляются фоновыми задачами; пока
+    # задача ждёт в очереди, повторные изменения сайта её не дублируют
+    if getattr(settings, 'PAGE_PURGE_HOOKS', ()):
+        jobs.enqueue('pages.purge', key=f'purge:{website_id}', website_id=website_id)
+    if getattr(settings, 'STATIC_EXPORT_ON_SAVE', False):
+        jobs.enqueue('pages.export', key=f'export:{website_id}', website_id=website_id)
+
+
+def website_content_changed(website_id):
+    """Вызывается при любом изменении сайта или его блоков.
+
+    Кэш сбрасывается после коммита транзакции, чтобы параллельный запрос не
+    закэшировал старое состояние под новой версией. Массовые операции
+    (``bulk_create``, ``bulk_update``, ``QuerySet.update``) не отправляют
+    сигналы моделей и должны вызывать эту функцию сами.
+    """
+    transaction.on_commit(lambda: _content_changed(website_id))
+
+
+@receiver(post_save, sender=Website)
+@receiver(post_delete, sender=Website)
+def invalidate_website_page(sender, instance, **kwargs):
+    """Сбросить закэшированную страницу при изменении настроек сайта"""
+    website_content_changed(instance.pk)
+
+
+@receiver(post_save, sender=Block)
+@receiver(post_delete, sender=Block)
+def invalidate_block_page(sender, instance, **kwargs):
+    """Сбросить закэшированную страницу при изменении блока"""
+    website_content_changed(instance.website_id)
+
+
+@receiver(post_delete, sender=Block)
+def touch_website_on_block_delete(sender, instance, origin=None, **kwargs):
+    """Сдвинуть ``Website.updated_at`` при удалении блока.
+
+    Время изменения оставшихся блоков от удаления не меняется, и без этого
+    ``Last-Modified`` страницы остался бы прежним: запрос только с
+    ``If-Modified-Since`` получил бы 304 на устаревшую страницу.
+    """
+    if isinstance(origin, Website):
+        # Блоки удаляются вместе с сайтом
+        return
+    Website.objects.filter(pk=instance.website_id).update(updated_at=timezone.now())
+
+
+@receiver(pre_save, sender=Website)
+@receiver(pre_save, sender=Block)
+def remember_media(sender, instance, **kwargs):
+    """Запомнить файлы объекта до сохранения, если они не были загружены из БД"""
+    instance.remember_media()
+
+
+@receiver(post_save, sender=Website)
+@receiver(post_save, sender=Block)
+def count_media_references(sender, instance, **kwargs):
+    media.sync_references([instance])
+
+
+@receiver(post_delete, sender=Website)
+@receiver(post_delete, sender=Block)
+def release_media_references(sender, instance, **kwargs):
+    media.release_references([instance])
@@ -6,6 +6,32 @@ let draggedBlockElement = null;
 let isMovingBlock = false;
 let isResizingBlock = false;
 
+// Последние известные данные блоков (с учётом ещё не сохранённых правок): { blockId: data }
+const blockDataCache = {};
+// Несохранённые изменения блоков: blockId -> { поле: значение, data_patch: {...} }
+const pendingBlockChanges = new Map();
+// Таймеры отложенной отправки и запросы в пути — по блоку
+const saveTimers = new Map();
+const inFlightSaves = new Map();
+const saveRetryAttempts = new Map();
+const SAVE_DEBOUNCE_DELAY = 300; // мс
+const SAVE_RETRY_BASE_DELAY = 1000; // мс
+const SAVE_RETRY_MAX_DELAY = 30000; // мс
+// Версии блоков, на которых основаны данные в blockDataCache: { blockId: version }
+const blockVersions = {};
+
+// Канал совместного редактирования (WebSocket); пока его нет, сохраняем через HTTP
+let collabSocket = null;
+let collabConnected = false;
+let collabReconnectAttempts = 0;
+let collabRef = 0;
+const collabReplies = new Map(); // ref -> функция, получающая ответ
+const collabStyles = new Set();
+const COLLAB_REPLY_TIMEOUT = 10000; // мс
+const COLLAB_RECONNECT_BASE_DELAY = 1000; // мс
+const COLLAB_RECONNECT_MAX_DELAY = 30000; // мс
+let unloading = false;
+
 // === ИНИЦИАЛИЗАЦИЯ ===
 document.addEventListener('DOMContentLoaded', function () {
     console.log('✓ Инициализация редактора');
@@ -33,98 +59,93 @@ document.addEventListener('DOMContentLoaded', function () {
     
     // Инициализация слайдеров в редакторе
     initEditorSliders();
+
+    // Подключаемся к каналу: изменения других редакторов сайта приходят диффами
+    connectCollab();
+
+    // Отправляем накопленные изменения при уходе со страницы
+    window.addEventListener('beforeunload', () => {
+        unloading = true;
+        flushBlockChanges();
+    });
 });
 
 // === ЗАГРУЗКА ПОЗИЦИЙ БЛОКОВ ===
+// Данные и версии блоков приходят вместе со страницей (#blocks-state), дальше
+// их обновляют ответы на сохранения и диффы из канала редактора
 function loadBlockPositions() {
+    const stateElement = document.getElementById('blocks-state');
+    const state = stateElement ? JSON.parse(stateElement.textContent) : {};
     const blocks = document.querySelectorAll('.block-item');
     console.log('📍 Загружаем позиции для', blocks.length, 'блоков');
 
     blocks.forEach((item, index) => {
         const blockId = item.dataset.blockId;
+        const block = state[blockId];
+        if (!block) {
+            applyDefaultPosition(item, index);
+            return;
+        }
+        blockDataCache[blockId] = block.data || {};
+        blockVersions[blockId] = block.version;
+        applyBlockLayout(item, blockDataCache[blockId], index);
+    });
+}
 
-        // Получаем сохраненные данные
-        fetch(`/api/blocks/${blockId}/`, {
-            method: 'GET',
-            headers: { 'X-CSRFToken': getCookie('csrftoken') }
-        })
-            .then(response => response.json())
-            .then(data => {
-                if (!data.success) {
-                    console.warn('❌ Ошибка получения блока:', blockId, data.error);
-                    // Позиция по умолчанию при ошибке
-                    applyDefaultPosition(item, index);
-                    return;
-                }
-
-                const blockData = data.block?.data || {};
-
-                console.log('📦 Данные блока:', blockId, blockData);
-
-                // Если позиция сохранена, применяем её
-                if (blockData.position_x !== undefined && blockData.position_x !== null) {
-                    item.style.left = blockData.position_x + 'px';
-                } else {
-                    item.style.left = (index * 30) + 'px';
-                }
+// Положение, размер и режимы вписывания блока из его данных
+function applyBlockLayout(item, blockData, index = 0) {
+    // Если позиция сохранена, применяем её
+    if (blockData.position_x !== undefined && blockData.position_x !== null) {
+        item.style.left = blockData.position_x + 'px';
+    } else {
+        item.style.left = (index * 30) + 'px';
+    }
 
-                if (blockData.position_y !== undefined && blockData.position_y !== null) {
-                    item.style.top = blockData.position_y + 'px';
-                } else {
-                    item.style.top = (index * 30) + 'px';
-                }
+    if (blockData.position_y !== undefined && blockData.position_y !== null) {
+        item.style.top = blockData.position_y + 'px';
+    } else {
+        item.style.top = (index * 30) + 'px';
+    }
 
-                // Применяем размер если есть (поддерживаем числа и строки)
-                if (blockData.width !== undefined && blockData.width !== null) {
-                    item.style.width = (typeof blockData.width === 'number') ? blockData.width + 'px' : blockData.width;
-                } else {
-                    item.style.width = '300px';
-                }
+    // Применяем размер если есть (поддерживаем числа и строки)
+    if (blockData.width !== undefined && blockData.width !== null) {
+        item.style.width = (typeof blockData.width === 'number') ? blockData.width + 'px' : blockData.width;
+    } else {
+        item.style.width = '300px';
+    }
 
-                if (blockData.height !== undefined && blockData.height !== null) {
-                    item.style.height = (typeof blockData.height === 'number') ? blockData.height + 'px' : blockData.height;
-                } else {
-                    item.style.height = '200px';
-                }
+    if (blockData.height !== undefined && blockData.height !== null) {
+        item.style.height = (typeof blockData.height === 'number') ? blockData.height + 'px' : blockData.height;
+    } else {
+        item.style.height = '200px';
+    }
 
-                // Устанавливаем dataset proportional, если задан
-                if (blockData.proportional !== undefined) {
-                    item.dataset.proportional = blockData.proportional ? 'true' : 'false';
-                } else {
-                    // по умолчанию для изображений/видео - сохранять пропорции
-                    if (item.dataset.blockType === 'image' || item.dataset.blockType === 'video') {
-                        item.dataset.proportional = 'true';
-                    } else {
-                        item.dataset.proportional = 'false';
-                    }
-                }
-                // Устанавливаем режим object-fit, если задан
-                if (blockData.fit) {
-                    item.dataset.fit = blockData.fit;
-                } else {
-                    // По умолчанию для изображений - contain
-                    if (item.dataset.blockType === 'image' || item.dataset.blockType === 'video') {
-                        item.dataset.fit = 'contain';
-                    }
-                }
-                // Подгоняем внутренние медиа-элементы под новый размер
-                try { 
-                    adjustInnerForMedia(item); 
-                } catch (e) { 
-                    console.warn('adjustInnerForMedia load error', e); 
-                }
-                console.log('✓ Позиция загружена для блока', blockId, {
-                    left: item.style.left,
-                    top: item.style.top,
-                    width: item.style.width,
-                    height: item.style.height
-                });
-            })
-            .catch(error => {
-                console.warn('⚠️ Ошибка загрузки позиции блока:', blockId, error);
-                applyDefaultPosition(item, index);
-            });
-    });
+    // Устанавливаем dataset proportional, если задан
+    if (blockData.proportional !== undefined) {
+        item.dataset.proportional = blockData.proportional ? 'true' : 'false';
+    } else {
+        // по умолчанию для изображений/видео - сохранять пропорции
+        if (item.dataset.blockType === 'image' || item.dataset.blockType === 'video') {
+            item.dataset.proportional = 'true';
+        } else {
+            item.dataset.proportional = 'false';
+        }
+    }
+    // Устанавливаем режим object-fit, если задан
+    if (blockData.fit) {
+        item.dataset.fit = blockData.fit;
+    } else {
+        // По умолчанию для изображений - contain
+        if (item.dataset.blockType === 'image' || item.dataset.blockType === 'video') {
+            item.dataset.fit = 'contain';
+        }
+    }
+    // Подгоняем внутренние медиа-элементы под новый размер
+    try { 
+        adjustInnerForMedia(item); 
+    } catch (e) { 
+        console.warn('adjustInnerForMedia load error', e); 
+    }
 }
 
 function applyDefaultPosition(item, index) {
@@ -278,54 +299,406 @@ function setupModalHandlers() {
 }
 
 // === СОХРАНЕНИЕ ПОЗИЦИИ БЛОКА ===
-async function saveBlockPosition(blockElement) {
+function saveBlockPosition(blockElement) {
     const blockId = blockElement.dataset.blockId;
 
+    // Вычисляем размеры числовыми значениями (px -> numbers)
+    const newWidth = Math.round(blockElement.offsetWidth);
+    const newHeight = Math.round(blockElement.offsetHeight);
+
+    // Сохраняем флаг proportional если присутствует в dataset
+    const proportional = blockElement.dataset.proportional === 'true';
+    // Сохраняем режим fit если есть
+    const fit = blockElement.dataset.fit || null;
+
+    const newData = {
+        position_x: Math.round(blockElement.offsetLeft),
+        position_y: Math.round(blockElement.offsetTop),
+        width: newWidth,
+        height: newHeight,
+        proportional: proportional,
+        fit: fit
+    };
+
+    console.log('💾 Сохраняем позицию:', {
+        blockId: blockId,
+        left: newData.position_x,
+        top: newData.position_y,
+        width: newData.width,
+        height: newData.height
+    });
+
+    updateBlockData(blockId, newData, false);
+}
+
+// === ОЧЕРЕДЬ ИЗМЕНЕНИЙ БЛОКОВ ===
+// Перетаскивания, ресайзы и правки свойств копятся по блокам: последующие
+// изменения сливаются с ещё не отправленными, а блок уходит на
+// /api/websites/<id>/blocks/batch/ через SAVE_DEBOUNCE_DELAY после последней
+// правки. По каждому блоку в пути не больше одного запроса; при сетевой
+// ошибке или ответе 5xx изменения возвращаются в очередь и отправляются
+// повторно с экспоненциальной задержкой. data отправляется не целиком, а
+// только изменившимися ключами (data_patch, JSON Merge Patch). Изменение
+// несёт версию блока, на которой оно основано: если блок успели изменить в
+// другом окне, сервер его отклонит (см. handleConflict). Пока открыт канал
+// редактора, изменения уходят по нему, иначе — на batch-эндпоинт.
+function mergeBlockChanges(older, newer) {
+    const merged = { ...older, ...newer };
+    if (older.data_patch || newer.data_patch) {
+        merged.data_patch = { ...(older.data_patch || {}), ...(newer.data_patch || {}) };
+    }
+    return merged;
+}
+
+function queueBlockUpdate(blockId, fields) {
+    blockId = String(blockId);
+    const pending = pendingBlockChanges.get(blockId) || {};
+    pendingBlockChanges.set(blockId, mergeBlockChanges(pending, fields));
+    scheduleBlockSave(blockId, SAVE_DEBOUNCE_DELAY);
+}
+
+function scheduleBlockSave(blockId, delay) {
+    clearTimeout(saveTimers.get(blockId));
+    saveTimers.set(blockId, setTimeout(() => {
+        saveTimers.delete(blockId);
+        sendBlockChanges([blockId]);
+    }, delay));
+}
+
+function cancelBlockChanges(blockId) {
+    blockId = String(blockId);
+    clearTimeout(saveTimers.get(blockId));
+    saveTimers.delete(blockId);
+    saveRetryAttempts.delete(blockId);
+    pendingBlockChanges.delete(blockId);
+}
+
+// Отправить накопленные изменения указанных блоков одним запросом.
+// Блоки, по которым запрос ещё в пути, отправятся после его завершения.
+async function sendBlockChanges(blockIds) {
+    const ids = blockIds.filter(id => pendingBlockChanges.has(id) && !inFlightSaves.has(id));
+    if (ids.length === 0) return true;
+
+    const sent = new Map();
+    ids.forEach(id => {
+        clearTimeout(saveTimers.get(id));
+        saveTimers.delete(id);
+        sent.set(id, pendingBlockChanges.get(id));
+        pendingBlockChanges.delete(id);
+    });
+    const operations = Array.from(sent, ([id, fields]) => ({
+        op: 'update', id: parseInt(id), version: blockVersions[id], ...fields
+    }));
+
+    const request = postBlockChanges(operations);
+    ids.forEach(id => inFlightSaves.set(id, request));
+    const outcome = await request;
+    ids.forEach(id => inFlightSaves.delete(id));
+
+    if (outcome === 'retry') {
+        sent.forEach((fields, id) => {
+            // Правки, сделанные за время запроса, новее отправленных
+            pendingBlockChanges.set(id, mergeBlockChanges(fields, pendingBlockChanges.get(id) || {}));
+            const attempt = (saveRetryAttempts.get(id) || 0) + 1;
+            saveRetryAttempts.set(id, attempt);
+            const delay = Math.min(SAVE_RETRY_MAX_DELAY, SAVE_RETRY_BASE_DELAY * 2 ** (attempt - 1));
+            scheduleBlockSave(id, delay + Math.random() * delay * 0.2);
+        });
+        return false;
+    }
+
+    ids.forEach(id => {
+        saveRetryAttempts.delete(id);
+        // Пока запрос был в пути, по блоку могли накопиться новые изменения
+        if (pendingBlockChanges.has(id) && !saveTimers.has(id)) {
+            scheduleBlockSave(id, SAVE_DEBOUNCE_DELAY);
+        }
+    });
+    return outcome === 'ok';
+}
+
+// 'ok', 'failed' (сервер отклонил изменения) или 'retry' (стоит повторить)
+async function postBlockChanges(operations) {
+    // При уходе со страницы — только HTTP: keepalive-запрос переживёт выгрузку
+    if (collabSocket && !unloading) {
+        return postBlockChangesToCollab(operations);
+    }
+    const body = JSON.stringify({ operations: operations });
     try {
-        const response = await fetch(`/api/blocks/${blockId}/`, {
-            method: 'GET',
-            headers: { 'X-CSRFToken': getCookie('csrftoken') }
+        const response = await fetch(`/api/websites/${websiteId}/blocks/batch/`, {
+            method: 'POST',
+            // keepalive даёт запросу завершиться после ухода со страницы, но ограничен 64 КБ
+            keepalive: body.length < 60000,
+            headers: {
+                'Content-Type': 'application/json',
+                'X-CSRFToken': getCookie('csrftoken')
+            },
+            body: body
         });
+        if (response.status >= 500 || response.status === 429) {
+            console.warn('⚠️ Сервер временно недоступен, повторим сохранение:', response.status);
+            return 'retry';
+        }
 
         const result = await response.json();
         if (!result.success) {
-            console.error('Ошибка при получении блока:', result.error);
+            console.error('Ошибка сохранения изменений:', result.error);
+            return 'failed';
+        }
+        result.results.forEach((item, index) => {
+            if (item.success && item.block) {
+                blockVersions[item.block.id] = item.block.version;
+                // Не затираем правки, которые ещё ждут отправки
+                if (!pendingBlockChanges.has(String(item.block.id))) {
+                    blockDataCache[item.block.id] = item.block.data;
+                }
+            } else if (item.conflict) {
+                handleConflict(item.block, item.html, item.css);
+            } else if (!item.success) {
+                console.warn('❌ Операция не применена:', operations[index], item.error);
+            }
+        });
+        console.log('✓ Сохранено изменений блоков:', operations.length);
+        return 'ok';
+    } catch (error) {
+        console.warn('⚠️ Ошибка сети при сохранении, повторим:', error);
+        return 'retry';
+    }
+}
+
+// Отправить всё накопленное сразу и дождаться запросов в пути
+async function flushBlockChanges() {
+    const inFlight = Array.from(new Set(inFlightSaves.values()));
+    const saved = await sendBlockChanges(Array.from(pendingBlockChanges.keys()));
+    const outcomes = await Promise.all(inFlight);
+    if (!saved || outcomes.some(outcome => outcome !== 'ok')) return false;
+    // Изменения, ожидавшие завершения запросов в пути
+    if (pendingBlockChanges.size > 0) {
+        return sendBlockChanges(Array.from(pendingBlockChanges.keys()));
+    }
+    return true;
+}
+
+// === КАНАЛ СОВМЕСТНОГО РЕДАКТИРОВАНИЯ ===
+// WebSocket /ws/websites/<id>/ (base/websocket.py, протокол — base/collab.py).
+// По нему уходят изменения блоков и приходят диффы других редакторов сайта,
+// поэтому перезапрашивать блоки не нужно. Канал есть только под ASGI; без
+// него редактор сохраняет через HTTP, а конфликты ловит batch-эндпоинт.
+function connectCollab() {
+    if (!websiteId || !('WebSocket' in window)) return;
+
+    const scheme = location.protocol === 'https:' ? 'wss' : 'ws';
+    const socket = new WebSocket(`${scheme}://${location.host}/ws/websites/${websiteId}/`);
+
+    socket.addEventListener('open', () => {
+        collabSocket = socket;
+        collabConnected = true;
+        collabReconnectAttempts = 0;
+        console.log('✓ Канал редактора подключён');
+        // Диффы, разосланные до подключения, могли пройти мимо
+        syncCollabState();
+    });
+    socket.addEventListener('message', (event) => {
+        let message;
+        try {
+            message = JSON.parse(event.data);
+        } catch (e) {
+            return;
+        }
+        (Array.isArray(message) ? message : [message]).forEach(handleCollabMessage);
+    });
+    socket.addEventListener('close', (event) => {
+        if (collabSocket === socket) collabSocket = null;
+        collabReplies.forEach(deliver => deliver(null));
+        if (unloading || event.code === 4403 || event.code === 4404) return;
+        // Сервер без канала (WSGI, runserver): после нескольких попыток перестаём пробовать
+        const attempt = ++collabReconnectAttempts;
+        if (!collabConnected && attempt > 3) {
+            console.log('Канал редактора недоступен, изменения сохраняются через HTTP');
             return;
         }
+        const delay = Math.min(COLLAB_RECONNECT_MAX_DELAY, COLLAB_RECONNECT_BASE_DELAY * 2 ** (attempt - 1));
+        setTimeout(connectCollab, delay + Math.random() * delay * 0.2);
+    });
+}
 
-        const currentData = result.block.data || {};
-
-        // Вычисляем размеры числовыми значениями (px -> numbers)
-        const newWidth = Math.round(blockElement.offsetWidth);
-        const newHeight = Math.round(blockElement.offsetHeight);
-
-        // Сохраняем флаг proportional если присутствует в dataset
-        const proportional = blockElement.dataset.proportional === 'true';
-        // Сохраняем режим fit если есть
-        const fit = blockElement.dataset.fit || null;
-
-        const newData = {
-            ...currentData,
-            position_x: Math.round(blockElement.offsetLeft),
-            position_y: Math.round(blockElement.offsetTop),
-            width: newWidth,
-            height: newHeight,
-            proportional: proportional
-            , fit: fit
-        };
+// Отправить операции одним сообщением; промис с ответами по порядку (null — ответа нет)
+function collabRequest(ops) {
+    const socket = collabSocket;
+    if (!socket) return Promise.resolve(ops.map(() => null));
+    const replies = ops.map(op => new Promise(resolve => {
+        const ref = ++collabRef;
+        op.ref = ref;
+        const timer = setTimeout(() => deliver(null), COLLAB_REPLY_TIMEOUT);
+        function deliver(reply) {
+            clearTimeout(timer);
+            collabReplies.delete(ref);
+            resolve(reply);
+        }
+        collabReplies.set(ref, deliver);
+    }));
+    socket.send(JSON.stringify(ops));
+    return Promise.all(replies);
+}
 
-        console.log('💾 Сохраняем позицию:', {
-            blockId: blockId,
-            left: newData.position_x,
-            top: newData.position_y,
-            width: newData.width,
-            height: newData.height
+async function postBlockChangesToCollab(operations) {
+    // Компактные операции канала: v — версия, data — merge patch
+    const ops = operations.map(({ op, id, version, data_patch, ...fields }) => ({
+        op: 'u', id: id, v: version, ...fields, ...(data_patch ? { data: data_patch } : {})
+    }));
+    const replies = await collabRequest(ops);
+    let outcome = 'ok';
+    replies.forEach((reply, index) => {
+        if (!reply) {
+            outcome = 'retry';
+        } else if (reply.op === 'ack') {
+            blockVersions[reply.id] = reply.v;
+        } else if (reply.op === 'conflict') {
+            handleConflict(reply.block, reply.html, reply.css);
+        } else {
+            console.warn('❌ Операция не применена:', operations[index], reply.error);
+        }
+    });
+    if (outcome === 'ok') {
+        console.log('✓ Сохранено изменений блоков:', operations.length);
+    } else {
+        console.warn('⚠️ Канал не ответил, повторим сохранение');
+    }
+    return outcome;
+}
+
+function handleCollabMessage(message) {
+    if (message.ref !== undefined && collabReplies.has(message.ref)) {
+        collabReplies.get(message.ref)(message);
+        return;
+    }
+    if (message.op === 'u') {
+        applyRemoteDiff(message);
+    } else if (message.op === 'b') {
+        applyRemoteBlock(message.block, message.html, message.css);
+    } else if (message.op === 'd') {
+        removeRemoteBlock(message.id);
+    } else if (message.op === 'c') {
+        showEditorNotice('В другом окне добавили блок.', 'Обновить страницу');
+    } else if (message.op === 'error') {
+        console.warn('Канал редактора:', message.error);
+    }
+}
+
+// Сверить версии всех блоков страницы с сервером и забрать изменившиеся
+async function syncCollabState() {
+    const [reply] = await collabRequest([{ op: 'sync', versions: blockVersions }]);
+    if (!reply || reply.op !== 'sync') return;
+    reply.blocks.forEach(item => applyRemoteBlock(item.block, item.html, item.css));
+    reply.deleted.forEach(removeRemoteBlock);
+    if (reply.created.length > 0) {
+        showEditorNotice('В другом окне добавили блоки.', 'Обновить страницу');
+    }
+}
+
+function mergePatch(target, patch) {
+    if (patch === null || typeof patch !== 'object' || Array.isArray(patch)) return patch;
+    const result = (target && typeof target === 'object' && !Array.isArray(target)) ? { ...target } : {};
+    Object.keys(patch).forEach(key => {
+        if (patch[key] === null) {
+            delete result[key];
+        } else {
+            result[key] = mergePatch(result[key], patch[key]);
+        }
+    });
+    return result;
+}
+
+// Дифф другого редактора: применяем, если он идёт сразу за известной версией
+function applyRemoteDiff(diff) {
+    const blockId = String(diff.id);
+    const known = blockVersions[blockId];
+    if (known === undefined || diff.v <= known) return;
+    if (diff.v !== known + 1) {
+        // Пропустили изменения — берём состояние блока целиком
+        collabRequest([{ op: 'get', id: diff.id }]).then(([reply]) => {
+            if (reply && reply.op === 'b') applyRemoteBlock(reply.block, reply.html, reply.css);
         });
+        return;
+    }
+    blockVersions[blockId] = diff.v;
+    // Свои ещё не отправленные правки остаются поверх чужих
+    const pendingPatch = pendingBlockChanges.get(blockId)?.data_patch || {};
+    blockDataCache[blockId] = mergePatch(mergePatch(blockDataCache[blockId] || {}, diff.data || {}), pendingPatch);
+    refreshBlockElement(blockId, diff.html, diff.css);
+}
 
-        await updateBlockData(blockId, newData, false);
-    } catch (error) {
-        console.error('Ошибка сохранения позиции:', error);
+function applyRemoteBlock(block, html, css) {
+    if (!block) return;
+    const blockId = String(block.id);
+    const pendingPatch = pendingBlockChanges.get(blockId)?.data_patch || {};
+    blockVersions[blockId] = block.version;
+    blockDataCache[blockId] = mergePatch(block.data || {}, pendingPatch);
+    refreshBlockElement(blockId, html, css);
+}
+
+function refreshBlockElement(blockId, html, css) {
+    const item = document.querySelector(`.block-item[data-block-id="${blockId}"]`);
+    if (!item) return;
+    // Блок, который сейчас двигают или чьи правки ещё не сохранены, не трогаем
+    const busy = item.classList.contains('dragging') || item.querySelector('.block-resize-handle.resizing')
+        || pendingBlockChanges.has(blockId) || inFlightSaves.has(blockId);
+    if (!busy) applyBlockLayout(item, blockDataCache[blockId]);
+
+    if (html === undefined) return;
+    if (css && !collabStyles.has(css)) {
+        collabStyles.add(css);
+        const style = document.createElement('style');
+        style.textContent = css;
+        document.head.appendChild(style);
+    }
+    const content = item.querySelector('.block-content');
+    if (content) content.innerHTML = html;
+    if (item.dataset.blockType === 'slider') initEditorSliders();
+    try { adjustInnerForMedia(item); } catch (e) { }
+}
+
+function removeRemoteBlock(blockId) {
+    blockId = String(blockId);
+    cancelBlockChanges(blockId);
+    delete blockDataCache[blockId];
+    delete blockVersions[blockId];
+    const item = document.querySelector(`.block-item[data-block-id="${blockId}"]`);
+    if (item) item.remove();
+}
+
+// Сервер отклонил изменение: блок успели изменить в другом окне
+function handleConflict(block, html, css) {
+    if (!block) return;
+    cancelBlockChanges(block.id);
+    applyRemoteBlock(block, html, css);
+    showEditorNotice('Блок изменили в другом окне: показана актуальная версия, ваша правка не сохранена.');
+}
+
+function showEditorNotice(text, actionLabel) {
+    let notice = document.getElementById('editor-notice');
+    if (!notice) {
+        notice = document.createElement('div');
+        notice.id = 'editor-notice';
+        notice.style.cssText = 'position: fixed; right: 1rem; bottom: 1rem; z-index: 2000; max-width: 360px; '
+            + 'padding: 0.75rem 1rem; border-radius: 8px; background: #1f2937; color: #fff; '
+            + 'box-shadow: 0 4px 12px rgba(0, 0, 0, 0.2); font-size: 14px;';
+        document.body.appendChild(notice);
+    }
+    notice.textContent = text + ' ';
+    if (actionLabel) {
+        const action = document.createElement('a');
+        action.href = '#';
+        action.textContent = actionLabel;
+        action.style.color = '#c4b5fd';
+        action.addEventListener('click', (e) => {
+            e.preventDefault();
+            flushBlockChanges().then(() => location.reload());
+        });
+        notice.appendChild(action);
     }
+    clearTimeout(notice.hideTimer);
+    notice.hideTimer = setTimeout(() => notice.remove(), 8000);
 }
 
 // === СОЗДАНИЕ БЛОКА ===
@@ -361,6 +734,7 @@ async function createBlock(blockType, posX = 0, posY = 0) {
         const result = await response.json();
         if (result.success) {
             // Перезагрузим страницу, чтобы блок отрисовался
+            await flushBlockChanges();
             location.reload();
         } else {
             console.error('Ошибка создания блока:', result.error);
@@ -544,13 +918,9 @@ function openEditModal(blockId, blockType) {
 
     if (!modal || !modalBody) return;
 
-    fetch(`/api/blocks/${blockId}/`, {
-        method: 'GET',
-        headers: { 'X-CSRFToken': getCookie('csrftoken') }
-    })
-        .then(response => response.json())
-        .then(data => {
-            const blockData = data.block?.data || {};
+    // Данные блока уже есть: они пришли со страницей и обновляются по каналу редактора
+    Promise.resolve(blockDataCache[blockId] || {})
+        .then(blockData => {
 
             let html = '';
 
@@ -724,6 +1094,7 @@ function openEditModal(blockId, blockType) {
             `;
             } else if (blockType === 'video') {
                 const url = blockData.url || '';
+                const poster = blockData.poster || '';
                 const fit = blockData.fit || 'contain';
 
                 html = `
@@ -733,6 +1104,10 @@ function openEditModal(blockId, blockType) {
                         <label class="form-label">URL видео</label>
                         <input type="text" id="field-url" class="form-input" value="${url}">
                     </div>
+                    <div class="form-group">
+                        <label class="form-label">Постер (URL картинки до запуска видео)</label>
+                        <input type="text" id="field-poster" class="form-input" value="${poster}">
+                    </div>
                     <div class="form-group">
                         <label class="form-label">Режим заполнения (object-fit)</label>
                         <select id="field-fit" class="form-input">
@@ -837,22 +1212,27 @@ function openEditModal(blockId, blockType) {
                             for (const file of files) {
                                 try {
                                     console.log('Загрузка файла:', file.name);
-                                    const formData = new FormData();
-                                    formData.append('image', file);
-                                    
-                                    const response = await fetch(`/api/blocks/${blockId}/upload-slider-image/`, {
-                                        method: 'POST',
-                                        headers: {
-                                            'X-CSRFToken': getCookie('csrftoken')
-                                        },
-                                        body: formData
-                                    });
-                                    
-                                    if (!response.ok) {
-                                        throw new Error(`HTTP error! status: ${response.status}`);
+                                    let result;
+                                    if (file.size > CHUNKED_UPLOAD_THRESHOLD) {
+                                        result = await uploadFileInChunks(blockId, file, 'slider');
+                                    } else {
+                                        const formData = new FormData();
+                                        formData.append('image', file);
+                                        
+                                        const response = await fetch(`/api/blocks/${blockId}/upload-slider-image/`, {
+                                            method: 'POST',
+                                            headers: {
+                                                'X-CSRFToken': getCookie('csrftoken')
+                                            },
+                                            body: formData
+                                        });
+                                        
+                                        if (!response.ok && response.status !== 400) {
+                                            throw new Error(`HTTP error! status: ${response.status}`);
+                                        }
+                                        
+                                        result = await response.json();
                                     }
-                                    
-                                    const result = await response.json();
                                     console.log('Результат загрузки:', result);
                                     
                                     if (result.success && result.image_url) {
@@ -922,17 +1302,22 @@ async function saveEditedBlock(blockId, blockType) {
         
         // Если загружен файл, загружаем его
         if (fileInput && fileInput.files.length > 0) {
-            const formData = new FormData();
-            formData.append('image', fileInput.files[0]);
+            const file = fileInput.files[0];
 
             try {
-                const response = await fetch(`/api/blocks/${blockId}/upload-image/`, {
-                    method: 'POST',
-                    headers: { 'X-CSRFToken': getCookie('csrftoken') },
-                    body: formData
-                });
-
-                const result = await response.json();
+                let result;
+                if (file.size > CHUNKED_UPLOAD_THRESHOLD) {
+                    result = await uploadFileInChunks(blockId, file, 'image');
+                } else {
+                    const formData = new FormData();
+                    formData.append('image', file);
+                    const response = await fetch(`/api/blocks/${blockId}/upload-image/`, {
+                        method: 'POST',
+                        headers: { 'X-CSRFToken': getCookie('csrftoken') },
+                        body: formData
+                    });
+                    result = await response.json();
+                }
                 if (result.success) {
                     // При загрузке файла очищаем URL из данных, т.к. приоритет у загруженного файла
                     newData.url = '';
@@ -959,6 +1344,7 @@ async function saveEditedBlock(blockId, blockType) {
         newData.link = document.getElementById('field-link')?.value || '#';
     } else if (blockType === 'video') {
         newData.url = document.getElementById('field-url')?.value || '';
+        newData.poster = document.getElementById('field-poster')?.value || '';
         // Сохраняем режим object-fit для видео
         const fitFieldVideo = document.getElementById('field-fit');
         if (fitFieldVideo) newData.fit = fitFieldVideo.value || 'contain';
@@ -999,29 +1385,29 @@ async function saveEditedBlock(blockId, blockType) {
 }
 
 // === ОБНОВЛЕНИЕ ДАННЫХ БЛОКА ===
+// newData дополняет последние известные данные блока; изменение ставится в
+// очередь, а при reload = true очередь отправляется сразу и страница перезагружается
 async function updateBlockData(blockId, newData, reload = true) {
-    try {
-        const response = await fetch(`/api/blocks/${blockId}/update/`, {
-            method: 'PATCH',
-            headers: {
-                'Content-Type': 'application/json',
-                'X-CSRFToken': getCookie('csrftoken')
-            },
-            body: JSON.stringify({ data: newData })
-        });
-
-        const result = await response.json();
-        if (result.success) {
-            if (reload) {
-                location.reload();
-            }
-            console.log('✓ Данные блока обновлены');
-        } else {
-            alert('Ошибка: ' + result.error);
+    // Отправляем только ключи, значения которых изменились; остальное сервер сохранит
+    const known = blockDataCache[blockId] || {};
+    const patch = {};
+    Object.keys(newData).forEach(key => {
+        if (JSON.stringify(known[key]) !== JSON.stringify(newData[key])) {
+            patch[key] = newData[key];
         }
-    } catch (error) {
-        console.error('Ошибка обновления:', error);
-        alert('Ошибка обновления блока: ' + error.message);
+    });
+    blockDataCache[blockId] = { ...known, ...newData };
+    if (Object.keys(patch).length > 0) {
+        queueBlockUpdate(blockId, { data_patch: patch });
+    }
+
+    if (!reload) return;
+
+    const saved = await flushBlockChanges();
+    if (saved) {
+        location.reload();
+    } else {
+        alert('Ошибка обновления блока');
     }
 }
 
@@ -1101,6 +1487,7 @@ function removeSizeBadge(blockItem) {
 async function deleteBlock(blockId) {
     if (!confirm('Удалить этот блок?')) return;
 
+    cancelBlockChanges(blockId);
     try {
         const response = await fetch(`/api/blocks/${blockId}/delete/`, {
             method: 'DELETE',
@@ -1129,13 +1516,7 @@ async function toggleProportional(blockId, checked) {
     }
 
     try {
-        // Получаем текущие данные и обновляем флаг
-        const resp = await fetch(`/api/blocks/${blockId}/`, { method: 'GET', headers: { 'X-CSRFToken': getCookie('csrftoken') } });
-        const result = await resp.json();
-        if (!result.success) return;
-        const currentData = result.block.data || {};
-        const newData = { ...currentData, proportional: !!checked };
-        await updateBlockData(blockId, newData, false);
+        await updateBlockData(blockId, { proportional: !!checked }, false);
         // Подогнать медиа-элементы немедленно
         if (blockElement) { try { adjustInnerForMedia(blockElement); } catch (e) { } }
     } catch (err) {
@@ -1158,6 +1539,57 @@ function getCookie(name) {
     return cookieValue;
 }
 
+// === ЗАГРУЗКА БОЛЬШИХ ФАЙЛОВ ЧАСТЯМИ ===
+// Файлы больше порога отправляются частями; при обрыве соединения
+// загрузка продолжается с последнего подтверждённого сервером байта
+const CHUNKED_UPLOAD_THRESHOLD = 4 * 1024 * 1024;
+const CHUNK_UPLOAD_RETRIES = 3;
+
+async function uploadFileInChunks(blockId, file, target) {
+    const startResponse = await fetch(`/api/blocks/${blockId}/uploads/`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json', 'X-CSRFToken': getCookie('csrftoken') },
+        body: JSON.stringify({ filename: file.name, content_type: file.type, size: file.size, target: target })
+    });
+    const upload = await startResponse.json();
+    if (!upload.success) return upload;
+
+    let offset = upload.offset;
+    let failures = 0;
+    while (offset < file.size) {
+        const end = Math.min(offset + upload.chunk_size, file.size);
+        try {
+            const response = await fetch(`/api/uploads/${upload.upload_id}/`, {
+                method: 'PUT',
+                headers: {
+                    'Content-Range': `bytes ${offset}-${end - 1}/${file.size}`,
+                    'X-CSRFToken': getCookie('csrftoken')
+                },
+                body: file.slice(offset, end)
+            });
+            const result = await response.json();
+            if (response.ok || response.status === 409) {
+                // 409: сервер уже получил другую часть — продолжаем с его смещения
+                offset = result.offset;
+                failures = 0;
+                continue;
+            }
+            return result;
+        } catch (error) {
+            if (++failures > CHUNK_UPLOAD_RETRIES) throw error;
+            await new Promise(resolve => setTimeout(resolve, 500 * 2 ** failures));
+            const status = await fetch(`/api/uploads/${upload.upload_id}/`).then(r => r.json());
+            offset = status.offset;
+        }
+    }
+
+    const completeResponse = await fetch(`/api/uploads/${upload.upload_id}/complete/`, {
+        method: 'POST',
+        headers: { 'X-CSRFToken': getCookie('csrftoken') }
+    });
+    return completeResponse.json();
+}
+
 // === ФУНКЦИИ ДЛЯ РАБОТЫ С ИЗОБРАЖЕНИЯМИ СЛАЙДЕРА ===
 // Делаем функции глобальными для доступа через onclick
 window.addSliderImageToList = function(imageUrl) {
@@ -1294,6 +1726,10 @@ window.goToSlide = function(sliderId, index) {
         indicators[index].classList.add('active');
     }
 
+    // Слайды дальше следующего рендерятся с data-src — загружаем по мере показа
+    loadSlide(slides[index]);
+    loadSlide(slides[(index + 1) % slides.length]);
+
     // Сбрасываем автопрокрутку
     if (container.sliderInterval) {
         clearInterval(container.sliderInterval);
@@ -1301,6 +1737,20 @@ window.goToSlide = function(sliderId, index) {
     }
 };
 
+function loadSlide(slide) {
+    if (!slide) return;
+    slide.querySelectorAll('[data-srcset], [data-src]').forEach(el => {
+        if (el.dataset.srcset) {
+            el.srcset = el.dataset.srcset;
+            el.removeAttribute('data-srcset');
+        }
+        if (el.dataset.src) {
+            el.src = el.dataset.src;
+            el.removeAttribute('data-src');
+        }
+    });
+}
+
 function startSlider(container) {
     if (!container) return;
     
@@ -58,6 +58,10 @@ window.goToSlide = function(sliderId, index) {
         indicators[index].classList.add('active');
     }
 
+    // Загружаем показанный слайд и следующий за ним заранее
+    loadSlide(slides[index]);
+    loadSlide(slides[(index + 1) % slides.length]);
+
     // Сбрасываем автопрокрутку
     if (container.sliderInterval) {
         clearInterval(container.sliderInterval);
@@ -65,6 +69,42 @@ window.goToSlide = function(sliderId, index) {
     }
 };
 
+// Слайды дальше следующего рендерятся с data-src/data-srcset и ничего не
+// загружают, пока до них не дойдёт очередь
+function loadSlide(slide) {
+    if (!slide) return;
+    slide.querySelectorAll('[data-srcset], [data-src]').forEach(el => {
+        if (el.dataset.srcset) {
+            el.srcset = el.dataset.srcset;
+            el.removeAttribute('data-srcset');
+        }
+        if (el.dataset.src) {
+            el.src = el.dataset.src;
+            el.removeAttribute('data-src');
+        }
+    });
+}
+
+function stopSlider(container) {
+    if (container.sliderInterval) {
+        clearInterval(container.sliderInterval);
+        container.sliderInterval = null;
+    }
+}
+
+// Автопрокрутка работает только у слайдеров в области видимости
+const sliderObserver = 'IntersectionObserver' in window
+    ? new IntersectionObserver(entries => {
+        entries.forEach(entry => {
+            if (entry.isIntersecting) {
+                startSlider(entry.target);
+            } else {
+                stopSlider(entry.target);
+            }
+        });
+    }, { rootMargin: '100px' })
+    : null;
+
 function startSlider(container) {
     if (!container) return;
     
@@ -101,6 +141,9 @@ function startSlider(container) {
 // Инициализация всех слайдеров
 function initSliders() {
     document.querySelectorAll('.slider-container').forEach(container => {
+        if (container.dataset.sliderReady) return;
+        container.dataset.sliderReady = 'true';
+
         const slides = container.querySelectorAll('.slide');
         if (slides.length > 0) {
             // Активируем первый слайд
@@ -113,25 +156,19 @@ function initSliders() {
                 indicators[0].classList.add('active');
             }
 
-            // Запускаем автопрокрутку
-            startSlider(container);
+            // Автопрокрутка запустится, когда слайдер появится на экране
+            if (sliderObserver) {
+                sliderObserver.observe(container);
+            } else {
+                startSlider(container);
+            }
         }
     });
 }
 
-document.addEventListener('DOMContentLoaded', function () {
-    initSliders();
-    
-    // Применяем адаптивное поведение для .site-canvas
-    applyResponsiveBehavior();
-    
-    // Обновляем при изменении размера окна (с дебаунсом)
-    let resizeTimer = null;
-    window.addEventListener('resize', function () {
-        clearTimeout(resizeTimer);
-        resizeTimer = setTimeout(applyResponsiveBehavior, 150);
-    });
-});
+// Раскладка блоков (абсолютная на десктопе, колонка на мобильных) задаётся
+// CSS из base/layout.py и от скрипта не зависит
+document.addEventListener('DOMContentLoaded', initSliders);
 
 // Также инициализируем слайдеры, если DOM уже загружен
 if (document.readyState === 'loading') {
@@ -140,89 +177,3 @@ if (document.readyState === 'loading') {
     // DOM уже загружен
     initSliders();
 }
-
-function applyResponsiveBehavior() {
-    const canvas = document.querySelector('.site-canvas');
-    if (!canvas) return;
-
-    const breakpoint = 768; // px
-    const width = window.innerWidth || document.documentElement.clientWidth;
-
-    if (width <= breakpoint) {
-        const mode = canvas.dataset.responsive || 'stack';
-        if (mode === 'scale') {
-            makeScale(canvas);
-        } else {
-            makeStack(canvas);
-        }
-    } else {
-        restoreDesktop(canvas);
-    }
-}
-
-function makeStack(canvas) {
-    canvas.classList.add('stacked');
-    canvas.classList.remove('scaled');
-
-    const blocks = Array.from(canvas.querySelectorAll('.block-item'));
-    blocks.forEach(b => {
-        // Сбрасываем абсолютное позиционирование и даём блоку потоковое положение
-        b.style.position = 'relative';
-        b.style.left = '';
-        b.style.top = '';
-        // Ширина 100% для удобства на мобильных
-        b.style.width = '100%';
-        b.style.height = 'auto';
-        b.style.boxSizing = 'border-box';
-    });
-    // Сбросим трансформации, если были
-    canvas.style.transform = '';
-    canvas.style.width = '';
-}
-
-function makeScale(canvas) {
-    canvas.classList.remove('stacked');
-    canvas.classList.add('scaled');
-
-    const blocks = Array.from(canvas.querySelectorAll('.block-item'));
-    if (blocks.length === 0) return;
-
-    // Рассчитываем габаритную ширину по сохранённым позициям/размерам
-    let minLeft = Infinity, maxRight = -Infinity;
-    blocks.forEach(b => {
-        const rect = b.getBoundingClientRect();
-        // Попытка читать inline left/top/width/height при необходимости
-        const left = parseFloat(b.style.left) || b.offsetLeft || 0;
-        const w = parseFloat(b.style.width) || b.offsetWidth || rect.width;
-        minLeft = Math.min(minLeft, left);
-        maxRight = Math.max(maxRight, left + w);
-    });
-
-    if (!isFinite(minLeft) || !isFinite(maxRight)) return;
-
-    const boundingWidth = Math.max(1, maxRight - minLeft);
-    const containerWidth = canvas.parentElement ? canvas.parentElement.clientWidth : window.innerWidth;
-    const scale = Math.min(1, containerWidth / boundingWidth);
-
-    // Устанавливаем ширину canvas в исходных пикселях, затем масштабируем
-    canvas.style.width = boundingWidth + 'px';
-    canvas.style.transformOrigin = 'top left';
-    canvas.style.transform = `scale(${scale})`;
-}
-
-function restoreDesktop(canvas) {
-    canvas.classList.remove('stacked');
-    canvas.classList.remove('scaled');
-    const blocks = Array.from(canvas.querySelectorAll('.block-item'));
-    blocks.forEach(b => {
-        // Восстанавливаем абсолютное поведение — inline-стили, установленные шаблоном, должны присутствовать
-        b.style.position = 'absolute';
-        // не трогаем left/top/width/height тут — это вернёт значения из inline стилей шаблона
-        b.style.boxSizing = '';
-        b.style.width = b.getAttribute('data-original-width') || b.style.width;
-        b.style.height = b.getAttribute('data-original-height') || b.style.height;
-    });
-    canvas.style.transform = '';
-    canvas.style.width = '';
-}
-
@@ -0,0 +1,83 @@
+"""Хранилище статики для продакшена.
+
+При ``collectstatic`` файлы CSS и JS минифицируются, затем получают хеш
+содержимого в имени (``view_website.3f2a1c9e8b7d.css``) и сжатые копии
+``.gz``/``.br``. Имена с хешем меняются при каждом изменении файла, поэтому их
+можно кэшировать навсегда (``Cache-Control: immutable``); WhiteNoise и nginx
+отдают готовые сжатые варианты без сжатия на лету.
+
+Отдельного шага склейки нет: каждый шаблон подключает один свой файл CSS и
+не больше одного своего файла JS, так что эти файлы и есть бандлы страниц, и
+страница загружает только свои байты. Новые страницы должны следовать тому же
+правилу (его проверяет ``StaticBundleTests``).
+
+Небольшие файлы, которые нужны для первого экрана (критический CSS страниц),
+встраиваются в HTML через ``read_static``.
+"""
+import os
+from functools import lru_cache
+
+import rcssmin
+import rjsmin
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.files.base import ContentFile
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+MINIFIERS = {
+    '.css': rcssmin.cssmin,
+    '.js': rjsmin.jsmin,
+}
+
+
+class MinifiedManifestStaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """``CompressedManifestStaticFilesStorage`` с минификацией CSS и JS"""
+
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run and getattr(settings, 'STATIC_MINIFY', True):
+            paths = self._minify(paths)
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+
+    def _minify(self, paths):
+        """Записать минифицированные копии в STATIC_ROOT и хешировать уже их"""
+        minified = dict(paths)
+        for path, (storage, source_path) in paths.items():
+            base, extension = os.path.splitext(path)
+            minifier = MINIFIERS.get(extension)
+            if minifier is None or base.endswith('.min'):
+                continue
+            with storage.open(source_path) as f:
+                content = f.read().decode('utf-8')
+            if self.exists(path):
+                self.delete(path)
+            self._save(path, ContentFile(minifier(content).encode('utf-8')))
+            minified[path] = (self, path)
+        return minified
+
+
+def _read_static(name):
+    # После collectstatic минифицированная копия лежит в STATIC_ROOT под
+    # именем с хешем (копии без хеша WhiteNoise удаляет); в режиме отладки
+    # и до collectstatic читаем исходник приложения
+    if not settings.DEBUG and hasattr(staticfiles_storage, 'stored_name'):
+        try:
+            with staticfiles_storage.open(staticfiles_storage.stored_name(name)) as f:
+                return f.read().decode('utf-8')
+        except (ValueError, FileNotFoundError):
+            pass
+    path = finders.find(name)
+    if not path:
+        return ''
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+
+_read_static_cached = lru_cache(maxsize=None)(_read_static)
+
+
+def read_static(name):
+    """Содержимое файла статики для встраивания в страницу; в отладке без кэша"""
+    if settings.DEBUG:
+        return _read_static(name)
+    return _read_static_cached(name)
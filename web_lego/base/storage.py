@@ -0,0 +1,72 @@
+"""Хранилище загруженных файлов с адресацией по содержимому.
+
+Файл сохраняется под именем ``files/<hh>/<sha256><ext>``, где ``<sha256>`` —
+хеш его содержимого. Из имени, переданного в ``save`` (и из ``upload_to``
+полей), берётся только расширение, поэтому поля с этим хранилищем его не задают. Повторная загрузка того же файла (в тот же или другой
+сайт) не создаёт копию, а возвращает имя уже сохранённого файла, поэтому
+одинаковые изображения занимают место на диске один раз и имеют один URL.
+
+Исключение — адаптивные варианты изображений (``base/images.py``) в
+``variants/``: их имена уже выведены из хеша исходного файла и сохраняются
+как есть, чтобы оригиналы и варианты лежали в одном хранилище.
+
+Какие файлы ещё используются, учитывает ``base/media.py``.
+"""
+import hashlib
+import os
+import re
+import uuid
+
+from django.core.files.storage import FileSystemStorage, storages
+
+CONTENT_PREFIX = 'files'
+VARIANTS_PREFIX = 'variants'
+
+_CONTENT_NAME_RE = re.compile(r'^%s/[0-9a-f]{2}/([0-9a-f]{64})\.\w+$' % CONTENT_PREFIX)
+
+
+def media_storage():
+    """Хранилище загружаемых пользователями файлов (``STORAGES['media']``)"""
+    return storages['media']
+
+
+def content_name(digest, original_name):
+    extension = os.path.splitext(original_name)[1].lower()
+    return f'{CONTENT_PREFIX}/{digest[:2]}/{digest}{extension}'
+
+
+def content_digest(name):
+    """SHA-256 из имени файла, сохранённого по содержимому, иначе None"""
+    match = _CONTENT_NAME_RE.match(name or '')
+    return match.group(1) if match else None
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """``FileSystemStorage``, который именует файлы по хешу содержимого"""
+
+    def _save(self, name, content):
+        if not name.startswith(f'{VARIANTS_PREFIX}/'):
+            digest = hashlib.sha256()
+            if hasattr(content, 'seek'):
+                content.seek(0)
+            for chunk in content.chunks():
+                digest.update(chunk)
+            name = content_name(digest.hexdigest(), name)
+            if self.exists(name):
+                # Обновляем время изменения, чтобы сборщик мусора не удалил файл,
+                # который только что загрузили повторно и ещё не сохранили в блоке
+                os.utime(self.path(name))
+                return name
+
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        # Пишем во временный файл и атомарно переименовываем: параллельная
+        # загрузка того же содержимого просто перезапишет файл тем же самым
+        tmp_name = super()._save(f'{name}.{uuid.uuid4().hex}.tmp', content)
+        os.replace(self.path(tmp_name), self.path(name))
+        return name
+
+    def get_available_name(self, name, max_length=None):
+        # Итоговое имя определяется содержимым в _save, а вариант
+        # с тем же именем перезаписывается тем же содержимым
+        return name
@@ -0,0 +1,34 @@
+"""Фоновые задачи приложения (см. base/jobs.py)"""
+from django.apps import apps
+
+from . import http_cache
+from .export import export_website
+from .images import attach_variants
+from .jobs import register
+from .models import Website
+
+
+@register('images.variants')
+def image_variants(model, pk, field, name):
+    """Адаптивные варианты загруженного изображения"""
+    attach_variants(apps.get_model(model), pk, field, name)
+
+
+@register('pages.purge')
+def purge_page(website_id):
+    """Сброс страницы сайта во внешнем кэше"""
+    http_cache.purge(website_id)
+
+
+@register('pages.export')
+def export_page(website_id):
+    """Статический экспорт сайта"""
+    export_website(website_id)
+
+
+@register('websites.delete')
+def delete_website(website_id):
+    """Удаление сайта со всеми блоками; до этого сайт помечен ``is_deleting`` и скрыт"""
+    website = Website.objects.filter(id=website_id).first()
+    if website is not None:
+        website.delete()
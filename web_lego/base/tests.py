@@ -1,3 +1,1592 @@
-from django.test import TestCase
+import asyncio
+import http.server
+import importlib
+import io
+import json
+import os
+import re
+import runpy
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import timedelta
+from unittest import skipUnless
+from urllib.parse import urlencode
+from unittest.mock import patch
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser, User
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import caches
+from django.core.cache.backends.redis import RedisCache, RedisCacheClient, RedisSerializer
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.templatetags.static import static
+from django.http import Http404
+from django.test import AsyncRequestFactory, Client, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from django.utils import timezone
+from PIL import Image as PILImage
+
+from . import collab, export, fonts, http_cache, images, jobs, layout, media, page_cache, patches, renderers, views
+from .models import BLOCK_DEFAULTS, BLOCK_TYPES, ORDER_GAP, Block, MediaFile, Website, order_between
+from .renderers import clear_render_caches
+from .storage import content_digest, media_storage
+from .templatetags.block_tags import render_block
+from .websocket import websocket_application
+
+
+class CountingDefaults(dict):
+    """Значения по умолчанию, которые считают слияния в ``Block.get_data``"""
+    merges = 0
+
+    def get(self, *args):
+        self.merges += 1
+        return super().get(*args)
+
+
+class PageRenderTests(TestCase):
+    """Страница из 500 блоков: постоянное число запросов и одно слияние data на блок"""
+
+    def setUp(self):
+        owner = User.objects.create_user('owner', password='pw')
+        self.website = Website.objects.create(owner=owner, title='Сайт')
+        block_types = [block_type for block_type, _ in BLOCK_TYPES]
+        Block.objects.bulk_create(
+            Block(website=self.website, block_type=block_types[i % len(block_types)], order=i,
+                  data={'content': f'Блок {i}', 'font_family': 'Lato'})
+            for i in range(500)
+        )
+        caches['pages'].clear()
+        clear_render_caches()
+
+    def test_each_block_merged_once(self):
+        defaults = CountingDefaults(BLOCK_DEFAULTS)
+        with patch('base.models.BLOCK_DEFAULTS', defaults), self.assertNumQueries(3):
+            response = self.client.get(f'/view/{self.website.id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Блок 497')
+        self.assertEqual(defaults.merges, 500)
+
+
+class RendererRegistryTests(SimpleTestCase):
+    """Выбор рендерера по типу блока и LRU готового HTML"""
+
+    def setUp(self):
+        clear_render_caches()
+
+    updated_at = timezone.now()
+
+    def block(self, block_type='text', block_id=1, **data):
+        return Block(id=block_id, block_type=block_type, updated_at=self.updated_at, data=data)
+
+    def test_every_block_type_registered(self):
+        for block_type, _ in BLOCK_TYPES:
+            with self.subTest(block_type=block_type):
+                self.assertEqual(renderers.get_renderer(block_type).block_type, block_type)
+        self.assertIn('Неизвестный тип блока: map', render_block(self.block('map')))
+
+    def test_registered_subclass_is_used_by_filter(self):
+        @renderers.register_renderer
+        class MapRenderer(renderers.BlockRenderer):
+            block_type = 'map'
+
+            def render_html(self, block, data, style_attr, css):
+                return f'<div{css.attrs("height: 300px;", style_attr)}>{data["place"]}</div>'
+
+        self.addCleanup(renderers._renderers.pop, 'map')
+        html = render_block(self.block('map', place='Москва'))
+        self.assertRegex(html, rf'^<div class="{renderers.style_class("height: 300px;")}" style="[^"]*">Москва</div>$')
+
+    def test_cached_until_block_saved(self):
+        renderer = renderers.get_renderer('text')
+        block = self.block(content='a')
+        with patch.object(renderer, 'render_html', wraps=renderer.render_html) as render_html:
+            first = renderer.render(block)
+            self.assertIs(renderer.render(self.block(content='изменён без сохранения')), first)
+            self.assertEqual(render_html.call_count, 1)
+
+            block.updated_at += timedelta(seconds=1)
+            block.data = {'content': 'b'}
+            self.assertIn('>b</p>', renderer.render(block))
+            self.assertEqual(render_html.call_count, 2)
+
+    def test_least_recently_used_evicted(self):
+        renderer = renderers.TextRenderer()
+        blocks = [self.block(block_id=i, content=str(i)) for i in range(3)]
+        with override_settings(BLOCK_RENDER_CACHE_SIZE=2), \
+                patch.object(renderer, 'render_html', wraps=renderer.render_html) as render_html:
+            renderer.render(blocks[0])
+            renderer.render(blocks[1])
+            renderer.render(blocks[0])
+            renderer.render(blocks[2])
+            self.assertEqual(render_html.call_count, 3)
+            renderer.render(blocks[0])
+            self.assertEqual(render_html.call_count, 3)
+            renderer.render(blocks[1])
+            self.assertEqual(render_html.call_count, 4)
+
+    def test_unsaved_block_not_cached(self):
+        renderer = renderers.get_renderer('text')
+        with patch.object(renderer, 'render_html', return_value='<p></p>') as render_html:
+            renderer.render(self.block(block_id=None))
+            renderer.render(self.block(block_id=None))
+        self.assertEqual(render_html.call_count, 2)
+
+
+class HoistedStylesTests(SimpleTestCase):
+    """Общие стили блоков выносятся в классы, правила которых выводятся один раз"""
+
+    def setUp(self):
+        clear_render_caches()
+        self.addCleanup(clear_render_caches)
+
+    def buttons(self):
+        return [Block(id=i, block_type='button', updated_at=timezone.now(), padding='1rem' if i else '', margin='',
+                      data={'text': f'Кнопка {i}'}) for i in range(3)]
+
+    def test_shared_styles_become_classes(self):
+        blocks = self.buttons()
+        html = [render_block(block) for block in blocks]
+        link_class = re.search(r'<a href="#" class="(b-[0-9a-f]{8})">', html[0]).group(1)
+        self.assertTrue(all(f'class="{link_class}"' in block_html for block_html in html))
+        self.assertNotIn('linear-gradient', ''.join(html))
+        self.assertIn('style="padding: 1rem;"', html[1])
+
+        css = renderers.blocks_css(blocks)
+        self.assertEqual(css.count(f'.{link_class}{{'), 1)
+        self.assertIn('linear-gradient', css)
+
+    @override_settings(PAGE_HOIST_STYLES=False)
+    def test_inline_when_disabled(self):
+        html = render_block(self.buttons()[1])
+        self.assertNotIn('class="b-', html)
+        self.assertIn('style="text-align: left; padding: 1rem;"', html)
+        self.assertIn('linear-gradient', html)
+        self.assertEqual(renderers.blocks_css(self.buttons()), '')
+
+    def test_style_tag_cannot_be_closed(self):
+        block = Block(id=1, block_type='heading', updated_at=timezone.now(),
+                      data={'font_family': 'Arial</style><script>alert(1)</script>'})
+        css = renderers.blocks_css([block])
+        self.assertIn('font-family: Arial', css)
+        self.assertNotIn('<', css)
+
+
+class SliderMarkupTests(SimpleTestCase):
+    """Сразу загружаются только текущий и следующий слайды"""
+
+    def setUp(self):
+        clear_render_caches()
+        self.addCleanup(clear_render_caches)
+
+    def slides(self, variants=None):
+        urls = [f'{settings.MEDIA_URL}files/{i}.png' for i in range(4)]
+        block = Block(id=1, block_type='slider', updated_at=timezone.now(), data={'images': urls},
+                      image_variants=variants or {})
+        return re.findall(r'<div class="slide" data-slide-index="\d+">(.*?)</div>', render_block(block))
+
+    def test_first_slides_loaded_rest_deferred(self):
+        first, second, *rest = self.slides()
+        self.assertIn(f'src="{settings.MEDIA_URL}files/0.png"', first)
+        self.assertNotIn('loading="lazy"', first)
+        self.assertIn(' src=', second)
+        self.assertIn('loading="lazy"', second)
+        self.assertEqual(len(rest), 2)
+        for slide in rest:
+            self.assertIn('data-src=', slide)
+            self.assertNotIn(' src=', slide)
+
+    def test_deferred_variants(self):
+        manifest = {'hash': 'ab' * 32, 'width': 800, 'height': 600, 'widths': [320, 800], 'formats': ['webp', 'jpg']}
+        slides = self.slides({f'files/{i}.png': manifest for i in range(4)})
+        self.assertEqual(slides[1].count(' srcset='), 2)
+        self.assertEqual(slides[2].count('data-srcset='), 2)
+        self.assertNotIn(' srcset=', slides[2])
+
+
+class LayoutCssTests(SimpleTestCase):
+    def block(self, block_id, **data):
+        return Block(id=block_id, block_type='text', data=data)
+
+    def test_desktop_positions_and_canvas_height(self):
+        css = layout.layout_css([
+            self.block(3, position_x=True),
+            self.block(1, position_x=10, position_y=20.5, width=300, height=100),
+            self.block(2, position_x='40', position_y=900, width=200, height=150),
+        ])
+        desktop = f'@media (min-width:{layout.MOBILE_BREAKPOINT + 1}px){{'
+        self.assertTrue(css.startswith(desktop))
+        self.assertIn('.block-1{left:10px;top:20.5px;width:300px;height:100px;}', css)
+        self.assertIn('.block-2{left:40px;top:900px;width:200px;height:150px;}', css)
+        self.assertIn('.site-canvas{min-height:1050px}', css)
+        self.assertNotIn('.block-3', css)
+        self.assertNotIn('max-width', css)
+
+    def test_mobile_order_follows_reading_order(self):
+        blocks = [
+            self.block(1, position_x=400, position_y=0),
+            self.block(2, position_x=0, position_y=300),
+            self.block(3, position_x=0, position_y=0),
+        ]
+        css = layout.layout_css(blocks)
+        self.assertNotIn('.site-canvas', css)
+        mobile = css[css.index(f'@media (max-width:{layout.MOBILE_BREAKPOINT}px)'):]
+        self.assertIn('.block-3{order:0}.block-1{order:1}.block-2{order:2}', mobile)
+        self.assertEqual(layout.stack_order(blocks), [blocks[2], blocks[0], blocks[1]])
+
+
+class BlockDataTests(SimpleTestCase):
+    def test_changes_do_not_leak(self):
+        block = Block(block_type='slider', data={'interval': 500})
+        data = block.get_data()
+        data['autoplay'] = False
+        data['images'].append('/media/a.jpg')
+
+        self.assertEqual(block.get_data(), {**BLOCK_DEFAULTS['slider'], 'interval': 500})
+        self.assertEqual(Block(block_type='slider').get_data()['images'], [])
+        self.assertEqual(BLOCK_DEFAULTS['slider']['images'], [])
+
+    def test_reassigned_data_is_merged_again(self):
+        block = Block(block_type='text', data={'content': 'a'})
+        self.assertEqual(block.get_data()['content'], 'a')
+        block.data = {'content': 'b'}
+        self.assertEqual(block.get_data(), {**BLOCK_DEFAULTS['text'], 'content': 'b'})
+        block.block_type = 'section'
+        self.assertEqual(block.get_data(), {'content': 'b', 'columns': 1})
+
+
+class WebFontsTests(TestCase):
+    MANIFEST = {
+        'Roboto': [
+            {'weight': weight, 'subset': subset, 'file': fonts.font_file_name('Roboto', weight, subset),
+             'unicode_range': 'U+0000-00FF' if subset == 'latin' else 'U+0400-045F'}
+            for weight in (400, 700) for subset in ('latin', 'cyrillic')
+        ],
+    }
+
+    def setUp(self):
+        owner = User.objects.create_user('owner')
+        self.website = Website.objects.create(owner=owner, title='Сайт', font_family="'Open Sans', sans-serif")
+        for font_family in ('Roboto, sans-serif', 'Arial, sans-serif', "'Open Sans'", 'Roboto'):
+            Block.objects.create(website=self.website, block_type='text', data={'font_family': font_family})
+        Block.objects.create(website=self.website, block_type='text')
+        self.blocks = list(self.website.blocks.all())
+
+    def test_used_families_once_in_order(self):
+        self.assertEqual(fonts.used_families(self.website, self.blocks), ['Open Sans', 'Roboto'])
+
+    def test_local_faces_for_used_families(self):
+        with patch('base.fonts.load_manifest', return_value=self.MANIFEST):
+            html = fonts.font_links(['Roboto'])
+        self.assertEqual(html.count('rel="preload"'), 1)
+        self.assertIn(static(fonts.font_file_name('Roboto', 400, 'cyrillic')), html.split('<style>')[0])
+        self.assertEqual(html.count('@font-face'), 4)
+        self.assertIn('font-display:swap', html)
+        self.assertNotIn('googleapis', html)
+
+    def test_google_fonts_without_local_files(self):
+        with patch('base.fonts.load_manifest', return_value=self.MANIFEST):
+            html = fonts.font_links(['Open Sans', 'Roboto'])
+        self.assertIn('family=Open+Sans:wght@300;400;600;700&amp;display=swap', html)
+        self.assertNotIn('family=Roboto', html)
+        self.assertEqual(fonts.font_links([]), '')
+
+    def test_page_links_used_families_only(self):
+        caches['pages'].clear()
+        with patch('base.fonts.load_manifest', return_value={}):
+            html = self.client.get(f'/view/{self.website.id}/').content.decode()
+        self.assertEqual(html.count('fonts.googleapis.com/css2'), 1)
+        self.assertIn('family=Open+Sans:wght@300;400;600;700&amp;family=Roboto:wght@300;400;500;700', html)
+        self.assertNotIn('Montserrat', html)
+
+
+class BatchBlocksTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='pw')
+        self.client.force_login(self.owner)
+        self.website = Website.objects.create(owner=self.owner, title='Сайт')
+        self.first, self.second = Block.objects.bulk_create([
+            Block(website=self.website, block_type='text', order=1, data={'content': 'a'}),
+            Block(website=self.website, block_type='text', order=2, data={'content': 'b'}),
+        ])
+
+    def batch(self, operations):
+        response = self.client.post(
+            f'/api/websites/{self.website.id}/blocks/batch/',
+            json.dumps({'operations': operations}), content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()['results']
+
+    def test_update_writes_only_changed_fields_of_each_block(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.batch([
+                {'op': 'update', 'id': self.first.id, 'data_patch': {'content': 'c'}},
+                {'op': 'reorder', 'blocks': [{'id': self.second.id, 'order': 0}]},
+            ])
+        updates = [query['sql'] for query in queries.captured_queries if query['sql'].startswith('UPDATE "base_block"')]
+        self.assertEqual(len(updates), 2)
+        for sql in updates:
+            # Блок, у которого менялся только порядок, не перезаписывает data
+            self.assertFalse('"data"' in sql and f'= {self.second.id})' in sql, sql)
+        self.second.refresh_from_db()
+        self.assertEqual((self.second.order, self.second.data, self.second.version), (0, {'content': 'b'}, 2))
+
+    def test_stale_version_conflicts(self):
+        self.batch([{'op': 'update', 'id': self.first.id, 'version': 1, 'data_patch': {'content': 'c'}}])
+        result, = self.batch([{'op': 'update', 'id': self.first.id, 'version': 1, 'data_patch': {'content': 'd'}}])
+        self.assertTrue(result['conflict'])
+        self.assertEqual(result['block']['data']['content'], 'c')
+
+
+    def test_data_patch_merged_into_stored_data(self):
+        self.first.data = {'content': 'a', 'style': {'color': 'red', 'size': 12}, 'images': ['1', '2']}
+        self.first.save()
+        self.batch([{'op': 'update', 'id': self.first.id,
+                     'data_patch': {'content': None, 'style': {'size': 14}, 'images': ['3']}}])
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.data, {'style': {'color': 'red', 'size': 14}, 'images': ['3']})
+
+
+class UpdateBlockTests(TestCase):
+    """api_update_block пишет только изменённые поля со сравнением версии"""
+
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='pw')
+        self.client.force_login(self.owner)
+        self.website = Website.objects.create(owner=self.owner, title='Сайт')
+        self.block = Block.objects.create(website=self.website, block_type='text',
+                                          data={'content': 'a', 'position_x': 1, 'position_y': 2})
+        self.url = f'/api/blocks/{self.block.id}/update/'
+
+    def send(self, method, body):
+        return getattr(self.client, method)(self.url, json.dumps(body), content_type='application/json')
+
+    def block_updates(self, queries):
+        return [query['sql'] for query in queries.captured_queries if query['sql'].startswith('UPDATE "base_block"')]
+
+    def test_patch_merges_data_in_one_update(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.send('patch', {'data': {'position_x': 10, 'position_y': None}})
+        self.assertEqual(response.status_code, 200)
+        sql, = self.block_updates(queries)
+        columns = re.findall(r'(?:SET|,) "(\w+)" = ', sql.split(' WHERE ')[0])
+        self.assertEqual(sorted(columns), ['data', 'updated_at', 'version'])
+        self.assertTrue(sql.endswith('"base_block"."version" = 1)'), sql)
+        self.block.refresh_from_db()
+        self.assertEqual((self.block.data, self.block.version), ({'content': 'a', 'position_x': 10}, 2))
+
+    def test_put_replaces_data(self):
+        self.send('put', {'data': {'content': 'b'}, 'background_color': '#fff'})
+        self.block.refresh_from_db()
+        self.assertEqual((self.block.data, self.block.background_color), ({'content': 'b'}, '#fff'))
+
+    def test_unchanged_values_not_written(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.send('patch', {'data': {'content': 'a'}})
+        self.assertEqual((response.status_code, response.json()['block']['version']), (200, 1))
+        self.assertEqual(self.block_updates(queries), [])
+
+    def test_stale_version_conflicts(self):
+        self.send('patch', {'data': {'content': 'b'}, 'version': 1})
+        response = self.send('patch', {'data': {'content': 'c'}, 'version': 1})
+        self.assertEqual(response.status_code, 409)
+        self.assertTrue(response.json()['conflict'])
+        self.assertEqual(response.json()['block']['data']['content'], 'b')
+
+    def test_retried_on_top_of_concurrent_write(self):
+        stale = Block.objects.select_related('website').get(pk=self.block.pk)
+        Block.objects.filter(pk=self.block.pk).update(data={**stale.data, 'content': 'b'}, version=2)
+        with patch('base.views._get_own_block', return_value=stale):
+            response = self.send('patch', {'data': {'position_x': 10}})
+        self.assertEqual(response.status_code, 200)
+        self.block.refresh_from_db()
+        self.assertEqual(self.block.data, {'content': 'b', 'position_x': 10, 'position_y': 2})
+        self.assertEqual(self.block.version, 3)
+
+    def test_other_users_block_not_found(self):
+        self.client.force_login(User.objects.create_user('stranger'))
+        self.assertEqual(self.send('patch', {'data': {'content': 'b'}}).status_code, 404)
+
+
+class MergePatchTests(SimpleTestCase):
+    """JSON Merge Patch (RFC 7396), которым редактор отправляет изменения data"""
+
+    def test_merge_patch(self):
+        target = {'a': 1, 'b': {'c': 2, 'd': 3}, 'e': [1, 2]}
+        self.assertEqual(patches.merge_patch(target, {'a': None, 'b': {'c': 4}, 'e': [3], 'f': {'g': None}}),
+                         {'b': {'c': 4, 'd': 3}, 'e': [3], 'f': {}})
+        self.assertEqual(target, {'a': 1, 'b': {'c': 2, 'd': 3}, 'e': [1, 2]})
+        self.assertEqual(patches.merge_patch(target, [1]), [1])
+        self.assertEqual(patches.merge_patch('x', {'a': 1}), {'a': 1})
+
+    def test_make_patch_inverts_merge_patch(self):
+        source = {'a': 1, 'b': {'c': 2, 'd': 3}, 'e': [1, 2]}
+        target = {'b': {'c': 2, 'd': 4}, 'e': [1], 'f': 'new'}
+        patch = patches.make_patch(source, target)
+        self.assertEqual(patch, {'a': None, 'b': {'d': 4}, 'e': [1], 'f': 'new'})
+        self.assertEqual(patches.merge_patch(source, patch), target)
+        self.assertEqual(patches.make_patch(source, source), {})
+
+
+class AsyncViewsTests(TestCase):
+    """Асинхронные версии представлений отвечают так же, как синхронные"""
+
+    def setUp(self):
+        self.owner = User.objects.create_user('owner')
+        self.website = Website.objects.create(owner=self.owner, title='Сайт')
+        self.block = Block.objects.create(website=self.website, block_type='text', data={'content': 'Привет'})
+        self.factory = AsyncRequestFactory()
+        caches['pages'].clear()
+
+    def request(self, method, path, user=None, **kwargs):
+        request = getattr(self.factory, method)(path, **kwargs)
+        request.user = user or AnonymousUser()
+        return request
+
+    async def test_view_website(self):
+        path = f'/view/{self.website.id}/'
+        response = await views.view_website_async(self.request('get', path), self.website.id)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Привет', response.content.decode())
+
+        cached = self.request('get', path, headers={'If-None-Match': response['ETag']})
+        self.assertEqual((await views.view_website_async(cached, self.website.id)).status_code, 304)
+        with self.assertRaises(Http404):
+            await views.view_website_async(self.request('get', '/view/0/'), 0)
+
+    async def test_get_block(self):
+        path = f'/api/blocks/{self.block.id}/'
+        response = await views.api_get_block_async(self.request('get', path), self.block.id)
+        self.assertEqual(response.status_code, 302)
+
+        response = await views.api_get_block_async(self.request('get', path, self.owner), self.block.id)
+        self.assertEqual(json.loads(response.content)['block']['data']['content'], 'Привет')
+        response = await views.api_get_block_async(self.request('post', path, self.owner), self.block.id)
+        self.assertEqual(response.status_code, 405)
+
+        stranger = await User.objects.acreate(username='stranger')
+        with self.assertRaises(Http404):
+            await views.api_get_block_async(self.request('get', path, stranger), self.block.id)
+
+    async def test_update_block(self):
+        path = f'/api/blocks/{self.block.id}/update/'
+
+        def patch_request(body):
+            return self.request('patch', path, self.owner, data=json.dumps(body), content_type='application/json')
+
+        response = await views.api_update_block_async(patch_request({'data': {'content': 'Пока'}, 'version': 1}),
+                                                      self.block.id)
+        self.assertEqual((response.status_code, json.loads(response.content)['block']['version']), (200, 2))
+        response = await views.api_update_block_async(patch_request({'data': {'content': 'Снова'}, 'version': 1}),
+                                                      self.block.id)
+        self.assertEqual(response.status_code, 409)
+        block = await Block.objects.aget(pk=self.block.pk)
+        self.assertEqual(block.data, {'content': 'Пока'})
+
+    @override_settings(ASYNC_VIEWS=['view_website', 'api_get_block', 'api_update_block'])
+    def test_routes_use_async_views(self):
+        urlconf = importlib.reload(importlib.import_module('base.urls'))
+        self.addCleanup(importlib.reload, urlconf)
+        for path, view in ((f'/view/{self.website.id}/', views.view_website_async),
+                           (f'/api/blocks/{self.block.id}/', views.api_get_block_async),
+                           (f'/api/blocks/{self.block.id}/update/', views.api_update_block_async)):
+            match = resolve(path, urlconf)
+            self.assertIs(match.func, view)
+
+
+class ReorderBlocksTests(TestCase):
+    """Новый порядок блоков сайта — одним UPDATE с CASE, только для своих блоков"""
+
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='pw')
+        self.client.force_login(self.owner)
+        self.website = Website.objects.create(owner=self.owner, title='Сайт')
+        self.blocks = [Block.objects.create(website=self.website, block_type='text', order=i) for i in range(3)]
+        other = Website.objects.create(owner=User.objects.create_user('other', password='pw'), title='Чужой')
+        self.foreign = Block.objects.create(website=other, block_type='text', order=0)
+
+    def orders(self):
+        return list(Block.objects.filter(website=self.website).order_by('order').values_list('id', flat=True))
+
+    def test_single_update(self):
+        a, b, c = self.blocks
+        with CaptureQueriesContext(connection) as queries:
+            updated = self.website.blocks.reorder({c.id: 0, a.id: 1, b.id: 2})
+        self.assertEqual(updated, 3)
+        self.assertEqual(len([query for query in queries if query['sql'].startswith('UPDATE')]), 1)
+        self.assertEqual(self.orders(), [c.id, a.id, b.id])
+
+    def test_rejects_foreign_and_invalid_ids(self):
+        a, b, c = self.blocks
+        for orders in ({a.id: 2, self.foreign.id: 0}, {a.id: '1'}, {str(a.id): 1}):
+            with self.subTest(orders=orders), self.assertRaises(ValueError):
+                self.website.blocks.reorder(orders)
+        self.assertEqual(self.orders(), [a.id, b.id, c.id])
+        self.assertEqual(Block.objects.get(id=self.foreign.id).order, 0)
+
+    def test_api(self):
+        a, b, c = self.blocks
+        url = f'/api/websites/{self.website.id}/blocks/reorder/'
+        response = self.client.post(url, json.dumps({'blocks': [{'id': b.id, 'order': 0}, {'id': a.id, 'order': 5}]}),
+                                    content_type='application/json')
+        self.assertTrue(response.json()['success'])
+        self.assertEqual(self.orders(), [b.id, c.id, a.id])
+
+        response = self.client.post(url, json.dumps({'blocks': [{'id': self.foreign.id, 'order': 9}]}),
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Block.objects.get(id=self.foreign.id).order, 0)
+
+
+class GapOrderingTests(TestCase):
+    """Порядок блоков с зазорами: вставка и перенос меняют одну строку"""
+
+    def setUp(self):
+        owner = User.objects.create_user('owner', password='pw')
+        self.client.force_login(owner)
+        self.website = Website.objects.create(owner=owner, title='Сайт')
+
+    def create(self, order):
+        return Block.objects.create(website=self.website, block_type='text', order=order)
+
+    def orders(self):
+        return list(self.website.blocks.order_by('order').values_list('id', 'order'))
+
+    def test_order_between(self):
+        self.assertEqual(order_between(None, None), 0)
+        self.assertEqual(order_between(None, 0), -ORDER_GAP)
+        self.assertEqual(order_between(ORDER_GAP, None), 2 * ORDER_GAP)
+        self.assertEqual(order_between(0, ORDER_GAP), ORDER_GAP // 2)
+        self.assertEqual(order_between(4, 6), 5)
+        self.assertIsNone(order_between(4, 5))
+
+    def test_new_blocks_appended_with_gap(self):
+        self.assertEqual(self.website.blocks.next_order(), 0)
+        for _ in range(2):
+            response = self.client.post(f'/api/websites/{self.website.id}/blocks/',
+                                        json.dumps({'block_type': 'text'}), content_type='application/json')
+            self.assertTrue(response.json()['success'], response.content)
+        self.assertEqual([order for _, order in self.orders()], [0, ORDER_GAP])
+
+    def test_move_updates_only_moved_block(self):
+        a, b, c = (self.create(i * ORDER_GAP) for i in range(3))
+        with CaptureQueriesContext(connection) as queries:
+            c.move_after(a)
+        self.assertEqual(len([query for query in queries if query['sql'].startswith('UPDATE')]), 1)
+        self.assertEqual(self.orders(), [(a.id, 0), (c.id, ORDER_GAP // 2), (b.id, ORDER_GAP)])
+
+        b.move_after(None)
+        self.assertEqual([block_id for block_id, _ in self.orders()], [b.id, a.id, c.id])
+
+    def test_exhausted_gap_rebalances(self):
+        a, b, c = self.create(0), self.create(1), self.create(2)
+        self.assertTrue(self.website.blocks.needs_rebalance())
+
+        response = self.client.post(f'/api/blocks/{c.id}/move/', json.dumps({'after_id': a.id}),
+                                    content_type='application/json')
+        self.assertTrue(response.json()['success'], response.content)
+        self.assertEqual([block_id for block_id, _ in self.orders()], [a.id, c.id, b.id])
+        self.assertFalse(self.website.blocks.needs_rebalance())
+
+    def test_rebalance_keeps_order(self):
+        blocks = [self.create(order) for order in (7, 8, -3, 8)]
+        self.website.blocks.rebalance()
+        expected = [blocks[2].id, blocks[0].id, blocks[1].id, blocks[3].id]
+        self.assertEqual(self.orders(), [(block_id, i * ORDER_GAP) for i, block_id in enumerate(expected)])
+
+
+class DatabaseSettingsTests(SimpleTestCase):
+    """Постоянные соединения с PostgreSQL и режим PgBouncer задаются окружением"""
+
+    def database(self, **environ):
+        environ = {'POSTGRES_DB': 'web_lego', **environ}
+        with patch.dict(os.environ, environ):
+            for name in ('POSTGRES_CONN_MAX_AGE', 'POSTGRES_POOL', 'POSTGRES_CONN_HEALTH_CHECKS'):
+                if name not in environ:
+                    os.environ.pop(name, None)
+            return runpy.run_path(os.path.join(settings.BASE_DIR, 'web_lego', 'settings.py'))['DATABASES']['default']
+
+    def test_persistent_connections(self):
+        database = self.database()
+        self.assertEqual((database['CONN_MAX_AGE'], database['CONN_HEALTH_CHECKS']), (60, True))
+        self.assertEqual((database['HOST'], database['PORT']), ('db', '5432'))
+        self.assertIsNone(self.database(POSTGRES_CONN_MAX_AGE='')['CONN_MAX_AGE'])
+        self.assertEqual(self.database(POSTGRES_CONN_MAX_AGE='0')['CONN_MAX_AGE'], 0)
+        self.assertNotIn('DISABLE_SERVER_SIDE_CURSORS', self.database())
+
+    def test_pgbouncer(self):
+        database = self.database(POSTGRES_POOL='pgbouncer')
+        self.assertEqual((database['HOST'], database['PORT']), ('pgbouncer', '6432'))
+        self.assertTrue(database['DISABLE_SERVER_SIDE_CURSORS'])
+
+
+class LoadTestCommandTests(SimpleTestCase):
+    def setUp(self):
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                self.send_response(200)
+                self.send_header('Content-Length', '2')
+                self.end_headers()
+                self.wfile.write(b'ok')
+
+            def log_message(self, *args):
+                pass
+
+        server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.url = f'http://127.0.0.1:{server.server_port}/'
+
+    def test_reports_each_target_and_level(self):
+        out = io.StringIO()
+        call_command('loadtest', f'page={self.url}', '--requests=20', '--warmup=2', '--concurrency=1,4', stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 3)
+        for line, concurrency in zip(lines[1:], (1, 4)):
+            name, clients, rps, p50, p99, errors = line.split()
+            self.assertEqual((name, int(clients), int(errors)), ('page', concurrency, 0))
+            self.assertGreater(float(rps), 0)
+            self.assertLessEqual(float(p50), float(p99))
+
+    def test_fails_when_every_request_fails(self):
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            url = f'http://127.0.0.1:{sock.getsockname()[1]}/'
+        with self.assertRaises(CommandError):
+            call_command('loadtest', url, '--requests=3', '--warmup=0', '--concurrency=1', '--timeout=1',
+                         stdout=io.StringIO())
+
+
+class BlockAdminTests(TestCase):
+    def setUp(self):
+        admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.client.force_login(admin_user)
+        self.website = Website.objects.create(owner=admin_user, title='Сайт')
+        Block.objects.create(website=self.website, block_type='text')
+
+    def changelist_sql(self, query=''):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/admin/base/block/{query}')
+        self.assertEqual(response.status_code, 200)
+        return [query['sql'] for query in queries.captured_queries if 'FROM "base_block"' in query['sql']]
+
+    def test_date_filter_keeps_ordering(self):
+        since = timezone.now() - timedelta(days=7)
+        sql = self.changelist_sql('?' + urlencode({'created_at__gte': since.isoformat()}))[-1]
+        self.assertIn('ORDER BY "base_block"."website_id" ASC, "base_block"."order" ASC', sql)
+        self.assertIn('ORDER BY "base_block"."website_id" ASC', self.changelist_sql()[-1])
+
+    def test_changelist_queries_do_not_grow(self):
+        counts = []
+        for _ in range(2):
+            owner = User.objects.create_user(f'owner{len(counts)}', password='pw')
+            website = Website.objects.create(owner=owner, title='Сайт')
+            Block.objects.bulk_create(Block(website=website, block_type='text', order=i) for i in range(20))
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.client.get('/admin/base/block/').status_code, 200)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+
+def png_bytes(size=(40, 30)):
+    buffer = io.BytesIO()
+    PILImage.new('RGB', size, (10, 20, 30)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+class WebsiteSettingsUploadTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='pw')
+        self.website = Website.objects.create(owner=self.owner, title='Сайт')
+        self.client = Client(enforce_csrf_checks=True)
+        self.client.force_login(self.owner)
+        self.url = f'/edit/{self.website.id}/'
+
+    def post_settings(self, logo):
+        self.client.get(self.url)
+        return self.client.post(self.url, {
+            'csrfmiddlewaretoken': self.client.cookies['csrftoken'].value,
+            'title': 'Новое название',
+            'header_logo': logo,
+        }, follow=True)
+
+    @override_settings(UPLOAD_MAX_REQUEST_SIZE=16 * 1024)
+    def test_oversized_request_shows_error(self):
+        logo = SimpleUploadedFile('logo.png', png_bytes() + b'\0' * 32 * 1024, 'image/png')
+        response = self.post_settings(logo)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Размер запроса превышает')
+        self.website.refresh_from_db()
+        self.assertEqual(self.website.title, 'Сайт')
+
+    def test_rejected_file_shows_error(self):
+        response = self.post_settings(SimpleUploadedFile('logo.png', b'not a png', 'image/png'))
+        self.assertContains(response, 'Содержимое файла не соответствует его типу')
+        self.assertFalse(Website.objects.get(id=self.website.id).header_logo)
+
+
+class TempMediaMixin:
+    """Медиа и незавершённые загрузки — во временных каталогах"""
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        overrides = override_settings(
+            MEDIA_ROOT=os.path.join(directory, 'media'),
+            CHUNKED_UPLOAD_DIR=os.path.join(directory, 'chunks'),
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+
+class UploadLimitsTests(TempMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.owner = User.objects.create_user('owner', password='pw')
+        self.client.force_login(self.owner)
+        website = Website.objects.create(owner=self.owner, title='Сайт')
+        self.block = Block.objects.create(website=website, block_type='slider')
+        self.url = f'/api/blocks/{self.block.id}/upload-slider-image/'
+
+    def upload(self, name, content, content_type):
+        return self.client.post(self.url, {'image': SimpleUploadedFile(name, content, content_type)})
+
+    def assertRejected(self, response, error):
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(error, response.json()['error'])
+
+    def test_accepts_image(self):
+        response = self.upload('a.png', png_bytes(), 'image/png')
+        self.assertEqual(response.status_code, 200, response.content)
+
+    def test_rejects_type(self):
+        self.assertRejected(self.upload('a.txt', b'text', 'text/plain'), 'Недопустимый тип файла')
+        self.assertRejected(self.upload('a.jpg', png_bytes(), 'image/png'), 'Расширение файла')
+        svg = b'<svg xmlns="http://www.w3.org/2000/svg"><script>alert(1)</script></svg>'
+        self.assertRejected(self.upload('a.svg', svg, 'image/svg+xml'), 'Недопустимый тип файла')
+
+    def test_rejects_magic_bytes(self):
+        self.assertRejected(self.upload('a.png', b'GIF89a' + b'\0' * 100, 'image/png'), 'Содержимое файла')
+
+    def test_storage_error_without_traceback(self):
+        with patch('base.views.media_storage', side_effect=OSError('Диск заполнен')), \
+                self.assertLogs('base.views', 'ERROR'):
+            response = self.upload('a.png', png_bytes(), 'image/png')
+        self.assertEqual(response.json(), {'success': False, 'error': 'Диск заполнен'})
+
+    @override_settings(UPLOAD_MAX_FILE_SIZE=64 * 1024)
+    def test_rejects_file_size(self):
+        self.assertRejected(self.upload('a.png', png_bytes() + b'\0' * 128 * 1024, 'image/png'), 'Файл больше')
+
+    @override_settings(UPLOAD_MAX_REQUEST_SIZE=64 * 1024)
+    def test_rejects_request_size(self):
+        self.assertRejected(self.upload('a.png', png_bytes() + b'\0' * 128 * 1024, 'image/png'), 'Размер запроса')
+
+
+class BlockApiQueriesTests(TempMediaMixin, TestCase):
+    """Число запросов к БД у API блока не зависит от данных; чужие блоки не видны"""
+
+    def setUp(self):
+        super().setUp()
+        self.owner = User.objects.create_user('owner', password='pw')
+        self.client.force_login(self.owner)
+        self.website = Website.objects.create(owner=self.owner, title='Сайт')
+        self.block = Block.objects.create(website=self.website, block_type='image')
+        self.slider = Block.objects.create(website=self.website, block_type='slider')
+
+    def image(self):
+        return SimpleUploadedFile('a.png', png_bytes(), 'image/png')
+
+    def test_get(self):
+        with self.assertNumQueries(3):
+            response = self.client.get(f'/api/blocks/{self.block.id}/')
+        self.assertEqual(response.json()['block']['id'], self.block.id)
+
+    def test_update(self):
+        with self.assertNumQueries(6):
+            response = self.client.put(f'/api/blocks/{self.block.id}/update/',
+                                       json.dumps({'data': {'alt': 'a'}}), content_type='application/json')
+        self.assertTrue(response.json()['success'], response.content)
+
+    def test_delete(self):
+        with self.assertNumQueries(6):
+            response = self.client.delete(f'/api/blocks/{self.block.id}/delete/')
+        self.assertTrue(response.json()['success'], response.content)
+        self.assertFalse(Block.objects.filter(id=self.block.id).exists())
+
+    def test_upload_image(self):
+        with self.assertNumQueries(6), patch('base.collab.block_changed') as block_changed, \
+                self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(f'/api/blocks/{self.block.id}/upload-image/', {'image': self.image()})
+        self.assertTrue(response.json()['success'], response.content)
+        # Картинку, варианты и рассылку редакторам делает _replace_block_image
+        block_changed.assert_called_once()
+        self.assertTrue(any(getattr(callback, 'job_key', '').startswith('variants:') for callback in callbacks))
+
+    def test_upload_slider_image(self):
+        with self.assertNumQueries(3):
+            response = self.client.post(f'/api/blocks/{self.slider.id}/upload-slider-image/', {'image': self.image()})
+        self.assertTrue(response.json()['success'], response.content)
+
+    def test_foreign_block_not_found(self):
+        other = User.objects.create_user('other', password='pw')
+        self.client.force_login(other)
+        requests = [
+            (self.client.get, ''),
+            (self.client.patch, 'update/'),
+            (self.client.delete, 'delete/'),
+            (self.client.post, 'upload-image/'),
+            (self.client.post, 'upload-slider-image/'),
+        ]
+        for method, action in requests:
+            with self.subTest(action=action):
+                self.assertEqual(method(f'/api/blocks/{self.block.id}/{action}').status_code, 404)
+        self.assertTrue(Block.objects.filter(id=self.block.id).exists())
+
+
+class UploadMemoryTests(TempMediaMixin, TestCase):
+    """Пиковая память при загрузке не растёт с размером файла"""
+    csrf_token = 'a' * 32
+    boundary = 'web-lego-test-boundary'
+
+    def setUp(self):
+        super().setUp()
+        owner = User.objects.create_user('owner', password='pw')
+        self.client.force_login(owner)
+        website = Website.objects.create(owner=owner, title='Сайт')
+        self.block = Block.objects.create(website=website, block_type='slider')
+        self.handler = WSGIHandler()
+
+    def multipart_body(self, size):
+        """Тело multipart-запроса с PNG размером ``size`` во временном файле"""
+        body = tempfile.TemporaryFile()
+        body.write((
+            f'--{self.boundary}\r\nContent-Disposition: form-data; name="image"; filename="big.png"\r\n'
+            'Content-Type: image/png\r\n\r\n'
+        ).encode())
+        head = png_bytes()
+        body.write(head)
+        padding = b'\0' * (1024 * 1024)
+        remaining = size - len(head)
+        while remaining > 0:
+            body.write(padding[:remaining])
+            remaining -= len(padding)
+        body.write(f'\r\n--{self.boundary}--\r\n'.encode())
+        length = body.tell()
+        body.seek(0)
+        return body, length
+
+    def peak_memory(self, size):
+        body, length = self.multipart_body(size)
+        self.addCleanup(body.close)
+        session = self.client.cookies[settings.SESSION_COOKIE_NAME].value
+        environ = {
+            **RequestFactory()._base_environ(),
+            'REQUEST_METHOD': 'POST',
+            'PATH_INFO': f'/api/blocks/{self.block.id}/upload-slider-image/',
+            'CONTENT_TYPE': f'multipart/form-data; boundary={self.boundary}',
+            'CONTENT_LENGTH': str(length),
+            'HTTP_COOKIE': f'{settings.SESSION_COOKIE_NAME}={session}; {settings.CSRF_COOKIE_NAME}={self.csrf_token}',
+            'HTTP_X_CSRFTOKEN': self.csrf_token,
+            'wsgi.input': body,
+        }
+        tracemalloc.start()
+        try:
+            response = self.handler(environ, lambda status, headers: None)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(response.status_code, 200, response.content)
+        response.close()
+        return peak
+
+    def test_peak_memory_is_flat(self):
+        small = self.peak_memory(2 * 1024 * 1024)
+        large = self.peak_memory(16 * 1024 * 1024)
+        # Файл целиком в памяти дал бы пик больше 16 МБ
+        self.assertLess(large, 2 * 1024 * 1024)
+        self.assertLess(large, small + 1024 * 1024)
+
+
+class ChunkedUploadTests(TempMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        owner = User.objects.create_user('owner', password='pw')
+        self.client.force_login(owner)
+        website = Website.objects.create(owner=owner, title='Сайт')
+        self.block = Block.objects.create(website=website, block_type='image')
+        self.content = png_bytes((200, 200))
+
+    def start(self):
+        response = self.client.post(f'/api/blocks/{self.block.id}/uploads/', json.dumps({
+            'filename': 'big.png', 'content_type': 'image/png', 'size': len(self.content), 'target': 'image',
+        }), content_type='application/json')
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()['upload_id']
+
+    def put(self, upload_id, start, end):
+        return self.client.put(
+            f'/api/uploads/{upload_id}/', self.content[start:end], content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes {start}-{end - 1}/{len(self.content)}',
+        )
+
+    def test_resume_after_conflict(self):
+        upload_id = self.start()
+        middle = len(self.content) // 2
+        self.assertEqual(self.put(upload_id, 0, middle).json()['offset'], middle)
+
+        # Клиент не получил ответ и повторяет ту же часть: сервер сообщает, где продолжить
+        response = self.put(upload_id, 0, middle)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['offset'], middle)
+        self.assertEqual(self.client.get(f'/api/uploads/{upload_id}/').json()['offset'], middle)
+
+        self.assertEqual(self.put(upload_id, middle, len(self.content)).json()['offset'], len(self.content))
+        with patch('base.collab.block_changed') as block_changed:
+            response = self.client.post(f'/api/uploads/{upload_id}/complete/')
+        self.assertEqual(response.status_code, 200, response.content)
+        block_changed.assert_called_once()
+        self.block.refresh_from_db()
+        with self.block.image.open('rb') as f:
+            self.assertEqual(f.read(), self.content)
+
+    def test_rejects_mismatched_content(self):
+        self.content = b'not a png' * 10
+        upload_id = self.start()
+        self.assertEqual(self.put(upload_id, 0, len(self.content)).status_code, 400)
+
+
+class StaticBundleTests(SimpleTestCase):
+    """Одна таблица стилей и не больше одного скрипта на страницу; сборка минифицирует и сжимает их"""
+    templates = os.path.join(os.path.dirname(__file__), 'templates', 'base')
+
+    def test_one_bundle_per_page(self):
+        for name in os.listdir(self.templates):
+            with open(os.path.join(self.templates, name), encoding='utf-8') as f:
+                assets = set(re.findall(r"{% static '([^']+)' %}", f.read()))
+            with self.subTest(template=name):
+                self.assertLessEqual(len([asset for asset in assets if asset.endswith('.css')]), 1)
+                self.assertLessEqual(len([asset for asset in assets if asset.endswith('.js')]), 1)
+
+    def test_collectstatic_minifies_hashes_and_compresses(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        storages = {**settings.STORAGES, 'staticfiles': {'BACKEND': 'base.staticfiles.MinifiedManifestStaticFilesStorage'}}
+        with override_settings(STATIC_ROOT=root, STORAGES=storages):
+            call_command('collectstatic', interactive=False, verbosity=0, ignore_patterns=['admin'])
+            stored = staticfiles_storage.stored_name('base/css/view_website.css')
+
+        self.assertRegex(stored, r'^base/css/view_website\.[0-9a-f]{12}\.css$')
+        with open(finders.find('base/css/view_website.css'), encoding='utf-8') as f:
+            source = f.read()
+        with open(os.path.join(root, stored), encoding='utf-8') as f:
+            minified = f.read()
+        self.assertLess(len(minified), len(source))
+        self.assertNotIn('/*', minified)
+        for extension in ('.gz', '.br'):
+            self.assertTrue(os.path.isfile(os.path.join(root, stored + extension)), extension)
+
+
+class ContentAddressedStorageTests(TempMediaMixin, SimpleTestCase):
+    def test_name_from_content(self):
+        storage = media_storage()
+        first = storage.save('blocks/slider/a.PNG', io.BytesIO(png_bytes()))
+        second = storage.save('b.png', io.BytesIO(png_bytes()))
+        other = storage.save('a.png', io.BytesIO(png_bytes((41, 30))))
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertRegex(first, r'^files/[0-9a-f]{2}/[0-9a-f]{64}\.png$')
+        self.assertEqual(content_digest(first), first.split('/')[2][:64])
+        self.assertEqual(storage.listdir(os.path.dirname(first))[1], [os.path.basename(first)])
+
+
+class MediaReferencesTests(TempMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.storage = media_storage()
+        self.website = Website.objects.create(owner=User.objects.create_user('owner'), title='Сайт')
+
+    def save(self, size, age=None):
+        name = self.storage.save('a.png', io.BytesIO(png_bytes(size)))
+        if age is not None:
+            mtime = time.time() - age.total_seconds()
+            os.utime(self.storage.path(name), (mtime, mtime))
+        return name
+
+    def ref_counts(self):
+        return dict(MediaFile.objects.values_list('name', 'ref_count'))
+
+    def test_ref_counts_follow_blocks(self):
+        first, second = self.save((40, 30)), self.save((41, 30))
+        block = Block.objects.create(website=self.website, block_type='slider', image=first,
+                                     data={'images': [settings.MEDIA_URL + first, settings.MEDIA_URL + second]})
+        Block.objects.create(website=self.website, block_type='image', image=second)
+        self.assertEqual(self.ref_counts(), {first: 1, second: 2})
+
+        block = Block.objects.get(pk=block.pk)
+        block.data = {'images': []}
+        block.save()
+        self.assertEqual(self.ref_counts(), {first: 1, second: 1})
+
+        block.delete()
+        self.assertEqual(self.ref_counts(), {first: 0, second: 1})
+        self.website.delete()
+        self.assertEqual(self.ref_counts(), {first: 0, second: 0})
+
+    def test_collect_garbage_after_grace_period(self):
+        hours = timedelta(hours=settings.MEDIA_GC_GRACE_HOURS)
+        live = self.save((40, 30), age=2 * hours)
+        orphan = self.save((41, 30), age=2 * hours)
+        recent = self.save((42, 30))
+        Block.objects.create(website=self.website, block_type='image', image=live)
+        variants = {name: images.generate_variants(name)['hash'] for name in (live, orphan)}
+        for name in self.storage.listdir(f'variants/{variants[orphan][:2]}/{variants[orphan]}')[1]:
+            mtime = time.time() - 2 * hours.total_seconds()
+            os.utime(self.storage.path(f'variants/{variants[orphan][:2]}/{variants[orphan]}/{name}'), (mtime, mtime))
+
+        self.assertEqual(media.collect_garbage(dry_run=True)[0], orphan)
+        self.assertTrue(self.storage.exists(orphan))
+
+        removed = media.collect_garbage()
+        self.assertEqual(removed[0], orphan)
+        self.assertTrue(all(name.startswith(f'variants/{variants[orphan][:2]}/{variants[orphan]}/')
+                            for name in removed[1:]))
+        self.assertGreater(len(removed), 1)
+        self.assertFalse(self.storage.exists(orphan))
+        self.assertTrue(self.storage.exists(live) and self.storage.exists(recent))
+        self.assertTrue(self.storage.exists(f'variants/{variants[live][:2]}/{variants[live]}'))
+
+    def test_recently_released_file_kept(self):
+        name = self.save((40, 30), age=timedelta(hours=2 * settings.MEDIA_GC_GRACE_HOURS))
+        Block.objects.create(website=self.website, block_type='image', image=name).delete()
+        self.assertEqual(media.collect_garbage(), [])
+        MediaFile.objects.update(updated_at=timezone.now() - timedelta(hours=2 * settings.MEDIA_GC_GRACE_HOURS))
+        self.assertEqual(media.collect_garbage(), [name])
+        self.assertFalse(MediaFile.objects.exists())
+
+
+class ImageVariantsTests(TempMediaMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        # Загрузки не в MEDIA_ROOT, где лежит хранилище по умолчанию: варианты
+        # должны попасть к оригиналам
+        overrides = override_settings(STORAGES={
+            **settings.STORAGES,
+            'media': {'BACKEND': 'base.storage.ContentAddressedStorage',
+                      'OPTIONS': {'location': os.path.join(settings.MEDIA_ROOT, os.pardir, 'uploads')}},
+        })
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.storage = media_storage()
+        self.name = self.storage.save('a.png', io.BytesIO(png_bytes((700, 400))))
+
+    def test_variants_stored_next_to_originals(self):
+        manifest = images.generate_variants(self.name)
+        self.assertEqual(manifest['hash'], content_digest(self.name))
+        self.assertEqual(manifest['widths'], [320, 640, 700])
+        variants = f'variants/{manifest["hash"][:2]}/{manifest["hash"]}'
+        for width in manifest['widths']:
+            for ext in manifest['formats']:
+                self.assertTrue(self.storage.exists(f'{variants}/{width}.{ext}'))
+        self.assertFalse(os.path.exists(os.path.join(settings.MEDIA_ROOT, 'variants')))
+
+        html = images.picture_html(self.storage.url(self.name), manifest, alt='a')
+        for width in manifest['widths']:
+            self.assertIn(f'{settings.MEDIA_URL}{variants}/{width}.jpg {width}w', html)
+
+    def test_picture_falls_back_to_original(self):
+        url = self.storage.url(self.name)
+        self.assertEqual(images.picture_html(url, None, alt='a'),
+                         f'<img src="{url}" alt="a" loading="lazy" decoding="async" />')
+        manifest = images.generate_variants(self.name)
+        html = images.picture_html(url, manifest, lazy=False)
+        self.assertTrue(html.startswith('<picture><source type="image/'))
+        self.assertIn(f'<img src="{url}" srcset="', html)
+        self.assertIn('width="700" height="400"', html)
+        self.assertNotIn('loading=', html)
+
+    def test_failed_variants_only_logged(self):
+        with self.assertLogs('base.images', 'ERROR'):
+            images.process_image('base.Block', 1, 'image_variants', 'files/00/missing.png')
+
+    def test_reuses_variants_of_same_content(self):
+        manifest = images.generate_variants(self.name)
+        with patch('base.images.Image.open') as image_open:
+            self.assertEqual(images.generate_variants(self.name), manifest)
+        image_open.assert_not_called()
+
+
+class ExportTests(TempMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.root = os.path.join(settings.MEDIA_ROOT, os.pardir, 'export')
+        owner = User.objects.create_user('owner', password='pw')
+        self.website = Website.objects.create(owner=owner, title='Сайт')
+        self.block = Block.objects.create(website=self.website, block_type='image')
+        self.block.image = SimpleUploadedFile('a.png', png_bytes((700, 400)), 'image/png')
+        self.block.save()
+        self.block.image_variants = {self.block.image.name: images.generate_variants(self.block.image.name)}
+        self.block.save()
+
+    def test_copies_every_srcset_candidate(self):
+        self.assertTrue(export.export_website(self.website.id, root=self.root))
+        site_dir = os.path.join(self.root, str(self.website.id))
+        with open(os.path.join(site_dir, 'index.html'), encoding='utf-8') as f:
+            html = f.read()
+
+        self.assertNotIn('"/media/', html)
+        self.assertNotIn(' /media/', html)
+        urls = re.findall(r'(?:src|srcset)="([^"]*)"', html)
+        candidates = [candidate.split()[0] for value in urls for candidate in value.split(', ')]
+        media = [url for url in candidates if url.startswith('media/')]
+        manifest = self.block.image_variants[self.block.image.name]
+        self.assertEqual(len(manifest['widths']), 3)
+        self.assertEqual(len(set(media)), 1 + len(manifest['widths']) * len(manifest['formats']))
+        for url in candidates:
+            if not url.startswith(('http', 'data:')):
+                self.assertTrue(os.path.isfile(os.path.join(site_dir, url)), url)
+
+    def test_skips_unchanged_website(self):
+        self.assertTrue(export.export_website(self.website.id, root=self.root))
+        self.assertFalse(export.export_website(self.website.id, root=self.root))
+        self.assertEqual(export.stale_websites(root=self.root), [])
+
+        Block.objects.create(website=self.website, block_type='text')
+        self.assertEqual(export.stale_websites(root=self.root), [self.website.id])
+        self.assertTrue(export.export_website(self.website.id, root=self.root))
+
+    def test_relinks_css_urls(self):
+        html = export._relink(
+            '<style>@font-face{src:url("/static/base/css/view_website.css")}</style>'
+            '<video poster="/media/missing.jpg" src="https://example.com/v.mp4"></video>',
+            os.path.join(self.root, 'x'),
+        )
+        self.assertEqual(html, '<style>@font-face{src:url("static/base/css/view_website.css")}</style>'
+                               '<video poster="media/missing.jpg" src="https://example.com/v.mp4"></video>')
+        self.assertTrue(os.path.isfile(os.path.join(self.root, 'x', 'static', 'base', 'css', 'view_website.css')))
+
+
+class FakeRedis:
+    def __init__(self):
+        self.published = []
+
+    def publish(self, channel, data):
+        self.published.append((channel, data))
+
+
+class CollabFanOutTests(TestCase):
+    """Диффы редакторам: в процессе и между процессами через Redis"""
+
+    def setUp(self):
+        self.received = {'a': [], 'b': []}
+        self.listeners = {name: messages.append for name, messages in self.received.items()}
+        for listener in self.listeners.values():
+            collab.join(1, listener)
+            self.addCleanup(collab.leave, 1, listener)
+        self.redis = FakeRedis()
+        patcher = patch('base.collab._redis', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_local_only_without_redis(self):
+        collab.publish(1, {'op': 'd', 'id': 5}, exclude=self.listeners['a'])
+        self.assertEqual(self.received, {'a': [], 'b': [{'op': 'd', 'id': 5}]})
+        self.assertEqual(self.redis.published, [])
+
+    @override_settings(COLLAB_REDIS_URL='redis://redis.invalid/0')
+    def test_publishes_to_other_processes(self):
+        collab.publish(1, {'op': 'd', 'id': 5}, exclude=self.listeners['a'])
+        self.assertEqual(self.received['b'], [{'op': 'd', 'id': 5}])
+        (channel, data), = self.redis.published
+        self.assertEqual(channel, 'web_lego:collab:1')
+        self.assertEqual(json.loads(data), {'origin': collab.PROCESS_ID, 'message': {'op': 'd', 'id': 5}})
+
+        # Своё сообщение из Redis второй раз не раздаётся, чужое — всем редакторам
+        collab.relay_message(channel.encode(), data)
+        self.assertEqual(self.received['b'], [{'op': 'd', 'id': 5}])
+        collab.relay_message(channel.encode(), json.dumps({'origin': 'other', 'message': {'op': 'd', 'id': 6}}))
+        self.assertEqual(self.received['a'], [{'op': 'd', 'id': 6}])
+        self.assertEqual(self.received['b'], [{'op': 'd', 'id': 5}, {'op': 'd', 'id': 6}])
+
+    @override_settings(COLLAB_REDIS_URL='redis://redis.invalid/0')
+    def test_publishes_without_local_editors(self):
+        # Сайт изменили в WSGI-воркере, где редакторов нет: дифф всё равно уходит в Redis
+        with self.captureOnCommitCallbacks(execute=True):
+            collab.block_deleted(2, 7)
+        self.assertEqual([channel for channel, _ in self.redis.published], ['web_lego:collab:2'])
+
+    def test_nothing_built_without_listeners(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            collab.publish_on_commit(2, lambda: self.fail('сообщение не нужно строить'))
+        self.assertEqual(callbacks, [])
+
+
+class WebSocketTests(TransactionTestCase):
+    """Соединение закрывает старые подключения к БД, поэтому тест идёт без общей транзакции"""
+
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='pw')
+        self.website = Website.objects.create(owner=self.owner, title='Сайт')
+        self.block = Block.objects.create(website=self.website, block_type='text', data={'content': 'a'})
+
+    def session_key(self, user):
+        client = Client()
+        client.force_login(user)
+        return client.cookies[settings.SESSION_COOKIE_NAME].value
+
+    def connect(self, session_key, origin='http://testserver'):
+        inbox, outbox = asyncio.Queue(), asyncio.Queue()
+        scope = {'type': 'websocket', 'path': f'/ws/websites/{self.website.id}/', 'headers': [
+            (b'host', b'testserver'), (b'origin', origin.encode()),
+            (b'cookie', f'{settings.SESSION_COOKIE_NAME}={session_key}'.encode()),
+        ]}
+        task = asyncio.ensure_future(websocket_application(scope, inbox.get, outbox.put))
+        inbox.put_nowait({'type': 'websocket.connect'})
+        return inbox, outbox, task
+
+    async def receive(self, outbox):
+        event = await asyncio.wait_for(outbox.get(), 5)
+        return json.loads(event['text']) if event['type'] == 'websocket.send' else event
+
+    def test_update_reaches_other_editor(self):
+        session_key = self.session_key(self.owner)
+
+        async def scenario():
+            (inbox_a, outbox_a, task_a), (inbox_b, outbox_b, task_b) = self.connect(session_key), self.connect(session_key)
+            self.assertEqual(await self.receive(outbox_a), {'type': 'websocket.accept'})
+            self.assertEqual(await self.receive(outbox_b), {'type': 'websocket.accept'})
+            await inbox_a.put({'type': 'websocket.receive', 'text': json.dumps(
+                {'op': 'u', 'ref': 1, 'id': self.block.id, 'v': 1, 'data': {'position_x': 5}})})
+            self.assertEqual(await self.receive(outbox_a), {'op': 'ack', 'ref': 1, 'id': self.block.id, 'v': 2})
+            self.assertEqual(await self.receive(outbox_b), {'op': 'u', 'id': self.block.id, 'v': 2, 'data': {'position_x': 5}})
+            await inbox_b.put({'type': 'websocket.receive', 'text': json.dumps(
+                {'op': 'u', 'ref': 2, 'id': self.block.id, 'v': 1, 'data': {'position_x': 9}})})
+            self.assertEqual((await self.receive(outbox_b))['op'], 'conflict')
+            for inbox, task in ((inbox_a, task_a), (inbox_b, task_b)):
+                await inbox.put({'type': 'websocket.disconnect', 'code': 1000})
+                await asyncio.wait_for(task, 5)
+
+        async_to_sync(scenario)()
+        self.assertEqual(collab.editors(self.website.id), 0)
+
+    def test_rejects_foreign_user_and_origin(self):
+        other = User.objects.create_user('other', password='pw')
+
+        attempts = ((self.session_key(other), 'http://testserver'), (self.session_key(self.owner), 'http://evil.example'))
+
+        async def scenario():
+            for session_key, origin in attempts:
+                _, outbox, task = self.connect(session_key, origin)
+                self.assertEqual(await self.receive(outbox), {'type': 'websocket.close', 'code': 4403})
+                await asyncio.wait_for(task, 5)
+
+        async_to_sync(scenario)()
+
+
+class ImmediateJobsTests(TestCase):
+    def setUp(self):
+        self.calls = []
+        jobs.register('tests.record')(lambda value: self.calls.append(value))
+        self.backend = jobs.ImmediateBackend()
+
+    def enqueue(self, value, key='k'):
+        self.backend.enqueue('tests.record', {'value': value}, key=key)
+
+    def test_same_key_runs_once_per_transaction(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.enqueue(1)
+            self.enqueue(2)
+        self.assertEqual(self.calls, [1])
+        self.assertEqual(self.backend._pending, set())
+
+    def test_rollback_releases_key(self):
+        try:
+            with transaction.atomic():
+                self.enqueue(1)
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        with self.captureOnCommitCallbacks(execute=True):
+            self.enqueue(2)
+        self.assertEqual(self.calls, [2])
+        self.assertEqual(self.backend._pending, set())
+
+
+class PageCacheTestsMixin:
+    """Кэш страниц на бэкенде ``cache_settings``: версии и счётчики попаданий"""
+    cache_settings = None
+
+    def setUp(self):
+        overrides = override_settings(CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            'pages': {'KEY_PREFIX': f'tests-{self.id()}', **self.cache_settings},
+        })
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.addCleanup(lambda: caches['pages'].clear())
+        page_cache.reset_stats()
+
+    def page(self, html):
+        return page_cache.CachedPage(html, f'"{html}"', 0)
+
+    def test_miss_then_hit(self):
+        page, version = page_cache.get_page(1)
+        self.assertIsNone(page)
+        page_cache.set_page(1, version, self.page('a'))
+        self.assertEqual(page_cache.get_page(1), (self.page('a'), version))
+        self.assertEqual(page_cache.stats(), {'hits': 1, 'misses': 1})
+
+    def test_bump_version_invalidates_only_its_site(self):
+        for website_id in (1, 2):
+            _, version = page_cache.get_page(website_id)
+            page_cache.set_page(website_id, version, self.page(str(website_id)))
+        page_cache.bump_version(1)
+        page, version = page_cache.get_page(1)
+        self.assertIsNone(page)
+        self.assertEqual(page_cache.get_page(2)[0], self.page('2'))
+        # Рендер со старой версией не должен стать попаданием
+        page_cache.set_page(1, version - 1, self.page('old'))
+        self.assertIsNone(page_cache.get_page(1)[0])
+
+    def test_bump_version_without_version_key(self):
+        page_cache.bump_version(3)
+        page, version = page_cache.get_page(3)
+        self.assertIsNone(page)
+        page_cache.set_page(3, version, self.page('a'))
+        self.assertEqual(page_cache.get_page(3)[0], self.page('a'))
+
+    def test_shared_between_workers(self):
+        # Отдельные подключения к кэшу, как в разных воркерах
+        workers = [caches.create_connection('pages') for _ in range(2)]
+
+        def in_worker(index, func, *args):
+            with patch('base.page_cache._cache', return_value=workers[index]):
+                return func(*args)
+
+        page, version = in_worker(0, page_cache.get_page, 5)
+        in_worker(0, page_cache.set_page, 5, version, self.page('a'))
+        self.assertEqual(in_worker(1, page_cache.get_page, 5), (self.page('a'), version))
+        in_worker(1, page_cache.bump_version, 5)
+        page, new_version = in_worker(0, page_cache.get_page, 5)
+        self.assertIsNone(page)
+        self.assertNotEqual(new_version, version)
+
+    def test_async_api(self):
+        page, version = async_to_sync(page_cache.aget_page)(4)
+        self.assertIsNone(page)
+        async_to_sync(page_cache.aset_page)(4, version, self.page('a'))
+        self.assertEqual(page_cache.get_page(4)[0], self.page('a'))
+
+
+class LocMemPageCacheTests(PageCacheTestsMixin, SimpleTestCase):
+    cache_settings = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-pages'}
+
+
+class FilePageCacheTests(PageCacheTestsMixin, SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.cache_settings = {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': directory}
+        super().setUp()
+
+
+class InMemoryRedis:
+    """Сервер Redis в памяти: команды, которые вызывает ``RedisCacheClient``.
+
+    Как и Redis, хранит байты, поэтому через него проходят сериализация
+    ``RedisSerializer`` и ``incr`` над числом в строке. Клиенты с одним адресом
+    видят одни данные, как воркеры, подключённые к одному серверу.
+    """
+    servers = {}
+
+    def __init__(self, url):
+        self.data = self.servers.setdefault(url, {})
+
+    def _encode(self, value):
+        return value if isinstance(value, bytes) else str(value).encode()
+
+    def _alive(self, key):
+        value, expires = self.data.get(key, (None, None))
+        if expires is not None and expires <= time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+    def get(self, key):
+        return self._alive(key)
+
+    def mget(self, keys):
+        return [self._alive(key) for key in keys]
+
+    def exists(self, *keys):
+        return sum(self._alive(key) is not None for key in keys)
+
+    def set(self, key, value, ex=None, nx=False):
+        if nx and self.exists(key):
+            return None
+        self.data[key] = (self._encode(value), None if ex is None else time.monotonic() + ex)
+        return True
+
+    def incr(self, key, delta=1):
+        value = int(self._alive(key) or 0) + delta
+        self.data[key] = (self._encode(value), self.data.get(key, (None, None))[1])
+        return value
+
+    def delete(self, *keys):
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    def expire(self, key, timeout):
+        if not self.exists(key):
+            return False
+        self.data[key] = (self.data[key][0], time.monotonic() + timeout)
+        return True
+
+    def persist(self, key):
+        if not self.exists(key):
+            return False
+        self.data[key] = (self.data[key][0], None)
+        return True
+
+    def flushdb(self):
+        self.data.clear()
+        return True
+
+
+class InMemoryRedisCacheClient(RedisCacheClient):
+    def __init__(self, servers, **options):
+        self._servers = servers
+        self._serializer = RedisSerializer()
+
+    def get_client(self, key=None, *, write=False):
+        return InMemoryRedis(self._servers[0])
+
+
+class InMemoryRedisCache(RedisCache):
+    """``RedisCache`` Django, подключённый к ``InMemoryRedis`` вместо сервера"""
+
+    def __init__(self, server, params):
+        super().__init__(server, params)
+        self._class = InMemoryRedisCacheClient
+
+
+class RedisPageCacheTests(PageCacheTestsMixin, SimpleTestCase):
+    cache_settings = {'BACKEND': 'base.tests.InMemoryRedisCache', 'LOCATION': 'redis://in-memory/1'}
+
+
+REDIS_URL = os.environ.get('TEST_REDIS_URL', 'redis://127.0.0.1:6379/15')
+
+
+def _redis_available():
+    try:
+        import redis
+        return redis.Redis.from_url(REDIS_URL, socket_connect_timeout=0.5).ping()
+    except Exception:
+        return False
+
+
+@skipUnless(_redis_available(), f'Redis-совместимый сервер недоступен ({REDIS_URL})')
+class LiveRedisPageCacheTests(PageCacheTestsMixin, SimpleTestCase):
+    cache_settings = {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': REDIS_URL}
+
+
+class ConditionalPageTests(TestCase):
+    """ETag/Last-Modified опубликованной страницы и ответы 304"""
+
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='pw')
+        self.website = Website.objects.create(owner=self.owner, title='Сайт')
+        self.old, self.new = (Block.objects.create(website=self.website, block_type='text', order=i) for i in range(2))
+        # Старый блок изменён давно, новый — позже: Last-Modified определяет новый
+        hour_ago = timezone.now() - timedelta(hours=1)
+        Website.objects.filter(id=self.website.id).update(updated_at=hour_ago)
+        Block.objects.filter(id=self.old.id).update(updated_at=hour_ago)
+        Block.objects.filter(id=self.new.id).update(updated_at=hour_ago + timedelta(minutes=30))
+        caches['pages'].clear()
+        self.url = f'/view/{self.website.id}/'
+
+    def test_not_modified(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Surrogate-Key'], f'site-{self.website.id}')
+
+        for headers in ({'HTTP_IF_NONE_MATCH': response['ETag']},
+                        {'HTTP_IF_MODIFIED_SINCE': response['Last-Modified']}):
+            with self.subTest(headers=headers), self.assertNumQueries(0):
+                self.assertEqual(self.client.get(self.url, **headers).status_code, 304)
+
+        caches['pages'].clear()
+        # Без страницы в кэше 304 отвечает по одному запросу валидаторов
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def test_block_delete_changes_last_modified(self):
+        response = self.client.get(self.url)
+        self.client.force_login(self.owner)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.delete(f'/api/blocks/{self.old.id}/delete/').status_code, 200)
+
+        for headers in ({'HTTP_IF_NONE_MATCH': response['ETag']},
+                        {'HTTP_IF_MODIFIED_SINCE': response['Last-Modified']}):
+            with self.subTest(headers=headers):
+                self.assertEqual(self.client.get(self.url, **headers).status_code, 200)
+
+    @override_settings(PAGE_BROWSER_MAX_AGE=0, PAGE_SHARED_MAX_AGE=600, PAGE_STALE_WHILE_REVALIDATE=30)
+    def test_cache_control(self):
+        cache_control = set(self.client.get(self.url)['Cache-Control'].split(', '))
+        self.assertEqual(cache_control, {'public', 'max-age=0', 's-maxage=600', 'stale-while-revalidate=30'})
+
+    @override_settings(PAGE_PURGE_HOOKS=['base.http_cache.http_purge', 'base.http_cache.log_purge'])
+    def test_purge_hooks(self):
+        http_cache._purge_hooks.cache_clear()
+        self.addCleanup(http_cache._purge_hooks.cache_clear)
+        with patch('base.signals.jobs.enqueue') as enqueue, self.captureOnCommitCallbacks(execute=True):
+            self.new.save()
+        enqueue.assert_called_once_with('pages.purge', key=f'purge:{self.website.id}', website_id=self.website.id)
+
+        # Ошибка одного хука не мешает остальным
+        with patch('urllib.request.urlopen', side_effect=OSError), \
+                self.assertLogs('base.http_cache') as logs:
+            http_cache.purge(self.website.id)
+        self.assertEqual(len(logs.records), 2)
+        self.assertEqual(logs.records[1].getMessage(), f'Сброс кэша сайта {self.website.id}: site-{self.website.id}')
+
+    def test_website_delete_does_not_touch_website(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.website.delete()
+        self.assertFalse([query for query in queries if query['sql'].startswith('UPDATE "base_website"')])
+
+
+class PublishedPageCacheTests(TestCase):
+    """Страница сайта берётся из кэша, пока сайт не изменился"""
+
+    def setUp(self):
+        page_cache.reset_stats()
+        caches['pages'].clear()
+        owner = User.objects.create_user('owner', password='pw')
+        self.website = Website.objects.create(owner=owner, title='Сайт')
+        self.block = Block.objects.create(website=self.website, block_type='text', data={'content': 'Первый'})
+
+    def test_block_change_invalidates_page(self):
+        url = f'/view/{self.website.id}/'
+        self.assertContains(self.client.get(url), 'Первый')
+        self.assertContains(self.client.get(url), 'Первый')
+        self.assertEqual(page_cache.stats(), {'hits': 1, 'misses': 1})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.block.data = {'content': 'Второй'}
+            self.block.save()
+        self.assertContains(self.client.get(url), 'Второй')
+        self.assertEqual(page_cache.stats(), {'hits': 1, 'misses': 2})
@@ -0,0 +1,165 @@
+"""Ограничения и потоковая обработка загружаемых файлов.
+
+``LimitedUploadHandler`` стоит первым в ``FILE_UPLOAD_HANDLERS`` и проверяет
+размер запроса, тип и размер каждого файла ещё до того, как стандартные
+обработчики Django положат файл в память или во временный файл. Отклонённый
+файл не попадает в ``request.FILES``, а причина сохраняется в
+``request.upload_error``. У слишком большого запроса пропускаются все файлы,
+но поля формы доступны, так что представление может ответить понятной ошибкой.
+
+Для больших файлов есть возобновляемая загрузка частями (``ChunkedUpload``):
+части дописываются в файл в ``CHUNKED_UPLOAD_DIR`` прямо из потока запроса,
+а готовый файл переносится в хранилище медиа по частям.
+"""
+import os
+
+from django.conf import settings
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile
+from django.template.defaultfilters import filesizeformat
+
+DEFAULT_MAX_FILE_SIZE = 20 * 1024 * 1024
+DEFAULT_MAX_REQUEST_SIZE = 25 * 1024 * 1024
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+DEFAULT_MAX_CHUNKED_SIZE = 100 * 1024 * 1024
+
+# SVG не принимаем: это документ со скриптами, который /media/ отдал бы
+# с origin самого сайта
+ALLOWED_IMAGE_TYPES = {
+    'image/jpeg': ('.jpg', '.jpeg'),
+    'image/png': ('.png',),
+    'image/gif': ('.gif',),
+    'image/webp': ('.webp',),
+    'image/avif': ('.avif',),
+}
+
+
+def max_file_size():
+    return getattr(settings, 'UPLOAD_MAX_FILE_SIZE', DEFAULT_MAX_FILE_SIZE)
+
+
+def max_request_size():
+    return getattr(settings, 'UPLOAD_MAX_REQUEST_SIZE', DEFAULT_MAX_REQUEST_SIZE)
+
+
+def max_chunked_size():
+    return getattr(settings, 'CHUNKED_UPLOAD_MAX_SIZE', DEFAULT_MAX_CHUNKED_SIZE)
+
+
+def chunk_size():
+    return getattr(settings, 'CHUNKED_UPLOAD_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+
+
+def chunked_upload_dir():
+    return str(getattr(settings, 'CHUNKED_UPLOAD_DIR', os.path.join(settings.BASE_DIR, 'upload_chunks')))
+
+
+def check_image_name(name, content_type):
+    """Вернуть текст ошибки, если тип или расширение файла не разрешены, иначе None"""
+    extensions = ALLOWED_IMAGE_TYPES.get((content_type or '').split(';')[0].strip().lower())
+    if extensions is None:
+        return f'Недопустимый тип файла: {content_type or "не указан"}'
+    if os.path.splitext(name or '')[1].lower() not in extensions:
+        return f'Расширение файла не соответствует типу {content_type}'
+    return None
+
+
+def sniff_image(head, content_type):
+    """Проверить сигнатуру начала файла на соответствие заявленному типу"""
+    content_type = (content_type or '').split(';')[0].strip().lower()
+    if content_type == 'image/jpeg':
+        return head.startswith(b'\xff\xd8\xff')
+    if content_type == 'image/png':
+        return head.startswith(b'\x89PNG\r\n\x1a\n')
+    if content_type == 'image/gif':
+        return head[:6] in (b'GIF87a', b'GIF89a')
+    if content_type == 'image/webp':
+        return head[:4] == b'RIFF' and head[8:12] == b'WEBP'
+    if content_type == 'image/avif':
+        return head[4:8] == b'ftyp' and head[8:12] in (b'avif', b'avis', b'mif1')
+    return False
+
+
+class LimitedUploadHandler(FileUploadHandler):
+    """Отклоняет слишком большие и неразрешённые файлы, не буферизуя их"""
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.max_file_size = max_file_size()
+        self.request_too_large = False
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        if content_length > max_request_size():
+            # Поля формы (в том числе csrfmiddlewaretoken) разбираем как обычно,
+            # а файлы пропускаем не читая в память: представление покажет ошибку
+            self.request_too_large = True
+            self._reject(f'Размер запроса превышает {filesizeformat(max_request_size())}')
+        return None
+
+    def new_file(self, field_name, file_name, content_type, content_length, charset=None, content_type_extra=None):
+        super().new_file(field_name, file_name, content_type, content_length, charset, content_type_extra)
+        if self.request_too_large:
+            raise SkipFile()
+        error = check_image_name(file_name, content_type)
+        if error is None and content_length is not None and content_length > self.max_file_size:
+            error = self._too_large_error()
+        if error:
+            self._reject(error)
+            raise SkipFile()
+
+    def receive_data_chunk(self, raw_data, start):
+        if start == 0 and not sniff_image(raw_data, self.content_type):
+            self._reject('Содержимое файла не соответствует его типу')
+            raise SkipFile()
+        if start + len(raw_data) > self.max_file_size:
+            self._reject(self._too_large_error())
+            raise SkipFile()
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
+
+    def _too_large_error(self):
+        return f'Файл больше {filesizeformat(self.max_file_size)}'
+
+    def _reject(self, error):
+        if self.request is not None:
+            self.request.upload_error = error
+
+
+def upload_error(request):
+    """Текст ошибки для отсутствующего в ``request.FILES`` файла"""
+    return getattr(request, 'upload_error', None) or 'Изображение не предоставлено'
+
+
+def part_path(upload):
+    return os.path.join(chunked_upload_dir(), f'{upload.id}.part')
+
+
+def append_chunk(upload, stream, length):
+    """Дописать ``length`` байт из потока запроса в файл загрузки.
+
+    Данные копируются блоками по 64 КБ, так что в памяти никогда не лежит
+    вся часть целиком. Возвращает число записанных байт.
+    """
+    path = part_path(upload)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    written = 0
+    with open(path, 'ab') as f:
+        # Если прошлая часть оборвалась на середине, отбрасываем её хвост
+        f.truncate(upload.offset)
+        while written < length:
+            data = stream.read(min(64 * 1024, length - written))
+            if not data:
+                break
+            if upload.offset == 0 and written == 0 and not sniff_image(data, upload.content_type):
+                raise ValueError('Содержимое файла не соответствует его типу')
+            f.write(data)
+            written += len(data)
+    return written
+
+
+def discard_part(upload):
+    try:
+        os.remove(part_path(upload))
+    except FileNotFoundError:
+        pass
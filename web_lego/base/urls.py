@@ -1,6 +1,15 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+
+def _view(name):
+    """Представление маршрута ``name``: async-версия, если маршрут указан в ASYNC_VIEWS"""
+    if name in settings.ASYNC_VIEWS:
+        return getattr(views, f'{name}_async')
+    return getattr(views, name)
+
+
 urlpatterns = [
     path('', views.home, name='home'),
     path('register/', views.register, name='register'),
@@ -8,15 +17,20 @@ urlpatterns = [
     path('dashboard/', views.dashboard, name='dashboard'), 
     path('create/', views.create_website, name='create_website'),
     path('edit/<int:website_id>/', views.edit_website, name='edit_website'),
-    path('view/<int:website_id>/', views.view_website, name='view_website'),
+    path('view/<int:website_id>/', _view('view_website'), name='view_website'),
     path('websites/<int:website_id>/delete/', views.delete_website, name='delete_website'),
     
     # API endpoints для блоков
     path('api/websites/<int:website_id>/blocks/', views.api_create_block, name='api_create_block'),
-    path('api/blocks/<int:block_id>/', views.api_get_block, name='api_get_block'),
-    path('api/blocks/<int:block_id>/update/', views.api_update_block, name='api_update_block'),
+    path('api/blocks/<int:block_id>/', _view('api_get_block'), name='api_get_block'),
+    path('api/blocks/<int:block_id>/update/', _view('api_update_block'), name='api_update_block'),
     path('api/blocks/<int:block_id>/delete/', views.api_delete_block, name='api_delete_block'),
+    path('api/blocks/<int:block_id>/move/', views.api_move_block, name='api_move_block'),
     path('api/blocks/<int:block_id>/upload-image/', views.api_upload_block_image, name='api_upload_block_image'),
     path('api/blocks/<int:block_id>/upload-slider-image/', views.api_upload_slider_image, name='api_upload_slider_image'),
+    path('api/blocks/<int:block_id>/uploads/', views.api_start_chunked_upload, name='api_start_chunked_upload'),
+    path('api/uploads/<uuid:upload_id>/', views.api_chunked_upload, name='api_chunked_upload'),
+    path('api/uploads/<uuid:upload_id>/complete/', views.api_complete_chunked_upload, name='api_complete_chunked_upload'),
     path('api/websites/<int:website_id>/blocks/reorder/', views.api_reorder_blocks, name='api_reorder_blocks'),
+    path('api/websites/<int:website_id>/blocks/batch/', views.api_batch_blocks, name='api_batch_blocks'),
 ]
\ No newline at end of file
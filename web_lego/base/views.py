@@ -1,21 +1,38 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
+from django.contrib.auth.views import redirect_to_login
 from django.contrib.auth import login
 from django.contrib import messages  
-from .models import Website, Block
+from .models import ORDER_GAP, ChunkedUpload, Website, Block
+from . import uploads
+from . import collab, http_cache, jobs, page_cache
+from .collab import BLOCK_UPDATE_FIELDS, serialize_block
+from .images import schedule_variants
+from .media import sync_references
+from .patches import merge_patch
+from .storage import media_storage
+from .signals import website_content_changed
 from .forms import RegisterForm
 from django.contrib.auth import authenticate, login
 from django.contrib.auth.forms import AuthenticationForm
-from django.http import JsonResponse
+from django.http import Http404, HttpResponse, HttpResponseNotAllowed, JsonResponse
+from django.template.loader import render_to_string
+from django.utils.cache import get_conditional_response
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.clickjacking import xframe_options_exempt
-from django.db import models
-from django.core.files.storage import default_storage
-from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.core.files.base import File
+from asgiref.sync import sync_to_async
+from collections import defaultdict
+from functools import wraps
 import json
+import logging
 import os
-from datetime import datetime
+
+logger = logging.getLogger(__name__)
 
 def home(request):
     return render(request, 'base/home.html')
@@ -49,7 +66,7 @@ def register(request):
 
 @login_required
 def dashboard(request):
-    websites = Website.objects.filter(owner=request.user)
+    websites = Website.objects.filter(owner=request.user, is_deleting=False).order_by('created_at')
     return render(request, 'base/dashboard.html', {'websites': websites})
 
 @login_required
@@ -66,10 +83,15 @@ def create_website(request):
 
 @login_required
 def edit_website(request, website_id):
-    website = get_object_or_404(Website, id=website_id, owner=request.user)
+    website = get_object_or_404(Website, id=website_id, owner=request.user, is_deleting=False)
     blocks = website.blocks.filter(is_active=True)
     
     if request.method == 'POST':
+        # Файл отклонён при загрузке (размер, тип, содержимое) — ничего не сохраняем
+        if getattr(request, 'upload_error', None):
+            messages.error(request, request.upload_error)
+            return redirect('edit_website', website_id=website.id)
+
         # Обновление основных настроек сайта
         website.title = request.POST.get('title', website.title)
         website.background_color = request.POST.get('background_color', website.background_color)
@@ -81,7 +103,8 @@ def edit_website(request, website_id):
         website.header_background_color = request.POST.get('header_background_color', website.header_background_color)
         website.header_text_color = request.POST.get('header_text_color', website.header_text_color)
         website.header_show = request.POST.get('header_show') == 'on'
-        if 'header_logo' in request.FILES:
+        logo_uploaded = 'header_logo' in request.FILES
+        if logo_uploaded:
             website.header_logo = request.FILES['header_logo']
         
         # Настройки Footer
@@ -91,29 +114,71 @@ def edit_website(request, website_id):
         website.footer_show = request.POST.get('footer_show') == 'on'
         
         website.save()
+        if logo_uploaded:
+            schedule_variants(website, 'header_logo_variants', website.header_logo.name)
         
         messages.success(request, 'Изменения сохранены успешно!')
         return redirect('edit_website', website_id=website.id)
     
     return render(request, 'base/edit_website.html', {
         'website': website,
-        'blocks': blocks
+        'blocks': blocks,
+        # Данные и версии блоков: редактор берёт их со страницы, а не запросом на каждый блок
+        'blocks_state': {block.id: {'data': block.get_data(), 'version': block.version} for block in blocks},
     })
 
+def _cached_page_response(request, website_id, page, etag, last_modified):
+    """304 на условный запрос или страница из кэша; None, если страницу нужно рендерить"""
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        return http_cache.add_page_headers(response, website_id, etag, last_modified)
+    if page is not None:
+        response = HttpResponse(page.html)
+        response['X-Page-Cache'] = 'HIT'
+        return http_cache.add_page_headers(response, website_id, etag, last_modified)
+    return None
+
+
+def _rendered_page_response(website_id, html, etag, last_modified):
+    response = HttpResponse(html)
+    response['X-Page-Cache'] = 'MISS'
+    return http_cache.add_page_headers(response, website_id, etag, last_modified)
+
+
 @xframe_options_exempt
 def view_website(request, website_id):
-    website = get_object_or_404(Website, id=website_id)
+    page, version = page_cache.get_page(website_id)
+    if page is not None:
+        etag, last_modified = page.etag, page.last_modified
+    else:
+        validators = http_cache.page_validators(website_id)
+        if validators is None:
+            raise Http404('Сайт не найден')
+        etag, last_modified = validators
+
+    # Условный запрос с актуальным ETag/Last-Modified — 304 без рендера
+    response = _cached_page_response(request, website_id, page, etag, last_modified)
+    if response is not None:
+        return response
+
+    website = get_object_or_404(Website, id=website_id, is_deleting=False)
     blocks = website.blocks.filter(is_active=True)
-    return render(request, 'base/view_website.html', {
+    html = render_to_string('base/view_website.html', {
         'website': website,
         'blocks': blocks
-    })
+    }, request=request)
+    page_cache.set_page(website_id, version, page_cache.CachedPage(html, etag, last_modified))
+    return _rendered_page_response(website_id, html, etag, last_modified)
 
 @login_required
 def delete_website(request, website_id):
     website = get_object_or_404(Website, id=website_id)
-    if request.user == website.owner:
-        website.delete()
+    if request.user.id == website.owner_id:
+        # Каскадное удаление блоков и файлов — в фоне; сайт сразу скрыт отовсюду
+        with transaction.atomic():
+            Website.objects.filter(id=website.id).update(is_deleting=True)
+            website_content_changed(website.id)
+            jobs.enqueue('websites.delete', key=f'delete-website:{website.id}', website_id=website.id)
         return redirect('dashboard')
     return redirect('dashboard')
 
@@ -123,21 +188,19 @@ def delete_website(request, website_id):
 @require_http_methods(["POST"])
 def api_create_block(request, website_id):
     """Создать новый блок"""
-    website = get_object_or_404(Website, id=website_id, owner=request.user)
+    website = get_object_or_404(Website, id=website_id, owner=request.user, is_deleting=False)
     
     try:
         data = json.loads(request.body)
         block_type = data.get('block_type', 'text')
         
-        # Получаем максимальный порядок
-        max_order = Block.objects.filter(website=website).aggregate(models.Max('order'))['order__max'] or 0
-        
         block = Block.objects.create(
             website=website,
             block_type=block_type,
-            order=max_order + 1,
+            order=website.blocks.next_order(),
             data=data.get('data', {})
         )
+        collab.block_created(block)
         
         return JsonResponse({
             'success': True,
@@ -152,85 +215,83 @@ def api_create_block(request, website_id):
         return JsonResponse({'success': False, 'error': str(e)}, status=400)
 
 
+def _get_own_block(request, block_id):
+    """Блок пользователя вместе с сайтом одним запросом; чужой блок — 404, как несуществующий"""
+    return get_object_or_404(Block.objects.select_related('website'), id=block_id, website__owner=request.user)
+
+
 @login_required
 @require_http_methods(["GET"])
 def api_get_block(request, block_id):
     """Получить информацию о блоке"""
-    block = get_object_or_404(Block, id=block_id)
-    
-    if block.website.owner != request.user:
-        return JsonResponse({'success': False, 'error': 'Нет доступа'}, status=403)
+    block = _get_own_block(request, block_id)
     
-    return JsonResponse({
-        'success': True,
-        'block': {
-            'id': block.id,
-            'block_type': block.block_type,
-            'order': block.order,
-            'data': block.get_data(),
-            'image_url': block.image.url if block.image else None
-        }
-    })
+    return JsonResponse({'success': True, 'block': serialize_block(block)})
+
+
+def _replace_block_image(block, image):
+    """Сохранить новую картинку блока и поставить в очередь её варианты"""
+    block.image = image
+    block.save()
+    schedule_variants(block, 'image_variants', block.image.name)
+    collab.block_changed(block)
+
+
+# Сколько раз перечитать блок, если его изменили параллельно с запросом без version
+UPDATE_BLOCK_ATTEMPTS = 3
+
+
+def _update_block(block, changes, partial):
+    """Изменить блок по телу PUT/PATCH-запроса API.
+
+    Записываются только переданные поля, одним ``UPDATE`` со сравнением версии
+    (``collab.update_block``). В PATCH ``data`` — JSON Merge Patch (RFC 7396):
+    ``{"data": {"position_x": 10}}`` меняет один ключ, ``null`` удаляет ключ. В PUT
+    ``data`` заменяет данные целиком, а изменения можно передать в ``data_patch``.
+    С ``version`` изменение применится, только если блок всё ещё этой версии;
+    без неё — поверх последней версии. Возвращает ``(блок, применено)``.
+    """
+    fields = {field: changes[field] for field in BLOCK_UPDATE_FIELDS if field in changes}
+    data_patch = changes.get('data_patch')
+    if partial and 'data' in fields and data_patch is None:
+        data_patch = fields.pop('data')
+    version = changes.get('version')
+
+    for _ in range(UPDATE_BLOCK_ATTEMPTS if version is None else 1):
+        if collab.update_block(block, block.version if version is None else version, fields, data_patch):
+            return block, True
+        # Блок изменили параллельно: перечитываем вместе со снимком его файлов
+        block = get_object_or_404(Block.objects.select_related('website'), id=block.id)
+    return block, False
+
+
+def _update_block_response(block, updated):
+    if not updated:
+        return JsonResponse({
+            'success': False, 'conflict': True, 'error': 'Блок изменён в другом окне',
+            'block': serialize_block(block),
+        }, status=409)
+    return JsonResponse({'success': True, 'block': serialize_block(block)})
 
 
 @login_required
 @require_http_methods(["PUT", "PATCH"])
 def api_update_block(request, block_id):
-    """Обновить блок"""
-    block = get_object_or_404(Block, id=block_id)
-    
-    if block.website.owner != request.user:
-        return JsonResponse({'success': False, 'error': 'Нет доступа'}, status=403)
+    """Обновить блок (см. ``_update_block``); при конфликте версий — 409 с текущим блоком"""
+    block = _get_own_block(request, block_id)
     
     try:
         # Проверяем, есть ли загруженный файл
         if request.FILES and 'image' in request.FILES:
-            block.image = request.FILES['image']
-            block.save()
-            return JsonResponse({
-                'success': True,
-                'block': {
-                    'id': block.id,
-                    'block_type': block.block_type,
-                    'order': block.order,
-                    'data': block.get_data(),
-                    'image_url': block.image.url if block.image else None
-                }
-            })
+            _replace_block_image(block, request.FILES['image'])
+            return JsonResponse({'success': True, 'block': serialize_block(block)})
         
         # Обычное обновление через JSON
         if not request.body:
             return JsonResponse({'success': False, 'error': 'Нет данных для обновления'}, status=400)
         
-        data = json.loads(request.body)
-        
-        if 'data' in data:
-            block.data = data['data']
-        if 'order' in data:
-            block.order = data['order']
-        if 'is_active' in data:
-            block.is_active = data['is_active']
-        if 'background_color' in data:
-            block.background_color = data['background_color']
-        if 'text_color' in data:
-            block.text_color = data['text_color']
-        if 'padding' in data:
-            block.padding = data['padding']
-        if 'margin' in data:
-            block.margin = data['margin']
-        
-        block.save()
-        
-        return JsonResponse({
-            'success': True,
-            'block': {
-                'id': block.id,
-                'block_type': block.block_type,
-                'order': block.order,
-                'data': block.get_data(),
-                'image_url': block.image.url if block.image else None
-            }
-        })
+        block, updated = _update_block(block, json.loads(request.body), partial=request.method == 'PATCH')
+        return _update_block_response(block, updated)
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)}, status=400)
 
@@ -239,12 +300,10 @@ def api_update_block(request, block_id):
 @require_http_methods(["DELETE"])
 def api_delete_block(request, block_id):
     """Удалить блок"""
-    block = get_object_or_404(Block, id=block_id)
-    
-    if block.website.owner != request.user:
-        return JsonResponse({'success': False, 'error': 'Нет доступа'}, status=403)
+    block = _get_own_block(request, block_id)
     
     block.delete()
+    collab.block_deleted(block.website_id, block_id)
     return JsonResponse({'success': True})
 
 
@@ -252,37 +311,54 @@ def api_delete_block(request, block_id):
 @require_http_methods(["POST"])
 def api_reorder_blocks(request, website_id):
     """Изменение порядка блоков"""
-    website = get_object_or_404(Website, id=website_id, owner=request.user)
+    website = get_object_or_404(Website, id=website_id, owner=request.user, is_deleting=False)
     
     try:
         data = json.loads(request.body)
         block_orders = data.get('blocks', [])  # [{'id': 1, 'order': 0}, ...]
         
-        for item in block_orders:
-            block = Block.objects.get(id=item['id'], website=website)
-            block.order = item['order']
-            block.save()
+        orders = {item['id']: item['order'] for item in block_orders}
+        if website.blocks.reorder(orders):
+            website_content_changed(website.id)
         
         return JsonResponse({'success': True})
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)}, status=400)
 
 
+@login_required
+@require_http_methods(["POST"])
+def api_move_block(request, block_id):
+    """Переместить блок сразу после блока after_id (null — в начало)"""
+    block = _get_own_block(request, block_id)
+    
+    try:
+        data = json.loads(request.body)
+        after = None
+        if data.get('after_id') is not None:
+            after = Block.objects.get(id=data['after_id'], website_id=block.website_id)
+        
+        block.move_after(after)
+        website_content_changed(block.website_id)
+        
+        return JsonResponse({'success': True, 'order': block.order})
+    except Block.DoesNotExist:
+        return JsonResponse({'success': False, 'error': 'Блок не принадлежит сайту'}, status=400)
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+
 @login_required
 @require_http_methods(["POST"])
 def api_upload_block_image(request, block_id):
     """Загрузить изображение для блока"""
-    block = get_object_or_404(Block, id=block_id)
-    
-    if block.website.owner != request.user:
-        return JsonResponse({'success': False, 'error': 'Нет доступа'}, status=403)
+    block = _get_own_block(request, block_id)
     
     if 'image' not in request.FILES:
-        return JsonResponse({'success': False, 'error': 'Изображение не предоставлено'}, status=400)
+        return JsonResponse({'success': False, 'error': uploads.upload_error(request)}, status=400)
     
     try:
-        block.image = request.FILES['image']
-        block.save()
+        _replace_block_image(block, request.FILES['image'])
         
         return JsonResponse({
             'success': True,
@@ -297,32 +373,22 @@ def api_upload_block_image(request, block_id):
 @require_http_methods(["POST"])
 def api_upload_slider_image(request, block_id):
     """Загрузить изображение для слайдера (не перезаписывает block.image)"""
-    block = get_object_or_404(Block, id=block_id)
-    
-    if block.website.owner != request.user:
-        return JsonResponse({'success': False, 'error': 'Нет доступа'}, status=403)
+    block = _get_own_block(request, block_id)
     
     if 'image' not in request.FILES:
-        return JsonResponse({'success': False, 'error': 'Изображение не предоставлено'}, status=400)
+        return JsonResponse({'success': False, 'error': uploads.upload_error(request)}, status=400)
     
     try:
         uploaded_file = request.FILES['image']
         
-        # Генерируем уникальное имя файла
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
-        file_extension = os.path.splitext(uploaded_file.name)[1] or '.jpg'
-        filename = f'slider_{block_id}_{timestamp}{file_extension}'
-        
-        # Читаем содержимое файла
-        file_content = uploaded_file.read()
-        # Возвращаем указатель в начало, если нужно
-        uploaded_file.seek(0)
+        # Хранилище копирует файл по частям (uploaded_file.chunks()),
+        # не читая его в память целиком, и называет его по хешу содержимого
+        file_path = media_storage().save(uploaded_file.name, uploaded_file)
         
-        # Сохраняем файл в папку blocks/slider/
-        file_path = default_storage.save(f'blocks/slider/{filename}', ContentFile(file_content))
+        schedule_variants(block, 'image_variants', file_path)
         
         # Получаем URL файла
-        image_url = default_storage.url(file_path)
+        image_url = media_storage().url(file_path)
         
         return JsonResponse({
             'success': True,
@@ -330,5 +396,377 @@ def api_upload_slider_image(request, block_id):
             'block_id': block.id
         })
     except Exception as e:
-        import traceback
-        return JsonResponse({'success': False, 'error': str(e) + '\n' + traceback.format_exc()}, status=400)
\ No newline at end of file
+        logger.exception('Не удалось загрузить изображение слайда для блока %s', block_id)
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+
+@login_required
+@require_http_methods(["POST"])
+def api_start_chunked_upload(request, block_id):
+    """Начать загрузку изображения частями.
+
+    Тело запроса: ``{"filename": ..., "content_type": ..., "size": ...,
+    "target": "slider"|"image"}``. Части отправляются PUT-запросами на
+    ``api/uploads/<upload_id>/`` с заголовком ``Content-Range``.
+    """
+    block = _get_own_block(request, block_id)
+    
+    try:
+        data = json.loads(request.body)
+        filename = os.path.basename(str(data.get('filename', '')))
+        content_type = str(data.get('content_type', ''))
+        size = int(data.get('size', 0))
+        target = data.get('target', 'slider')
+        
+        error = uploads.check_image_name(filename, content_type)
+        if error:
+            return JsonResponse({'success': False, 'error': error}, status=400)
+        if target not in dict(ChunkedUpload.TARGETS):
+            return JsonResponse({'success': False, 'error': f'Неизвестное назначение: {target}'}, status=400)
+        if not 0 < size <= uploads.max_chunked_size():
+            return JsonResponse({'success': False, 'error': 'Недопустимый размер файла'}, status=400)
+        
+        upload = ChunkedUpload.objects.create(
+            owner=request.user, block=block, target=target,
+            filename=filename, content_type=content_type, size=size,
+        )
+        return JsonResponse({
+            'success': True,
+            'upload_id': str(upload.id),
+            'offset': upload.offset,
+            'chunk_size': uploads.chunk_size(),
+        })
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+
+def _get_upload(request, upload_id, lock=False):
+    queryset = ChunkedUpload.objects.select_for_update() if lock else ChunkedUpload.objects
+    upload = queryset.filter(id=upload_id, owner=request.user).first()
+    if upload is None:
+        raise Http404('Загрузка не найдена')
+    return upload
+
+
+def _parse_content_range(header):
+    """``bytes <start>-<end>/<total>`` -> ``(start, end, total)``"""
+    unit, _, spec = header.partition(' ')
+    byte_range, _, total = spec.partition('/')
+    start, _, end = byte_range.partition('-')
+    if unit != 'bytes':
+        raise ValueError('Ожидается Content-Range в байтах')
+    return int(start), int(end), int(total)
+
+
+@login_required
+@require_http_methods(["GET", "PUT"])
+def api_chunked_upload(request, upload_id):
+    """Состояние загрузки (GET) или следующая часть файла (PUT).
+
+    Часть читается из потока запроса и сразу дописывается на диск. Если
+    ``start`` не совпадает с уже загруженным объёмом, возвращается 409 с
+    актуальным ``offset`` — клиент продолжает с этого места.
+    """
+    if request.method == 'GET':
+        upload = _get_upload(request, upload_id)
+        return JsonResponse({'success': True, 'offset': upload.offset, 'size': upload.size})
+    
+    try:
+        start, end, total = _parse_content_range(request.headers.get('Content-Range', ''))
+        length = int(request.headers.get('Content-Length') or 0)
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Некорректный заголовок Content-Range'}, status=400)
+    
+    try:
+        with transaction.atomic():
+            upload = _get_upload(request, upload_id, lock=True)
+            if total != upload.size or end - start + 1 != length or end >= upload.size:
+                return JsonResponse({'success': False, 'error': 'Диапазон не соответствует загрузке'}, status=400)
+            if length > uploads.chunk_size():
+                return JsonResponse({'success': False, 'error': 'Слишком большая часть'}, status=413)
+            if start != upload.offset:
+                return JsonResponse({'success': False, 'error': 'Неверное смещение', 'offset': upload.offset}, status=409)
+            
+            upload.offset += uploads.append_chunk(upload, request, length)
+            upload.save(update_fields=['offset', 'updated_at'])
+        return JsonResponse({'success': True, 'offset': upload.offset, 'size': upload.size})
+    except Http404:
+        raise
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+
+@login_required
+@require_http_methods(["POST"])
+def api_complete_chunked_upload(request, upload_id):
+    """Перенести полностью загруженный файл в хранилище медиа"""
+    upload = _get_upload(request, upload_id)
+    if not upload.is_complete:
+        return JsonResponse({'success': False, 'error': 'Файл загружен не полностью', 'offset': upload.offset}, status=400)
+    
+    try:
+        block = upload.block
+        with open(uploads.part_path(upload), 'rb') as f:
+            if upload.target == 'image':
+                _replace_block_image(block, File(f, name=upload.filename))
+                file_path = block.image.name
+            else:
+                file_path = media_storage().save(upload.filename, File(f))
+                schedule_variants(block, 'image_variants', file_path)
+        
+        uploads.discard_part(upload)
+        upload.delete()
+        
+        return JsonResponse({
+            'success': True,
+            'image_url': media_storage().url(file_path),
+            'block_id': block.id
+        })
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+
+@login_required
+@require_http_methods(["POST"])
+def api_batch_blocks(request, website_id):
+    """Применить пачку операций над блоками сайта в одной транзакции.
+
+    Тело запроса: ``{"operations": [...]}``, где каждая операция — одна из
+    ``{"op": "create", "block_type": ..., "data": {...}}``,
+    ``{"op": "update", "id": ..., <поля из BLOCK_UPDATE_FIELDS>}``,
+    в update вместо ``data`` можно передать ``data_patch`` — изменения ``data``
+    в формате JSON Merge Patch (RFC 7396), а с ``version`` изменение применится,
+    только если блок всё ещё этой версии (иначе результат с ``conflict`` и
+    текущим состоянием блока),
+    ``{"op": "delete", "id": ...}``,
+    ``{"op": "reorder", "blocks": [{"id": ..., "order": ...}, ...]}``.
+    В ответе ``results`` идут в том же порядке, что и операции.
+    """
+    website = get_object_or_404(Website, id=website_id, owner=request.user, is_deleting=False)
+
+    try:
+        operations = json.loads(request.body).get('operations', [])
+        if not isinstance(operations, list):
+            raise ValueError('operations должен быть списком')
+    except (ValueError, AttributeError) as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    # Все блоки, на которые ссылаются операции, загружаем одним запросом
+    referenced_ids = set()
+    for op in operations:
+        if not isinstance(op, dict):
+            continue
+        if op.get('op') in ('update', 'delete'):
+            referenced_ids.add(op.get('id'))
+        elif op.get('op') == 'reorder':
+            referenced_ids.update(item.get('id') for item in op.get('blocks', []) if isinstance(item, dict))
+    referenced_ids = {block_id for block_id in referenced_ids if isinstance(block_id, int)}
+    blocks = website.blocks.in_bulk(referenced_ids)
+
+    results = [None] * len(operations)
+    to_create = []
+    changed = {}
+    # Поля, которые изменились у каждого блока: записываются только они
+    changed_fields = defaultdict(set)
+    to_delete = set()
+    versioned = []
+
+    for index, op in enumerate(operations):
+        kind = op.get('op') if isinstance(op, dict) else None
+        if kind == 'create':
+            to_create.append((index, Block(
+                website=website,
+                block_type=op.get('block_type', 'text'),
+                data=op.get('data', {}),
+            )))
+        elif kind == 'update':
+            block = blocks.get(op.get('id'))
+            if block is None:
+                results[index] = {'success': False, 'error': 'Блок не найден'}
+                continue
+            if 'version' in op:
+                versioned.append((index, block, op))
+                continue
+            fields = [field for field in BLOCK_UPDATE_FIELDS if field in op]
+            for field in fields:
+                setattr(block, field, op[field])
+            if isinstance(op.get('data_patch'), dict):
+                block.data = merge_patch(block.data or {}, op['data_patch'])
+                fields.append('data')
+            changed[block.id] = block
+            changed_fields[block.id].update(fields)
+            results[index] = block
+        elif kind == 'delete':
+            if op.get('id') not in blocks:
+                results[index] = {'success': False, 'error': 'Блок не найден'}
+                continue
+            to_delete.add(op['id'])
+            results[index] = {'success': True, 'id': op['id']}
+        elif kind == 'reorder':
+            items = [item for item in op.get('blocks', []) if isinstance(item, dict)]
+            if any(item.get('id') not in blocks or not isinstance(item.get('order'), int) for item in items):
+                results[index] = {'success': False, 'error': 'Блок не принадлежит сайту или не указан порядок'}
+                continue
+            for item in items:
+                block = blocks[item['id']]
+                block.order = item['order']
+                changed[block.id] = block
+                changed_fields[block.id].add('order')
+            results[index] = {'success': True}
+        else:
+            results[index] = {'success': False, 'error': f'Неизвестная операция: {kind}'}
+
+    try:
+        with transaction.atomic():
+            if to_create:
+                next_order = website.blocks.next_order()
+                for offset, (index, block) in enumerate(to_create):
+                    block.order = next_order + offset * ORDER_GAP
+                Block.objects.bulk_create([block for _, block in to_create])
+                sync_references([block for _, block in to_create])
+                for index, block in to_create:
+                    results[index] = block
+                    collab.block_created(block)
+            changed = [block for block_id, block in changed.items() if block_id not in to_delete]
+            if changed:
+                now = timezone.now()
+                for block in changed:
+                    block.updated_at = now
+                    block.version = F('version') + 1
+                # Блоки с одинаковым набором изменённых полей — одним bulk_update;
+                # поля, которые у блока не менялись, не перезаписываются
+                groups = defaultdict(list)
+                for block in changed:
+                    groups[tuple(sorted(changed_fields[block.id]))].append(block)
+                for fields, group in groups.items():
+                    Block.objects.bulk_update(group, fields=[*fields, 'updated_at', 'version'])
+                versions = dict(Block.objects.filter(id__in=[block.id for block in changed]).values_list('id', 'version'))
+                for block in changed:
+                    block.version = versions[block.id]
+                    collab.block_changed(block)
+                sync_references(changed)
+            # Изменения с версией — по одному, сравнением версии в UPDATE
+            for index, block, op in versioned:
+                if block.id in to_delete:
+                    results[index] = {'success': False, 'error': 'Блок удалён'}
+                    continue
+                fields = {field: op[field] for field in BLOCK_UPDATE_FIELDS if field in op}
+                data_patch = op.get('data_patch') if isinstance(op.get('data_patch'), dict) else None
+                if collab.update_block(block, op['version'], fields, data_patch):
+                    results[index] = block
+                    continue
+                current = Block.objects.filter(id=block.id).first()
+                results[index] = {'success': False, 'conflict': True, 'error': 'Блок изменён в другом окне'}
+                if current is not None:
+                    results[index].update(block=serialize_block(current), **collab.rendered_block(current))
+            if to_delete:
+                website.blocks.filter(id__in=to_delete).delete()
+                for block_id in to_delete:
+                    collab.block_deleted(website.id, block_id)
+            if to_create or changed:
+                website_content_changed(website.id)
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    for index, result in enumerate(results):
+        if isinstance(result, Block):
+            results[index] = {'success': True, 'block': serialize_block(result)}
+    return JsonResponse({'success': True, 'results': results})
+
+
+# === Асинхронные версии представлений (ASGI) ===
+#
+# Под ASGI-сервером синхронное представление выполняется в пуле потоков, и
+# каждый запрос держит поток, пока ждёт БД или кэш. Асинхронные версии горячих
+# представлений ждут их в цикле событий. Какие маршруты обслуживают async-версии,
+# задаёт ASYNC_VIEWS (см. base/urls.py). Декораторы login_required и
+# require_http_methods в Django 4.2 async-представления не поддерживают,
+# поэтому ниже свои.
+
+def async_login_required(view):
+    """``login_required`` для асинхронного представления: сессия и пользователь читаются в потоке"""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        is_authenticated = await sync_to_async(lambda: request.user.is_authenticated)()
+        if not is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+def async_require_http_methods(methods):
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return HttpResponseNotAllowed(methods)
+            return await view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+async def view_website_async(request, website_id):
+    page, version = await page_cache.aget_page(website_id)
+    if page is not None:
+        etag, last_modified = page.etag, page.last_modified
+    else:
+        validators = await http_cache.apage_validators(website_id)
+        if validators is None:
+            raise Http404('Сайт не найден')
+        etag, last_modified = validators
+
+    response = _cached_page_response(request, website_id, page, etag, last_modified)
+    if response is None:
+        try:
+            website = await Website.objects.aget(id=website_id, is_deleting=False)
+        except Website.DoesNotExist:
+            raise Http404('Сайт не найден')
+        # Блоки загружаем заранее: шаблон рендерится без обращений к БД
+        blocks = [block async for block in website.blocks.filter(is_active=True)]
+        html = render_to_string('base/view_website.html', {
+            'website': website,
+            'blocks': blocks
+        }, request=request)
+        await page_cache.aset_page(website_id, version, page_cache.CachedPage(html, etag, last_modified))
+        response = _rendered_page_response(website_id, html, etag, last_modified)
+    response.xframe_options_exempt = True
+    return response
+
+
+async def _aget_own_block(request, block_id):
+    """Асинхронный ``_get_own_block``"""
+    try:
+        return await Block.objects.select_related('website').aget(id=block_id, website__owner_id=request.user.id)
+    except Block.DoesNotExist:
+        raise Http404('Блок не найден')
+
+
+@async_login_required
+@async_require_http_methods(["GET"])
+async def api_get_block_async(request, block_id):
+    """Получить информацию о блоке"""
+    block = await _aget_own_block(request, block_id)
+    return JsonResponse({'success': True, 'block': serialize_block(block)})
+
+
+@async_login_required
+@async_require_http_methods(["PUT", "PATCH"])
+async def api_update_block_async(request, block_id):
+    """Обновить блок (см. ``_update_block``); при конфликте версий — 409 с текущим блоком"""
+    block = await _aget_own_block(request, block_id)
+
+    try:
+        if request.FILES and 'image' in request.FILES:
+            await sync_to_async(_replace_block_image)(block, request.FILES['image'])
+            return JsonResponse({'success': True, 'block': serialize_block(block)})
+
+        if not request.body:
+            return JsonResponse({'success': False, 'error': 'Нет данных для обновления'}, status=400)
+
+        # Сравнение версии и запись — в транзакции, а она в Django синхронная
+        block, updated = await sync_to_async(_update_block)(
+            block, json.loads(request.body), partial=request.method == 'PATCH',
+        )
+        return _update_block_response(block, updated)
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
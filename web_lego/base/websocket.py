@@ -0,0 +1,159 @@
+"""WebSocket-канал редактора сайта: ``/ws/websites/<id>/``.
+
+Обычное ASGI-приложение без сторонних библиотек (см. web_lego/asgi.py).
+Подключиться может только владелец сайта: пользователь берётся из cookie
+сессии, как в HTTP-запросах. Редактор присылает операции (объект или массив
+объектов в одном сообщении) и получает ответы на них и диффы чужих изменений
+(протокол — в base/collab.py). Все сообщения — JSON.
+"""
+import asyncio
+import json
+import logging
+import re
+from http.cookies import CookieError, SimpleCookie
+from importlib import import_module
+from types import SimpleNamespace
+from urllib.parse import urlsplit
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.db import close_old_connections
+
+from . import collab
+from .models import Website
+
+logger = logging.getLogger(__name__)
+
+PATH_RE = re.compile(r'^/ws/websites/(?P<website_id>\d+)/$')
+
+# Сколько сообщений может ждать отправки медленному клиенту; дальше
+# соединение закрывается, и редактор переподключается
+SEND_QUEUE_LIMIT = 256
+MAX_MESSAGE_SIZE = 256 * 1024
+
+CLOSE_NOT_FOUND = 4404
+CLOSE_FORBIDDEN = 4403
+CLOSE_TOO_SLOW = 4008
+
+
+def _headers(scope):
+    return {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope.get('headers', ())}
+
+
+def _same_origin(headers):
+    """Страницы других сайтов не должны открывать канал с cookie пользователя"""
+    origin = headers.get('origin')
+    if not origin:
+        return True
+    host = headers.get('host', '')
+    return urlsplit(origin).hostname == urlsplit(f'//{host}').hostname
+
+
+def _session_key(headers):
+    try:
+        morsel = SimpleCookie(headers.get('cookie', '')).get(settings.SESSION_COOKIE_NAME)
+    except CookieError:
+        return None
+    return morsel.value if morsel else None
+
+
+def _in_request(func):
+    """Обращения к БД — в потоке, с теми же правилами переиспользования соединений, что у запросов"""
+    def wrapper(*args, **kwargs):
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+    return sync_to_async(wrapper)
+
+
+@_in_request
+def _is_owner(session_key, website_id):
+    engine = import_module(settings.SESSION_ENGINE)
+    user = get_user(SimpleNamespace(session=engine.SessionStore(session_key)))
+    return user.is_authenticated and Website.objects.filter(
+        id=website_id, owner=user, is_deleting=False,
+    ).exists()
+
+
+_apply_op = _in_request(collab.apply_op)
+
+
+class Connection:
+    """Очередь сообщений одного клиента; ``connection(message)`` можно вызывать из любого потока"""
+
+    def __init__(self, send):
+        self.send = send
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+        self.overflowed = False
+
+    def __call__(self, message):
+        try:
+            self.loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:
+            # Цикл событий уже остановлен — клиент отключился
+            pass
+
+    def _put(self, message):
+        if self.overflowed:
+            return
+        if self.queue.qsize() >= SEND_QUEUE_LIMIT:
+            self.overflowed = True
+            message = None
+        self.queue.put_nowait(message)
+
+    async def writer(self):
+        while True:
+            message = await self.queue.get()
+            if message is None:
+                await self.send({'type': 'websocket.close', 'code': CLOSE_TOO_SLOW})
+                return
+            await self.send({'type': 'websocket.send', 'text': json.dumps(message, ensure_ascii=False)})
+
+
+async def websocket_application(scope, receive, send):
+    event = await receive()
+    if event['type'] != 'websocket.connect':
+        return
+
+    match = PATH_RE.match(scope['path'])
+    if match is None:
+        await send({'type': 'websocket.close', 'code': CLOSE_NOT_FOUND})
+        return
+    website_id = int(match['website_id'])
+    headers = _headers(scope)
+    session_key = _session_key(headers)
+    if not _same_origin(headers) or not session_key or not await _is_owner(session_key, website_id):
+        await send({'type': 'websocket.close', 'code': CLOSE_FORBIDDEN})
+        return
+
+    await send({'type': 'websocket.accept'})
+    connection = Connection(send)
+    collab.join(website_id, connection)
+    writer = asyncio.ensure_future(connection.writer())
+    try:
+        while not writer.done():
+            event = await receive()
+            if event['type'] == 'websocket.disconnect':
+                break
+            if event['type'] != 'websocket.receive':
+                continue
+            text = event.get('text')
+            if text is None:
+                text = (event.get('bytes') or b'').decode('utf-8', 'replace')
+            if len(text) > MAX_MESSAGE_SIZE:
+                connection({'op': 'error', 'error': 'Слишком большое сообщение'})
+                continue
+            try:
+                ops = json.loads(text)
+            except ValueError:
+                connection({'op': 'error', 'error': 'Некорректный JSON'})
+                continue
+            for op in ops if isinstance(ops, list) else [ops]:
+                connection(await _apply_op(website_id, op, origin=connection))
+    finally:
+        collab.leave(website_id, connection)
+        writer.cancel()
@@ -3,7 +3,7 @@
 # Ждем готовности базы данных
 if [ -n "$POSTGRES_DB" ]; then
     echo "Waiting for PostgreSQL..."
-    while ! nc -z db 5432; do
+    while ! nc -z "${POSTGRES_HOST:-db}" "${POSTGRES_PORT:-5432}"; do
         sleep 0.1
     done
     echo "PostgreSQL started"
@@ -12,6 +12,9 @@ fi
 # Выполняем миграции
 python manage.py migrate --noinput
 
+# Скачиваем шрифты редактора (один раз; без сети страницы подключат Google Fonts)
+python manage.py fetch_fonts --if-missing || true
+
 # Собираем статические файлы
 python manage.py collectstatic --noinput || true
 
@@ -0,0 +1,46 @@
+"""Конфигурация gunicorn для продакшен-режима.
+
+Все параметры задаются переменными окружения:
+
+APP_SERVER            wsgi (gthread-воркеры) или asgi (воркеры uvicorn)
+GUNICORN_BIND         адрес, по умолчанию 0.0.0.0:8000
+GUNICORN_WORKERS      число процессов, по умолчанию 2 * CPU + 1 (1 при PAGE_CACHE_BACKEND=locmem)
+GUNICORN_THREADS      потоков на процесс (только wsgi), по умолчанию 4
+GUNICORN_KEEPALIVE    секунд держать keep-alive соединение, по умолчанию 5
+GUNICORN_TIMEOUT      таймаут воркера, по умолчанию 30
+GUNICORN_MAX_REQUESTS перезапуск воркера после N запросов (0 — никогда), по умолчанию 1000
+GUNICORN_MAX_REQUESTS_JITTER случайная добавка к max_requests, по умолчанию 100
+"""
+import multiprocessing
+import os
+
+app_server = os.environ.get('APP_SERVER', 'wsgi')
+
+if app_server == 'asgi':
+    wsgi_app = 'web_lego.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'web_lego.wsgi:application'
+    worker_class = 'gthread'
+    threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+
+# Кэш страниц в памяти процесса: воркер, обработавший изменение, сбросил бы
+# версию только у себя, а остальные отдавали бы старый HTML до PAGE_CACHE_TIMEOUT.
+# Поэтому без общего кэша по умолчанию запускается один воркер
+shared_page_cache = os.environ.get('PAGE_CACHE_BACKEND', 'locmem') != 'locmem'
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1 if shared_page_cache else 1))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', '5'))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '30'))
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', '1000'))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', '100'))
+
+if workers > 1 and not shared_page_cache:
+    raise RuntimeError(
+        'PAGE_CACHE_BACKEND=locmem работает только с одним воркером: '
+        'задайте PAGE_CACHE_BACKEND=redis или file, либо GUNICORN_WORKERS=1'
+    )
+
+accesslog = '-'
+errorlog = '-'
@@ -27,6 +27,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Раздача статики без runserver (в том числе под gunicorn); работает и в async-режиме
+    'base.middleware.AsyncWhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -59,6 +61,7 @@ WSGI_APPLICATION = 'web_lego.wsgi.application'
 # Настройка базы данных
 # Если используется Docker с PostgreSQL, используем его, иначе SQLite
 if os.environ.get('POSTGRES_DB'):
+    POSTGRES_CONN_MAX_AGE = os.environ.get('POSTGRES_CONN_MAX_AGE', '60')
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.postgresql',
@@ -67,8 +70,23 @@ if os.environ.get('POSTGRES_DB'):
             'PASSWORD': os.environ.get('POSTGRES_PASSWORD', 'web_lego_password'),
             'HOST': os.environ.get('POSTGRES_HOST', 'db'),
             'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+            # Постоянные соединения: не открывать новое TCP-соединение на каждый запрос.
+            # 0 — закрывать после запроса, пустое значение — держать без ограничения.
+            'CONN_MAX_AGE': int(POSTGRES_CONN_MAX_AGE) if POSTGRES_CONN_MAX_AGE else None,
+            # Проверять соединение перед повторным использованием в новом запросе
+            'CONN_HEALTH_CHECKS': os.environ.get('POSTGRES_CONN_HEALTH_CHECKS', 'True') == 'True',
         }
     }
+
+    # Режим пула (POSTGRES_POOL=pgbouncer): приложение ходит в PgBouncer,
+    # который держит ограниченный набор соединений с PostgreSQL
+    if os.environ.get('POSTGRES_POOL') == 'pgbouncer':
+        DATABASES['default'].update({
+            'HOST': os.environ.get('POSTGRES_POOL_HOST', 'pgbouncer'),
+            'PORT': os.environ.get('POSTGRES_POOL_PORT', '6432'),
+            # В режиме pool_mode=transaction серверные курсоры между транзакциями не живут
+            'DISABLE_SERVER_SIDE_CURSORS': True,
+        })
 else:
     DATABASES = {
         'default': {
@@ -78,6 +96,96 @@ else:
     }
 
 
+# Кэш отрендеренных страниц опубликованных сайтов (view_website)
+# PAGE_CACHE_BACKEND: locmem (по умолчанию), file или redis.
+# locmem живёт внутри одного процесса, поэтому при нескольких воркерах
+# нужен общий бэкенд — file или redis (подойдёт любой Redis-совместимый сервер).
+PAGE_CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+}
+PAGE_CACHE_BACKEND = os.environ.get('PAGE_CACHE_BACKEND', 'locmem')
+PAGE_CACHE_LOCATIONS = {
+    'locmem': 'web-lego-pages',
+    'file': str(BASE_DIR / 'page_cache'),
+    'redis': 'redis://127.0.0.1:6379/1',
+}
+PAGE_CACHE_ALIAS = 'pages'
+PAGE_CACHE_TIMEOUT = int(os.environ.get('PAGE_CACHE_TIMEOUT', '3600'))
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    PAGE_CACHE_ALIAS: {
+        'BACKEND': PAGE_CACHE_BACKENDS[PAGE_CACHE_BACKEND],
+        'LOCATION': os.environ.get('PAGE_CACHE_LOCATION', PAGE_CACHE_LOCATIONS[PAGE_CACHE_BACKEND]),
+        'KEY_PREFIX': 'web_lego',
+        'TIMEOUT': PAGE_CACHE_TIMEOUT,
+        'OPTIONS': {'MAX_ENTRIES': 5000} if PAGE_CACHE_BACKEND != 'redis' else {},
+    },
+}
+
+# HTTP-кэширование опубликованных страниц (base/http_cache.py).
+# Браузер по умолчанию перепроверяет страницу при каждом заходе (получая 304),
+# общий кэш (CDN, Varnish) держит её PAGE_SHARED_MAX_AGE секунд или до сброса хуком.
+PAGE_BROWSER_MAX_AGE = int(os.environ.get('PAGE_BROWSER_MAX_AGE', '0'))
+PAGE_SHARED_MAX_AGE = int(os.environ.get('PAGE_SHARED_MAX_AGE', '300'))
+PAGE_STALE_WHILE_REVALIDATE = int(os.environ.get('PAGE_STALE_WHILE_REVALIDATE', '60'))
+# Меняется при деплое, чтобы новые шаблоны не отдавались как 304 по старому ETag
+PAGE_ETAG_SALT = os.environ.get('RELEASE_ID', '')
+PAGE_SURROGATE_KEY_HEADER = os.environ.get('PAGE_SURROGATE_KEY_HEADER', 'Surrogate-Key')
+# Хуки сброса внешнего кэша: функции hook(website_id, keys), через запятую
+PAGE_PURGE_HOOKS = [hook for hook in os.environ.get('PAGE_PURGE_HOOKS', '').split(',') if hook]
+PAGE_PURGE_URL = os.environ.get('PAGE_PURGE_URL', '')
+
+# Общие стили блоков выводятся классами b-<хеш> вместо повторяющихся inline-стилей
+# (base/renderers.py, manage.py page_size_report)
+PAGE_HOIST_STYLES = os.environ.get('PAGE_HOIST_STYLES', 'True') == 'True'
+
+# Наборы символов локальных веб-шрифтов (manage.py fetch_fonts, base/fonts.py)
+FONT_SUBSETS = [subset for subset in os.environ.get('FONT_SUBSETS', 'cyrillic,latin').split(',') if subset]
+
+# Статический экспорт опубликованных сайтов (manage.py export_sites)
+STATIC_EXPORT_ROOT = os.environ.get('STATIC_EXPORT_ROOT', str(BASE_DIR / 'static_export'))
+STATIC_EXPORT_ON_SAVE = os.environ.get('STATIC_EXPORT_ON_SAVE', 'False') == 'True'
+
+# Фоновые задачи (base/jobs.py): immediate, thread или database.
+# С database задачи выполняет manage.py run_jobs
+JOBS_BACKEND = os.environ.get('JOBS_BACKEND', 'thread')
+JOBS_THREAD_WORKERS = int(os.environ.get('JOBS_THREAD_WORKERS', '2'))
+# Задержка перед первой повторной попыткой, дальше она удваивается
+JOBS_RETRY_DELAY = int(os.environ.get('JOBS_RETRY_DELAY', '10'))
+# Задача, которая выполняется дольше, считается брошенной и возвращается в очередь
+JOBS_STALE_TIMEOUT = int(os.environ.get('JOBS_STALE_TIMEOUT', '3600'))
+JOBS_KEEP_DONE_HOURS = int(os.environ.get('JOBS_KEEP_DONE_HOURS', '24'))
+
+# Маршруты, которые обслуживают асинхронные версии представлений (base/urls.py),
+# через запятую: view_website, api_get_block, api_update_block. Имеет смысл под ASGI
+ASYNC_VIEWS = [name for name in os.environ.get('ASYNC_VIEWS', '').split(',') if name]
+
+# Redis для рассылки диффов совместного редактирования между процессами
+# (base/collab.py). Пусто — диффы доходят только до редакторов того же процесса
+COLLAB_REDIS_URL = os.environ.get('COLLAB_REDIS_URL', '')
+
+# Загрузка файлов: LimitedUploadHandler отклоняет файлы до буферизации,
+# крупные файлы стандартные обработчики пишут во временный файл, а не в память
+FILE_UPLOAD_HANDLERS = [
+    'base.uploads.LimitedUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+FILE_UPLOAD_MAX_MEMORY_SIZE = int(os.environ.get('FILE_UPLOAD_MAX_MEMORY_SIZE', str(1024 * 1024)))
+UPLOAD_MAX_FILE_SIZE = int(os.environ.get('UPLOAD_MAX_FILE_SIZE', str(20 * 1024 * 1024)))
+UPLOAD_MAX_REQUEST_SIZE = int(os.environ.get('UPLOAD_MAX_REQUEST_SIZE', str(25 * 1024 * 1024)))
+
+# Возобновляемая загрузка частями (api/blocks/<id>/uploads/)
+CHUNKED_UPLOAD_DIR = os.environ.get('CHUNKED_UPLOAD_DIR', str(BASE_DIR / 'upload_chunks'))
+CHUNKED_UPLOAD_CHUNK_SIZE = int(os.environ.get('CHUNKED_UPLOAD_CHUNK_SIZE', str(1024 * 1024)))
+CHUNKED_UPLOAD_MAX_SIZE = int(os.environ.get('CHUNKED_UPLOAD_MAX_SIZE', str(100 * 1024 * 1024)))
+
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -107,9 +215,29 @@ USE_TZ = True
 
 
 STATIC_URL = 'static/'
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+# В STATIC_ROOT остаются только файлы с хешем в имени: их можно кэшировать навсегда
+WHITENOISE_KEEP_ONLY_HASHED_FILES = True
+STATIC_MINIFY = os.environ.get('STATIC_MINIFY', 'True') == 'True'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Загруженные пользователями файлы хранятся по хешу содержимого (base/storage.py),
+# поэтому одинаковые загрузки не дублируются на диске
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'media': {'BACKEND': 'base.storage.ContentAddressedStorage'},
+    # В продакшене статика минифицируется, хешируется и сжимается при collectstatic
+    # (base/staticfiles.py); в режиме отладки отдаётся как есть из исходников
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage' if DEBUG
+        else 'base.staticfiles.MinifiedManifestStaticFilesStorage',
+    },
+}
+
+# Через сколько часов файл без ссылок может удалить manage.py gc_media
+MEDIA_GC_GRACE_HOURS = int(os.environ.get('MEDIA_GC_GRACE_HOURS', '24'))
+
 LOGIN_URL = '/login/'
 LOGIN_REDIRECT_URL = '/dashboard/'
 LOGOUT_REDIRECT_URL = '/'